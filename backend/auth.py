@@ -1,15 +1,20 @@
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Dict, Optional, Set, Tuple
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
-from database import get_db
+from database import AsyncSessionLocal
 from models import User
+from passwords import PasswordHasher, make_password_context
 from schemas import TokenData
 
 load_dotenv()
@@ -19,14 +24,19 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# Usuarios autenticados recientes (por token), para no ir a la base en cada request
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# Costo de bcrypt; los hashes guardados con otro costo se actualizan en el próximo login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Hilos para bcrypt (uno por núcleo) y cuántos hashes pueden esperar antes de responder 503
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(4 * PASSWORD_HASH_WORKERS)))
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+pwd_context = make_password_context(BCRYPT_ROUNDS)
+password_hasher = PasswordHasher(pwd_context, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -38,7 +48,77 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+class PrincipalCache:
+    """LRU con TTL de los usuarios autenticados (con sus conexiones), por token."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        max_size: int = 1024,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.time
+    ):
+        self.session_factory = session_factory
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[1] <= self.clock():
+                self._forget(token)
+                return None
+            self._entries.move_to_end(token)
+            return entry[0]
+
+    def put(self, token: str, user: User, token_expires_at: Optional[float] = None) -> None:
+        expires_at = self.clock() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        with self._lock:
+            self._entries[token] = (user, expires_at)
+            self._entries.move_to_end(token)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_size:
+                self._forget(next(iter(self._entries)))
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._forget(token)
+
+    def _forget(self, token: str) -> None:
+        user, _ = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(user.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user.id]
+
+    async def load(self, username: str) -> Optional[User]:
+        """El usuario y sus dos conexiones en una sola consulta."""
+        async with self.session_factory() as db:
+            result = await db.execute(select(User).options(
+                joinedload(User.spotify_connection),
+                joinedload(User.youtube_connection)
+            ).filter(User.username == username))
+            return result.scalars().first()
+
+
+principal_cache = PrincipalCache(AsyncSessionLocal, max_size=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    # El token ya se validó cuando se guardó y la entrada no dura más que él
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -56,10 +136,11 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         print("JWTError")
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == token_data.username).first()
+    user = await principal_cache.load(token_data.username)
     if user is None:
         print("User is None")
         raise credentials_exception
+    principal_cache.put(token, user, payload.get("exp"))
     return user
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
@@ -0,0 +1,113 @@
+"""Requests por segundo de /me y /token con la app en proceso (httpx + ASGITransport).
+
+Usa una base SQLite temporal con `--users` usuarios y `--concurrency` clientes
+concurrentes que piden cada ruta durante `--duration` segundos. Por defecto el cache de
+usuarios autenticados está apagado (AUTH_CACHE_TTL_SECONDS=0), así cada /me va a la base
+como la primera vez que se ve un token; con --auth-cache se mide con el cache.
+Las contraseñas se hashean con un costo de bcrypt bajo (BCRYPT_ROUNDS=4, o --bcrypt-rounds)
+para que /token mida el acceso a la base y no el hash.
+
+Requiere httpx. Uso: python benchmarks/bench_auth_routes.py [--concurrency 32] [--duration 5] [--auth-cache]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import fakes  # noqa: F401  (agrega el backend al sys.path)
+
+
+def setup_users(count: int) -> None:
+    from auth import pwd_context
+    from database import SessionLocal
+    from models import User
+
+    # Con el mismo costo que el contexto configurado: si no, el primer login de cada
+    # usuario lo rehashea y /token mide eso
+    hashed = pwd_context.hash("bench")
+    db = SessionLocal()
+    db.add_all([User(email=f"bench{i}@test.dev", username=f"bench{i}", hashed_password=hashed) for i in range(count)])
+    db.commit()
+    db.close()
+
+
+async def hammer(client, method: str, path: str, kwargs_for, stop: asyncio.Event, latencies, errors) -> None:
+    i = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.request(method, path, **kwargs_for(i))
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+        i += 1
+        # Un hit del cache no espera ningún I/O: sin esto este cliente no suelta el event
+        # loop y los que esperan una conexión de la base vencen el pool_timeout
+        await asyncio.sleep(0)
+
+
+async def measure(client, name, method, path, kwargs_for, concurrency: int, duration: float) -> None:
+    latencies, errors = [], []
+    stop = asyncio.Event()
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(hammer(client, method, path, (lambda i, w=w: kwargs_for(w, i)), stop, latencies, errors))
+             for w in range(concurrency)]
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    # El tiempo real: si los requests no ceden el event loop, el sleep se despierta tarde
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:>7}: {len(latencies) / elapsed:7.0f} req/s, p50 {statistics.median(latencies) * 1000:6.1f}ms, "
+          f"p99 {p99 * 1000:6.1f}ms, {len(errors)} errores", file=sys.__stdout__)
+
+
+async def run(args) -> None:
+    import httpx
+    import main
+
+    setup_users(args.users)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        tokens = []
+        for i in range(args.users):
+            response = await client.post("/token", json={"username": f"bench{i}", "password": "bench"})
+            tokens.append(response.json()["access_token"])
+
+        def me(worker, i):
+            return {"headers": {"Authorization": f"Bearer {tokens[(worker + i) % len(tokens)]}"}}
+
+        def login(worker, i):
+            return {"json": {"username": f"bench{(worker + i) % args.users}", "password": "bench"}}
+
+        await measure(client, "/me", "GET", "/me", me, args.concurrency, args.duration)
+        await measure(client, "/token", "POST", "/token", login, args.concurrency, args.duration)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--auth-cache", action="store_true")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_auth.db"
+    os.environ["AUTH_CACHE_TTL_SECONDS"] = "60" if args.auth_cache else "0"
+    os.environ["AUTO_SYNC_ENABLED"] = "false"
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    # Todos los clientes pueden esperar un hash: acá no interesa medir el 503 de /token
+    os.environ["PASSWORD_HASH_MAX_PENDING"] = str(args.concurrency)
+    print(f"{args.users} usuarios, {args.concurrency} clientes concurrentes, {args.duration:.0f}s por ruta, "
+          f"cache de usuarios {'activado' if args.auth_cache else 'apagado'}")
+    # Sin el log de cada token recibido; los resultados van a sys.__stdout__
+    sys.stdout = open(os.devnull, "w")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main_cli()
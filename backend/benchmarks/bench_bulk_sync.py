@@ -0,0 +1,76 @@
+"""Compara sincronizar muchos pares de playlists uno por uno contra sync_many.
+
+Las playlists de Spotify se arman con canciones de un mismo catálogo, así muchas se
+repiten entre playlists (como pasa con las playlists de un mismo usuario). Uno por uno,
+cada par se compara y resuelve por separado; sync_many compara los pares en paralelo y
+busca una sola vez cada canción que falta en más de un destino. No se usa el cache de
+resoluciones, para medir sólo lo que ahorra la unión de faltantes.
+
+Uso: python benchmarks/bench_bulk_sync.py [--pairs 20] [--tracks 200] [--catalog 1000] [--latency 0.01]
+"""
+import argparse
+import random
+import time
+
+from fakes import FakeSpotify, FakeYouTube, make_catalog
+from match_cache import SPOTIFY_TO_YOUTUBE, YOUTUBE_TO_SPOTIFY
+from playlist_sync import PlaylistSync
+from quota import YOUTUBE_QUOTA_COSTS
+
+
+def clients(args, direction: str, seed: int = 7):
+    """Clientes con `pairs` playlists por lado; al destino le falta la mitad de cada una."""
+    rng = random.Random(seed)
+    catalog = make_catalog(args.catalog)
+    full, half = [], []
+    for _ in range(args.pairs):
+        tracks = rng.sample(catalog, args.tracks)
+        full.append(tracks)
+        half.append(tracks[:args.tracks // 2])
+    spotify, youtube = (full, half) if direction == SPOTIFY_TO_YOUTUBE else (half, full)
+    sp = FakeSpotify([], args.latency, playlists={f"sp{i}": tracks for i, tracks in enumerate(spotify)})
+    yt = FakeYouTube([], args.latency, catalog=catalog, playlists={f"yt{i}": tracks for i, tracks in enumerate(youtube)})
+    return sp, yt
+
+
+def run(args, direction: str, bulk: bool):
+    sp, yt = clients(args, direction)
+    pairs = [(f"sp{i}", f"yt{i}") for i in range(args.pairs)]
+    start = time.perf_counter()
+    if bulk:
+        result = PlaylistSync(sp, yt).sync_many(pairs, direction, max_sync=args.tracks)
+        synced = result['synced']
+    else:
+        synced = 0
+        for spotify_id, youtube_id in pairs:
+            # Como los endpoints: una instancia de PlaylistSync por llamada
+            sync = PlaylistSync(sp, yt)
+            if direction == SPOTIFY_TO_YOUTUBE:
+                synced += sync.sync_spotify_to_youtube(spotify_id, youtube_id, max_sync=args.tracks)['synced']
+            else:
+                synced += sync.sync_youtube_to_spotify(spotify_id, youtube_id, max_sync=args.tracks)['synced']
+    elapsed = time.perf_counter() - start
+    searches = yt.calls.get('search.list', 0) if direction == SPOTIFY_TO_YOUTUBE else sp.calls.get('search', 0)
+    units = sum(YOUTUBE_QUOTA_COSTS.get(method, 1) * calls for method, calls in yt.calls.items())
+    return elapsed, searches, units, synced
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pairs', type=int, default=20)
+    parser.add_argument('--tracks', type=int, default=200)
+    parser.add_argument('--catalog', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.01)
+    args = parser.parse_args()
+
+    print(f"{args.pairs} pares, {args.tracks} tracks por playlist de un catálogo de {args.catalog}, "
+          f"latencia {args.latency * 1000:.0f}ms")
+    for direction in (SPOTIFY_TO_YOUTUBE, YOUTUBE_TO_SPOTIFY):
+        for name, bulk in (('uno por uno', False), ('sync_many', True)):
+            elapsed, searches, units, synced = run(args, direction, bulk)
+            print(f"{direction:>20} {name:>12}: {elapsed:6.2f}s, {searches:5d} búsquedas, "
+                  f"{units:7d} unidades de cuota, {synced} sincronizados")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Compara la sincronización secuencial contra la búsqueda concurrente con latencia simulada.
+
+Uso: python benchmarks/bench_concurrent_search.py [--tracks 50] [--latency 0.05] [--workers 8]
+"""
+import argparse
+import time
+
+from fakes import FakeSpotify, FakeYouTube, make_catalog
+from playlist_sync import PlaylistSync
+
+
+def run(direction: str, tracks: int, latency: float, workers: int) -> float:
+    catalog = make_catalog(tracks)
+    if direction == 'spotify-to-youtube':
+        sp, yt = FakeSpotify(catalog, latency), FakeYouTube([], latency, catalog=catalog)
+    else:
+        sp, yt = FakeSpotify([], latency), FakeYouTube(catalog, latency)
+    sync = PlaylistSync(sp, yt, max_workers=workers)
+
+    start = time.perf_counter()
+    if direction == 'spotify-to-youtube':
+        result = sync.sync_spotify_to_youtube('sp', 'yt', max_sync=tracks)
+    else:
+        result = sync.sync_youtube_to_spotify('sp', 'yt', max_sync=tracks)
+    elapsed = time.perf_counter() - start
+
+    assert result['synced'] == tracks, result
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tracks', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    for direction in ('spotify-to-youtube', 'youtube-to-spotify'):
+        sequential = run(direction, args.tracks, args.latency, 1)
+        concurrent = run(direction, args.tracks, args.latency, args.workers)
+        print(
+            f"{direction}: {args.tracks} tracks, latencia {args.latency * 1000:.0f}ms -> "
+            f"secuencial {sequential:.2f}s, {args.workers} workers {concurrent:.2f}s "
+            f"(x{sequential / concurrent:.1f})"
+        )
+
+
+if __name__ == '__main__':
+    main()
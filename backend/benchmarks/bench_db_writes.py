@@ -0,0 +1,109 @@
+"""Escrituras concurrentes de progreso de jobs en SQLite: engine anterior contra create_db_engine.
+
+Cada hilo escritor hace lo que un worker de SyncJobQueue: crea un SyncHistory y actualiza
+su progreso, una sesión y un commit por escritura; mientras tanto, los lectores consultan
+jobs como /sync/jobs/{job_id}. Se compara:
+  - antes: create_engine con sólo check_same_thread (sin pool, journal de rollback,
+    synchronous=FULL);
+  - create_db_engine: WAL, synchronous=NORMAL, mmap, busy_timeout y pool de conexiones.
+
+Por cada cantidad de escritores se informan escrituras por segundo, p99 de cada escritura,
+lecturas por segundo y errores ("database is locked").
+
+Uso: python benchmarks/bench_db_writes.py [--writers 1 2 4 8 16] [--readers 4] [--duration 3]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import fakes  # noqa: F401  (agrega el backend al sys.path)
+from database import create_db_engine
+from models import Base, SyncHistory
+
+
+def legacy_engine(url: str):
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def writer(session_factory, deadline: float, stats) -> None:
+    db = session_factory()
+    try:
+        history = SyncHistory(sync_type='spotify_to_youtube', status='running', total_items=1000)
+        db.add(history)
+        db.commit()
+        job_id = history.id
+    finally:
+        db.close()
+
+    processed = 0
+    while time.time() < deadline:
+        processed += 1
+        start = time.perf_counter()
+        db = session_factory()
+        try:
+            db.query(SyncHistory).filter(SyncHistory.id == job_id).update({'processed_items': processed})
+            db.commit()
+            stats['latencies'].append(time.perf_counter() - start)
+        except OperationalError:
+            db.rollback()
+            stats['errors'] += 1
+        finally:
+            db.close()
+
+
+def reader(session_factory, deadline: float, stats) -> None:
+    while time.time() < deadline:
+        db = session_factory()
+        try:
+            db.query(SyncHistory).order_by(SyncHistory.id.desc()).first()
+            stats['reads'] += 1
+        except OperationalError:
+            stats['errors'] += 1
+        finally:
+            db.close()
+
+
+def run(make_engine, writers: int, readers: int, duration: float):
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = make_engine(url)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    stats = {'latencies': [], 'reads': 0, 'errors': 0}
+    deadline = time.time() + duration
+    threads = [threading.Thread(target=writer, args=(session_factory, deadline, stats)) for _ in range(writers)]
+    threads += [threading.Thread(target=reader, args=(session_factory, deadline, stats)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    latencies = sorted(stats['latencies'])
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+    return len(latencies) / duration, p99, stats['reads'] / duration, stats['errors']
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=3)
+    args = parser.parse_args()
+
+    print(f"{args.readers} lectores, {args.duration:.0f}s por corrida")
+    for writers in args.writers:
+        for name, make_engine in (('antes', legacy_engine), ('create_db_engine', create_db_engine)):
+            writes, p99, reads, errors = run(make_engine, writers, args.readers, args.duration)
+            print(f"{writers:3d} escritores {name:>16}: {writes:7.0f} escrituras/s, p99 {p99 * 1000:7.1f}ms, "
+                  f"{reads:7.0f} lecturas/s, {errors} errores")
+
+
+if __name__ == '__main__':
+    main()
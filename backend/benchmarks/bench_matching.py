@@ -0,0 +1,69 @@
+"""Mide el motor de matching de compare_playlists con playlists grandes y títulos "ruidosos".
+
+Uso: python benchmarks/bench_matching.py [--size 10000]
+"""
+import argparse
+import random
+import time
+
+import fakes  # noqa: F401  (agrega el backend al sys.path)
+from matching import TrackMatcher
+from playlist_sync import PlaylistSync
+
+WORDS = (
+    "love night heart fire dance dream rain summer light blue gold city road home time "
+    "baby girl boy wild young forever never again world star moon sun sky sea river "
+    "broken crazy little lonely sweet bad good last first run fall rise burn shine"
+).split()
+DECORATIONS = ["", " (Official Video)", " (Official Audio)", " [Lyric Video]", " (Visualizer)", " HD"]
+
+
+def make_playlists(size: int, overlap: float, seed: int = 7):
+    rng = random.Random(seed)
+    songs = []
+    for i in range(size):
+        title = " ".join(rng.sample(WORDS, rng.randint(1, 3))).title() + f" {i}"
+        artist = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {i % 1500}"
+        songs.append((title, artist))
+
+    spotify = [PlaylistSync.normalize_text(f"{title} {artist}") for title, artist in songs]
+    youtube = []
+    for i, (title, artist) in enumerate(songs):
+        if rng.random() > overlap:
+            title = f"Other Song {i + size}"
+        style = rng.randint(0, 2)
+        decoration = rng.choice(DECORATIONS)
+        if style == 0:
+            raw = f"{artist} - {title}{decoration}"
+        elif style == 1:
+            raw = f"{title} ft. {rng.choice(WORDS).title()} - {artist}{decoration}"
+        else:
+            raw = f"{title} by {artist}{decoration}"
+        metadata = PlaylistSync.extract_metadata(raw)
+        youtube.append(PlaylistSync.normalize_text(f"{metadata['title']} {metadata['artist']}"))
+    rng.shuffle(youtube)
+    return spotify, youtube
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=10000)
+    parser.add_argument('--overlap', type=float, default=0.9)
+    args = parser.parse_args()
+
+    spotify, youtube = make_playlists(args.size, args.overlap)
+
+    youtube_set = set(youtube)
+    exact = sum(1 for text in spotify if text in youtube_set)
+
+    start = time.perf_counter()
+    result = TrackMatcher().match(spotify, youtube)
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.size}x{args.size} tracks, {args.overlap:.0%} en común")
+    print(f"  match exacto (anterior): {exact} encontrados")
+    print(f"  TrackMatcher: {len(result.pairs)} pares en {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
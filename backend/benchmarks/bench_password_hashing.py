@@ -0,0 +1,131 @@
+"""Logins por segundo de bcrypt según la cantidad de hilos de PasswordHasher, y cuánto se
+frena el event loop mientras tanto.
+
+Cada corrida tiene `--clients` logins concurrentes verificando contraseñas durante
+`--duration` segundos, como /token:
+  - inline: pwd_context.verify dentro del event loop, como antes;
+  - N hilos: PasswordHasher con N hilos (por defecto 1, 2, 4... hasta los núcleos).
+En paralelo, una tarea que debería despertarse cada 10ms mide el retraso del event loop:
+con bcrypt inline cada login lo frena lo que dure un hash.
+
+Al final, una ráfaga de `--burst` logins contra un pool con `--max-pending` lugares
+muestra cuántos se rechazan (503 en /token) en lugar de esperar.
+
+Uso: python benchmarks/bench_password_hashing.py [--rounds 12] [--workers 1 2 4] [--clients 16] [--duration 5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import fakes  # noqa: F401  (agrega el backend al sys.path)
+from passwords import PasswordHasher, PasswordPoolFull, make_password_context
+
+PASSWORD = "bench-password"
+
+
+async def loop_lag(stop: asyncio.Event, lags) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def client(verify, hashed: str, stop: asyncio.Event, latencies) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        valid = await verify(PASSWORD, hashed)
+        assert valid
+        latencies.append(time.perf_counter() - start)
+        # Entre un request y el siguiente el event loop atiende a los demás
+        await asyncio.sleep(0)
+
+
+async def measure(verify, hashed: str, clients: int, duration: float):
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(client(verify, hashed, stop, latencies)) for _ in range(clients)]
+    tasks.append(asyncio.create_task(loop_lag(stop, lags)))
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, statistics.median(latencies), max(lags, default=0.0)
+
+
+async def burst(context, hashed: str, workers: int, max_pending: int, size: int):
+    hasher = PasswordHasher(context, workers, max_pending)
+
+    async def login():
+        try:
+            await hasher.verify_and_update(PASSWORD, hashed)
+            return True
+        except PasswordPoolFull:
+            return False
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login() for _ in range(size)))
+    hasher.executor.shutdown()
+    return sum(results), size - sum(results), time.perf_counter() - start
+
+
+async def run(args) -> None:
+    context = make_password_context(args.rounds)
+    hashed = context.hash(PASSWORD)
+
+    async def inline(password, hashed_password):
+        return context.verify(password, hashed_password)
+
+    runs = [('inline', inline, None)]
+    for workers in args.workers:
+        hasher = PasswordHasher(context, workers, max_pending=args.clients)
+
+        async def pooled(password, hashed_password, hasher=hasher):
+            valid, _ = await hasher.verify_and_update(password, hashed_password)
+            return valid
+
+        runs.append((f"{workers} hilos", pooled, hasher))
+
+    for name, verify, hasher in runs:
+        rate, p50, lag = await measure(verify, hashed, args.clients, args.duration)
+        print(f"{name:>9}: {rate:6.1f} logins/s, p50 {p50 * 1000:7.1f}ms, "
+              f"retraso máximo del event loop {lag * 1000:7.1f}ms")
+        if hasher is not None:
+            hasher.executor.shutdown()
+
+    workers = max(args.workers)
+    accepted, rejected, elapsed = await burst(context, hashed, workers, args.max_pending, args.burst)
+    print(f"ráfaga de {args.burst} logins, {workers} hilos, {args.max_pending} pendientes como máximo: "
+          f"{accepted} atendidos en {elapsed:.1f}s, {rejected} rechazados")
+
+
+def default_workers():
+    cores = os.cpu_count() or 1
+    workers, n = [], 1
+    while n < cores:
+        workers.append(n)
+        n *= 2
+    return workers + [cores]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers())
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--burst', type=int, default=100)
+    parser.add_argument('--max-pending', type=int, default=None)
+    args = parser.parse_args()
+    if args.max_pending is None:
+        args.max_pending = 4 * max(args.workers)
+
+    print(f"bcrypt costo {args.rounds}, {os.cpu_count()} núcleos, {args.clients} logins concurrentes, "
+          f"{args.duration:.0f}s por corrida")
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Simula un proveedor con un límite real desconocido y mide cómo se adapta el RateLimiter.
+
+El proveedor acepta `--limit` llamadas por segundo (ventana deslizante) y responde 429 con
+Retry-After al pasarse. El limitador se configura con un ritmo mayor al real (`--rate`),
+como pasa cuando el límite del proveedor baja. Se comparan:
+  - sin adaptación: el 429 termina en error, como antes;
+  - adaptativo: el bucket compartido baja el ritmo, respeta Retry-After y reintenta.
+
+Con --processes N se reparte la carga entre N procesos que comparten el estado en SQLite.
+
+Uso: python benchmarks/bench_rate_limiter.py [--limit 20] [--rate 50] [--threads 8] [--duration 10]
+"""
+import argparse
+import collections
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+
+import fakes  # noqa: F401  (agrega el backend al sys.path)
+from rate_limit import RateLimiter, SQLiteBucketStore
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("429 Too Many Requests")
+        self.retry_after = retry_after
+
+
+class FakeProvider:
+    """Acepta `limit` llamadas en cualquier ventana de un segundo (compartida entre procesos)."""
+
+    def __init__(self, limit: int, calls, lock, rejected):
+        self.limit = limit
+        self.calls = calls
+        self.lock = lock
+        self.rejected = rejected
+
+    def request(self) -> None:
+        now = time.time()
+        with self.lock:
+            while self.calls and self.calls[0] < now - 1:
+                self.calls.pop(0)
+            if len(self.calls) >= self.limit:
+                self.rejected.append(now)
+                raise RateLimited(retry_after=1 - (now - self.calls[0]))
+            self.calls.append(now)
+        time.sleep(0.005)
+
+
+def retry_after(error: Exception):
+    return error.retry_after if isinstance(error, RateLimited) else None
+
+
+def worker(provider, limiter, adaptive: bool, deadline: float, log) -> None:
+    while time.time() < deadline:
+        try:
+            if adaptive:
+                limiter.call(provider.request)
+            else:
+                limiter.acquire()
+                provider.request()
+            log.append((time.time(), 'ok'))
+        except RateLimited:
+            log.append((time.time(), 'error'))
+
+
+def run_process(args, store_path, adaptive, calls, lock, rejected, log, deadline) -> None:
+    store = SQLiteBucketStore(store_path)
+    limiter = RateLimiter(
+        args.rate,
+        name='bench',
+        retry_after=retry_after if adaptive else None,
+        max_retries=8,
+        store=store
+    )
+    provider = FakeProvider(args.limit, calls, lock, rejected)
+    local_log = []
+    threads = [threading.Thread(target=worker, args=(provider, limiter, adaptive, deadline, local_log))
+               for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    log.extend(local_log)
+
+
+def report(name: str, log, rejected, start: float, duration: float) -> None:
+    per_second = collections.defaultdict(lambda: [0, 0])
+    for at, outcome in log:
+        second = int(at - start)
+        if second < duration:
+            per_second[second][0 if outcome == 'ok' else 1] += 1
+    ok = sum(value[0] for value in per_second.values())
+    errors = sum(value[1] for value in per_second.values())
+    timeline = " ".join(f"{per_second[s][0]}/{per_second[s][1]}" for s in range(int(duration)))
+    print(f"{name:>15}: {ok / duration:5.1f} llamadas ok/s, {len(rejected)} respuestas 429, "
+          f"{errors} tracks perdidos")
+    print(f"{'':>15}  por segundo (ok/error): {timeline}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--rate', type=float, default=50)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--processes', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"límite real {args.limit}/s, limitador configurado en {args.rate}/s, "
+          f"{args.processes} procesos x {args.threads} hilos")
+    with multiprocessing.Manager() as manager:
+        for name, adaptive in (('sin adaptación', False), ('adaptativo', True)):
+            store_path = os.path.join(tempfile.mkdtemp(), 'rate_limits.db')
+            calls, lock, rejected, log = manager.list(), manager.Lock(), manager.list(), manager.list()
+            start = time.time()
+            deadline = start + args.duration
+            processes = [multiprocessing.Process(
+                target=run_process, args=(args, store_path, adaptive, calls, lock, rejected, log, deadline)
+            ) for _ in range(args.processes)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            report(name, list(log), list(rejected), start, args.duration)
+
+
+if __name__ == '__main__':
+    main()
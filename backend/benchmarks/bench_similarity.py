@@ -0,0 +1,49 @@
+"""Microbenchmark: SequenceMatcher por par (camino anterior) contra batch_similarity.
+
+Uso: python benchmarks/bench_similarity.py [--pairs 20000]
+"""
+import argparse
+import time
+from difflib import SequenceMatcher
+
+from fakes import make_catalog
+from playlist_sync import PlaylistSync
+from similarity import batch_similarity
+
+
+def old_similarity_score(a: str, b: str) -> float:
+    a = PlaylistSync.normalize_text(a)
+    b = PlaylistSync.normalize_text(b)
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def timed(label: str, work, operations: int) -> None:
+    start = time.perf_counter()
+    work()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<42} {elapsed:7.3f}s  ({operations / elapsed:,.0f} pares/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pairs', type=int, default=20000)
+    args = parser.parse_args()
+
+    titles = [f"{title} {artist}" for title, artist in make_catalog(args.pairs + 5)]
+    normalized = [PlaylistSync.normalize_text(title) for title in titles]
+
+    print(f"1 query x 5 candidatos ({args.pairs} búsquedas)")
+    timed("SequenceMatcher por par", lambda: [
+        old_similarity_score(titles[i], candidate)
+        for i in range(args.pairs) for candidate in titles[i:i + 5]
+    ], args.pairs * 5)
+    timed("batch_similarity", lambda: [
+        batch_similarity(titles[i], titles[i:i + 5]) for i in range(args.pairs)
+    ], args.pairs * 5)
+    timed("batch_similarity (pre-normalizado)", lambda: [
+        batch_similarity(normalized[i], normalized[i:i + 5], normalized=True) for i in range(args.pairs)
+    ], args.pairs * 5)
+
+
+if __name__ == '__main__':
+    main()
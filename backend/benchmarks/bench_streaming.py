@@ -0,0 +1,60 @@
+"""Compara la descarga secuencial de playlists contra match_playlists, que descarga las
+dos en paralelo y compara las páginas a medida que llegan.
+
+Mide el tiempo total y el pico de memoria (tracemalloc) de comparar dos playlists grandes
+con clientes falsos con latencia. El pico es parecido en los dos casos: el diff guarda
+todos los registros hasta el final, porque los faltantes recién se conocen entonces.
+
+Uso: python benchmarks/bench_streaming.py [--size 10000] [--latency 0.02]
+"""
+import argparse
+import time
+import tracemalloc
+
+from fakes import FakeSpotify, FakeYouTube, make_catalog
+from playlist_sync import PlaylistSync
+
+
+def sequential(sync: PlaylistSync, size: int):
+    """Como antes: se descarga todo Spotify, después todo YouTube, y recién ahí se compara."""
+    spotify_tracks = [track for page in sync.iter_spotify_pages('sp') for track in page]
+    youtube_videos = [video for page in sync.iter_youtube_pages('yt') for video in page]
+    return sync.matcher.match(
+        [track.normalized for track in spotify_tracks],
+        [video.normalized for video in youtube_videos]
+    ).pairs
+
+
+def streaming(sync: PlaylistSync, size: int):
+    return sync.match_playlists('sp', 'yt')[2]
+
+
+def measure(name: str, run, catalog, args) -> None:
+    # La mitad de la playlist de YouTube coincide con Spotify
+    youtube = catalog[::2] + [(f"Other {title}", artist) for title, artist in catalog[1::2]]
+    sync = PlaylistSync(FakeSpotify(catalog, args.latency), FakeYouTube(youtube, args.latency))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    matched = len(run(sync, args.size))
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:>10}: total {total:6.2f}s, pico de memoria {peak / 2 ** 20:6.1f} MiB, {matched} pares")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=10000)
+    parser.add_argument('--latency', type=float, default=0.02)
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.size)
+    print(f"{args.size} tracks por lado, {args.latency * 1000:.0f}ms por página")
+    measure('secuencial', sequential, catalog, args)
+    measure('streaming', streaming, catalog, args)
+
+
+if __name__ == '__main__':
+    main()
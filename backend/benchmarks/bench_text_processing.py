@@ -0,0 +1,98 @@
+"""Perfila normalize_text / extract_metadata sobre un corpus de títulos realistas.
+
+Compara la implementación anterior (regex sin compilar, unidecode siempre, sin memo)
+con text_processing. Con --profile imprime el perfil de cProfile del camino nuevo.
+
+Uso: python benchmarks/bench_text_processing.py [--titles 100000] [--profile]
+"""
+import argparse
+import cProfile
+import pstats
+import random
+import re
+import time
+
+from unidecode import unidecode
+
+import fakes  # noqa: F401  (agrega el backend al sys.path)
+import text_processing
+
+WORDS = (
+    "amor corazón noche fuego baile sueño lluvia verano luz azul ciudad camino love night "
+    "heart fire dance dream rain summer light blue city road home time baby forever café "
+    "canción niña mañana señor días última björk beyoncé"
+).split()
+DECORATIONS = ["", " (Official Video)", " (Official Audio)", " [Lyric Video]", " (Remastered 2011)", " (En Vivo)"]
+
+
+def make_corpus(size: int, seed: int = 11):
+    """Títulos con repetición tipo Zipf: las canciones populares aparecen en muchas playlists."""
+    rng = random.Random(seed)
+    unique = max(1, size // 5)
+    songs = []
+    for i in range(unique):
+        title = " ".join(rng.sample(WORDS, rng.randint(1, 4))).title()
+        artist = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}"
+        songs.append(f"{artist} - {title}{rng.choice(DECORATIONS)}")
+    weights = [1 / (rank + 1) for rank in range(unique)]
+    return rng.choices(songs, weights=weights, k=size)
+
+
+def old_normalize_text(text: str) -> str:
+    text = text.lower()
+    text = unidecode(text)
+    text = re.sub(r'[^\w\s]', '', text)
+    return ' '.join(text.split())
+
+
+def old_extract_metadata(title: str):
+    patterns = [
+        r'(?P<title>.*?)\s*-\s*(?P<artist>.*?)(?:\s*\(.*\))?$',
+        r'(?P<artist>.*?)\s*-\s*(?P<title>.*?)(?:\s*\(.*\))?$',
+        r'(?P<title>.*?)\s*by\s*(?P<artist>.*?)(?:\s*\(.*\))?$',
+    ]
+    for pattern in patterns:
+        match = re.match(pattern, title, re.IGNORECASE)
+        if match:
+            return {'title': match.group('title').strip(), 'artist': match.group('artist').strip()}
+    return {'title': title.strip(), 'artist': ''}
+
+
+def pipeline(corpus, normalize, extract):
+    # Lo mismo que hace compare_playlists con cada video de YouTube
+    for raw in corpus:
+        metadata = extract(raw)
+        normalize(f"{metadata['title']} {metadata['artist']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=100000)
+    parser.add_argument('--profile', action='store_true')
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.titles)
+
+    start = time.perf_counter()
+    pipeline(corpus, old_normalize_text, old_extract_metadata)
+    old = time.perf_counter() - start
+
+    text_processing.normalize_text.cache_clear()
+    start = time.perf_counter()
+    pipeline(corpus, text_processing.normalize_text, text_processing.extract_metadata)
+    new = time.perf_counter() - start
+
+    info = text_processing.normalize_text.cache_info()
+    print(f"{args.titles} títulos")
+    print(f"  anterior:        {old:.3f}s")
+    print(f"  text_processing: {new:.3f}s (x{old / new:.1f}, memo {info.hits} hits / {info.misses} misses)")
+
+    if args.profile:
+        text_processing.normalize_text.cache_clear()
+        profiler = cProfile.Profile()
+        profiler.runcall(pipeline, corpus, text_processing.normalize_text, text_processing.extract_metadata)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(8)
+
+
+if __name__ == '__main__':
+    main()
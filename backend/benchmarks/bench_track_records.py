@@ -0,0 +1,72 @@
+"""Memoria de 100k tracks como dicts (formato anterior) y como TrackRecord.
+
+Los textos salen de json.loads, como las respuestas de la API: cada artista es un
+string distinto aunque se repita, igual que en producción.
+
+Uso: python benchmarks/bench_track_records.py [--size 100000]
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+import fakes  # noqa: F401  (agrega el backend al sys.path)
+from text_processing import normalize_text
+from tracks import TrackRecord
+
+
+def api_items(size: int):
+    items = [{'id': f"sp{i:06d}", 'name': f"Song {i:06d}", 'artist': f"Artist {i % 2000:04d}"} for i in range(size)]
+    return json.loads(json.dumps(items))
+
+
+def as_dicts(items):
+    return [{
+        'id': item['id'],
+        'title': item['name'],
+        'artist': item['artist'],
+        'normalized': normalize_text(f"{item['name']} {item['artist']}")
+    } for item in items]
+
+
+def as_records(items):
+    return [TrackRecord(item['id'], item['name'], item['artist']) for item in items]
+
+
+def measure(name: str, build, size: int) -> None:
+    items = api_items(size)
+    normalize_text.cache_clear()
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = build(items)
+    elapsed = time.perf_counter() - start
+    # Sólo queda lo que retienen los registros (sin la respuesta ni el cache de normalize_text)
+    del items
+    normalize_text.cache_clear()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    if isinstance(records[0], dict):
+        unique = len({(record['id'], record['normalized']) for record in records})
+    else:
+        unique = len(set(records))
+    hashing = time.perf_counter() - start
+    print(f"{name:>12}: {current / 2 ** 20:6.1f} MiB retenidos ({current / size:5.0f} B/track), "
+          f"construcción {elapsed:5.2f}s, set() {hashing * 1000:5.1f}ms, {unique} únicos")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=100000)
+    args = parser.parse_args()
+
+    measure('dict', as_dicts, args.size)
+    measure('TrackRecord', as_records, args.size)
+
+
+if __name__ == '__main__':
+    main()
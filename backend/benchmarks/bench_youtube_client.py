@@ -0,0 +1,62 @@
+"""Costo de crear el cliente de YouTube: build() por request contra clients.get_youtube_client.
+
+Cada variante corre en un proceso nuevo para medir también el arranque en frío.
+Uso: python benchmarks/bench_youtube_client.py [--requests 200]
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+SNIPPET = """
+import time
+start = time.perf_counter()
+from google.oauth2.credentials import Credentials
+{imports}
+credentials = Credentials(token='token', refresh_token='refresh')
+{create}
+cold = time.perf_counter() - start
+
+start = time.perf_counter()
+for _ in range({requests}):
+    youtube = {create_expr}
+    youtube.playlistItems().list(part='snippet', playlistId='PL123', maxResults=50)
+per_request = (time.perf_counter() - start) / {requests}
+print(f"{{cold * 1000:.1f}} {{per_request * 1000:.3f}}")
+"""
+
+VARIANTS = {
+    "build() por request (antes)": (
+        "from googleapiclient.discovery import build",
+        "build('youtube', 'v3', credentials=credentials)",
+    ),
+    "clients.get_youtube_client": (
+        "from clients import get_youtube_client",
+        "get_youtube_client(credentials)",
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    for label, (imports, create_expr) in VARIANTS.items():
+        code = SNIPPET.format(
+            imports=imports,
+            create=f"youtube = {create_expr}",
+            create_expr=create_expr,
+            requests=args.requests
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True
+        ).stdout.split()
+        cold, per_request = float(output[0]), float(output[1])
+        print(f"{label:<30} arranque + primer cliente {cold:7.1f}ms   por request {per_request:6.3f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""Clientes falsos de Spotify y YouTube con latencia inyectada para los benchmarks.
+
+Las respuestas se arman a partir de las respuestas grabadas en fixtures/ (mismas claves y
+tamaño que las reales); sólo cambian los ids, títulos y artistas de cada track. Además de
+la latencia se puede agregar jitter y una proporción de errores de rate limit.
+"""
+import abc
+import functools
+import json
+import random
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import httplib2
+import spotipy
+from googleapiclient.errors import HttpError
+
+# Los módulos del backend se importan sin paquete (igual que en main.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+
+def make_catalog(size: int) -> List[Tuple[str, str]]:
+    """Genera un catálogo de canciones (título, artista) determinístico."""
+    return [(f"Song {i:05d}", f"Artist {i % 500:03d}") for i in range(size)]
+
+
+@functools.lru_cache(maxsize=None)
+def fixture(name: str) -> str:
+    """Texto de una respuesta grabada; cada uso hace json.loads, como el cliente real."""
+    return (FIXTURES_DIR / f"{name}.json").read_text()
+
+
+def _template(name: str, *path) -> str:
+    """Serializa una parte de una respuesta grabada (por ejemplo, el primer item)."""
+    data = json.loads(fixture(name))
+    for key in path:
+        data = data[key]
+    return json.dumps(data)
+
+
+class _CallCounter(abc.ABC):
+    """Cuenta llamadas por método y simula latencia, jitter y errores de rate limit.
+
+    Cada llamada tarda `latency` ± `jitter` segundos y falla con probabilidad `error_rate`
+    con el error de rate limit grabado del proveedor.
+    """
+
+    def __init__(self, latency: float, jitter: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            delay = self.latency + (self._random.uniform(-self.jitter, self.jitter) if self.jitter else 0.0)
+            failed = self.error_rate and self._random.random() < self.error_rate
+            if failed:
+                self.errors[name] = self.errors.get(name, 0) + 1
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            raise self._error()
+
+    @abc.abstractmethod
+    def _error(self) -> Exception:
+        """Error de rate limit del proveedor, que `_call` lanza."""
+
+
+class FakeSpotify(_CallCounter):
+    """Imita la parte de spotipy.Spotify que usa PlaylistSync."""
+
+    def __init__(
+        self,
+        playlist: List[Tuple[str, str]],
+        latency: float = 0.0,
+        page_size: int = 100,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        playlists: Optional[Dict[str, List[Tuple[str, str]]]] = None
+    ):
+        super().__init__(latency, jitter, error_rate, seed)
+        self.tracks = list(playlist)
+        # Playlists con id propio; cualquier otro id devuelve `playlist`
+        self.playlists = playlists or {}
+        self.page_size = page_size
+        self.added: List[str] = []
+        self._page_template = _template('spotify_playlist_tracks')
+        self._item_template = _template('spotify_playlist_tracks', 'items', 0)
+        self._search_template = _template('spotify_search')
+
+    def _error(self) -> Exception:
+        error = json.loads(fixture('spotify_rate_limited'))
+        return spotipy.SpotifyException(
+            error['status'], -1, error['body']['error']['message'], headers=error['headers']
+        )
+
+    @staticmethod
+    def _set_track(track: Dict, track_id: str, title: str, artist: str) -> None:
+        track['id'] = track_id
+        track['uri'] = f"spotify:track:{track_id}"
+        track['href'] = f"https://api.spotify.com/v1/tracks/{track_id}"
+        track['external_urls']['spotify'] = f"https://open.spotify.com/track/{track_id}"
+        track['name'] = title
+        track['artists'][0]['name'] = artist
+        track['album']['artists'][0]['name'] = artist
+
+    def _page(self, playlist_id: str, offset: int) -> Dict:
+        tracks = self.playlists.get(playlist_id, self.tracks)
+        prefix = f"{playlist_id}-" if playlist_id in self.playlists else 'sp'
+        page = json.loads(self._page_template)
+        items = []
+        for i, (title, artist) in enumerate(tracks[offset:offset + self.page_size]):
+            item = json.loads(self._item_template)
+            self._set_track(item['track'], f"{prefix}{offset + i:06d}", title, artist)
+            items.append(item)
+        base = f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks"
+        next_offset = offset + self.page_size
+        page.update(
+            items=items,
+            offset=offset,
+            limit=self.page_size,
+            total=len(tracks),
+            href=f"{base}?offset={offset}&limit={self.page_size}",
+            next=f"{base}?offset={next_offset}&limit={self.page_size}" if next_offset < len(tracks) else None
+        )
+        return page
+
+    def playlist(self, playlist_id: str, fields: Optional[str] = None, **kwargs) -> Dict:
+        self._call('playlist')
+        return {'snapshot_id': f"snap-{len(self.playlists.get(playlist_id, self.tracks))}-{len(self.added)}"}
+
+    def playlist_tracks(self, playlist_id: str, **kwargs) -> Dict:
+        self._call('playlist_tracks')
+        return self._page(playlist_id, 0)
+
+    def next(self, results: Dict) -> Optional[Dict]:
+        self._call('next')
+        if not results['next']:
+            return None
+        url = urlparse(results['next'])
+        return self._page(url.path.split('/')[-2], int(parse_qs(url.query)['offset'][0]))
+
+    def search(self, q: str, type: str = 'track', limit: int = 10) -> Dict:
+        self._call('search')
+        title = q.split('track:', 1)[1].split(' artist:', 1)[0]
+        artist = q.split(' artist:', 1)[1] if ' artist:' in q else 'Unknown'
+        results = json.loads(self._search_template)
+        self._set_track(results['tracks']['items'][0], f"{abs(hash((title, artist))) % 10 ** 8:08d}", title, artist)
+        return results
+
+    def playlist_add_items(self, playlist_id: str, items: List[str], position=None) -> Dict:
+        self._call('playlist_add_items')
+        self.added.extend(items)
+        return {'snapshot_id': str(len(self.added))}
+
+
+class _Request:
+    def __init__(self, owner: _CallCounter, name: str, handler, kwargs: Dict):
+        self.owner = owner
+        self.name = name
+        self.handler = handler
+        self.kwargs = kwargs
+        self.headers: Dict[str, str] = {}
+
+    def execute(self, http=None, num_retries: int = 0) -> Dict:
+        self.owner._call(self.name)
+        result = self.handler(**self.kwargs)
+        if 'etag' in result and self.headers.get('If-None-Match') == result['etag']:
+            raise HttpError(httplib2.Response({'status': '304'}), b'')
+        return result
+
+
+class _Collection:
+    def __init__(self, owner: _CallCounter, prefix: str, **handlers):
+        self.owner = owner
+        self.prefix = prefix
+        self.handlers = handlers
+
+    def __getattr__(self, method: str):
+        handler = self.handlers[method]
+        return lambda **kwargs: _Request(self.owner, f"{self.prefix}.{method}", handler, kwargs)
+
+
+class FakeYouTube(_CallCounter):
+    """Imita la parte del Resource de googleapiclient que usa PlaylistSync."""
+
+    def __init__(
+        self,
+        playlist: List[Tuple[str, str]],
+        latency: float = 0.0,
+        page_size: int = 50,
+        catalog: Optional[List[Tuple[str, str]]] = None,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        playlists: Optional[Dict[str, List[Tuple[str, str]]]] = None
+    ):
+        super().__init__(latency, jitter, error_rate, seed)
+        self.tracks = list(playlist)
+        # Playlists con id propio; cualquier otro id devuelve `playlist`
+        self.playlists = playlists or {}
+        self.page_size = page_size
+        self.inserted: List[str] = []
+        # La búsqueda devuelve el título "oficial" de la canción buscada
+        self.titles = {f"{title} {artist}": title for title, artist in (catalog or playlist)}
+        self._page_template = _template('youtube_playlist_items')
+        self._item_template = _template('youtube_playlist_items', 'items', 0)
+        self._insert_template = _template('youtube_playlist_item_insert')
+        self._search_template = _template('youtube_search')
+
+    def _error(self) -> Exception:
+        error = json.loads(fixture('youtube_rate_limited'))
+        response = httplib2.Response(dict(error['headers'], status=str(error['status'])))
+        return HttpError(response, json.dumps(error['body']).encode('utf-8'))
+
+    def _list_items(self, playlistId: str, part: str, maxResults: int = 5, pageToken: Optional[str] = None, **kwargs) -> Dict:
+        offset = int(pageToken or 0)
+        tracks = self.playlists.get(playlistId, self.tracks)
+        prefix = f"{playlistId}-" if playlistId in self.playlists else ''
+        results = json.loads(self._page_template)
+        items = []
+        for i, (title, artist) in enumerate(tracks[offset:offset + self.page_size]):
+            item = json.loads(self._item_template)
+            item['id'] = f"{prefix}pli{offset + i:06d}"
+            snippet = item['snippet']
+            snippet.update(title=f"{title} - {artist}", playlistId=playlistId, position=offset + i)
+            snippet['resourceId']['videoId'] = f"{prefix}yt{offset + i:06d}"
+            items.append(item)
+        results['items'] = items
+        results['pageInfo'] = {'totalResults': len(tracks), 'resultsPerPage': self.page_size}
+        results.pop('nextPageToken', None)
+        if offset + self.page_size < len(tracks):
+            results['nextPageToken'] = str(offset + self.page_size)
+        # Como el de YouTube, el ETag cambia con el contenido de la página o con el total
+        page = json.dumps([tracks[offset:offset + self.page_size], len(tracks), len(self.inserted)])
+        results['etag'] = f"etag-{playlistId}-{offset}-{zlib.crc32(page.encode('utf-8')):08x}"
+        return results
+
+    def _insert_item(self, part: str, body: Dict) -> Dict:
+        video_id = body['snippet']['resourceId']['videoId']
+        self.inserted.append(video_id)
+        result = json.loads(self._insert_template)
+        result['id'] = f"pli-new-{len(self.inserted)}"
+        result['snippet'].update(body['snippet'], position=len(self.tracks) + len(self.inserted) - 1)
+        return result
+
+    def _search(self, q: str, **kwargs) -> Dict:
+        key = q.replace(' official audio', '')
+        title = self.titles.get(key, key)
+        results = json.loads(self._search_template)
+        video = results['items'][0]
+        video['id']['videoId'] = f"v{abs(hash(title)) % 10 ** 8:08d}"
+        video['snippet']['title'] = title
+        return results
+
+    def playlistItems(self) -> _Collection:
+        return _Collection(self, 'playlistItems', list=self._list_items, insert=self._insert_item)
+
+    def search(self) -> _Collection:
+        return _Collection(self, 'search', list=self._search)
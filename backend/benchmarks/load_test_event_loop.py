@@ -0,0 +1,106 @@
+"""Load test: latencia de /me mientras corren comparaciones de playlists en paralelo.
+
+Levanta la app en proceso (httpx + ASGITransport) con una base SQLite temporal y clientes
+falsos con latencia. Con --inline las llamadas a proveedores y a la base se ejecutan
+directamente en el event loop, como antes de providers.py, para comparar.
+
+Requiere httpx. Uso: python benchmarks/load_test_event_loop.py [--inline] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from fakes import FakeSpotify, FakeYouTube, make_catalog
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/load_test.db"
+
+import httpx  # noqa: E402
+
+import auth  # noqa: E402
+import main  # noqa: E402
+from database import SessionLocal  # noqa: E402
+from models import User, SpotifyConnection, YouTubeConnection  # noqa: E402
+
+
+async def _inline(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def setup_user() -> None:
+    db = SessionLocal()
+    user = User(email="load@test.dev", username="load", hashed_password=auth.pwd_context.hash("load"))
+    db.add(user)
+    db.commit()
+    # Con vencimiento lejano: CredentialManager no intenta renovar los tokens falsos
+    expires_at = datetime.utcnow() + timedelta(days=1)
+    db.add(SpotifyConnection(user_id=user.id, access_token="x", refresh_token="y", token_expires_at=expires_at))
+    db.add(YouTubeConnection(user_id=user.id, access_token="x", refresh_token="y", token_expires_at=expires_at))
+    db.commit()
+    db.close()
+
+
+async def compare_loop(client, headers, stop: asyncio.Event) -> int:
+    done = 0
+    while not stop.is_set():
+        await client.post(
+            "/sync/compare",
+            params={"spotify_playlist_id": "sp", "youtube_playlist_id": "yt"},
+            headers=headers
+        )
+        done += 1
+        # Con --inline la comparación no espera ningún I/O real: ceder el event loop para
+        # que el cliente de /me (y el stop) puedan correr
+        await asyncio.sleep(0)
+    return done
+
+
+async def run(args) -> None:
+    setup_user()
+    catalog = make_catalog(args.tracks)
+    main.get_spotify_client = lambda access_token: FakeSpotify(catalog, args.latency)
+    main.get_youtube_client = lambda credentials: FakeYouTube(catalog[::2], args.latency)
+    if args.inline:
+        main.run_provider = main.run_db = _inline
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        token = (await client.post("/token", json={"username": "load", "password": "load"})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        stop = asyncio.Event()
+        workers = [asyncio.create_task(compare_loop(client, headers, stop)) for _ in range(args.concurrency)]
+
+        latencies = []
+        deadline = time.perf_counter() + args.duration
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await client.get("/me", headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.01)
+
+        stop.set()
+        compares = sum(await asyncio.gather(*workers))
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    mode = "inline (antes)" if args.inline else "pools de providers.py"
+    print(f"{mode}: {args.concurrency} comparaciones concurrentes, {compares} completadas")
+    print(f"  /me: {len(latencies)} requests, p50 {statistics.median(latencies):.1f}ms, p99 {p99:.1f}ms")
+
+
+def main_cli():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--inline", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tracks", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--duration", type=float, default=5.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main_cli()
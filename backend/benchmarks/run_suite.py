@@ -0,0 +1,188 @@
+"""Suite de benchmarks de sincronización sin red, con salida en JSON para seguir regresiones.
+
+Reproduce las respuestas grabadas de Spotify y YouTube (fixtures/) con los clientes falsos,
+con latencia, jitter y errores de rate limit configurables, y ejecuta compare_playlists,
+sync_spotify_to_youtube y sync_youtube_to_spotify para cada tamaño de playlist. Cada
+escenario corre en un proceso nuevo, así el pico de RSS es sólo suyo.
+
+Por escenario se reporta: tiempo total, llamadas a cada API (y errores inyectados),
+unidades de cuota de YouTube que habrían consumido esas llamadas y pico de RSS.
+
+Las dos playlists comparten la mitad de los tracks: a cada lado le falta la otra mitad,
+y las sincronizaciones agregan todos los faltantes (max_sync = tamaño).
+
+Con --baseline se compara contra un resultado anterior y se sale con código 1 si algún
+escenario tardó más de --threshold veces lo que tardaba.
+
+Uso: python benchmarks/run_suite.py [--sizes 100 1000 10000] [--latency 0.002] [--jitter 0.001]
+     [--error-rate 0] [--output resultados.json] [--baseline anterior.json]
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from fakes import FakeSpotify, FakeYouTube, make_catalog
+from playlist_sync import PlaylistSync
+from quota import YOUTUBE_QUOTA_COSTS
+
+SCENARIOS = ('compare', 'spotify_to_youtube', 'youtube_to_spotify')
+DEFAULT_SIZES = (100, 1000, 10000)
+
+
+def playlists(size: int):
+    """Dos playlists de `size` tracks que comparten la mitad."""
+    catalog = make_catalog(size + size // 2)
+    return catalog, catalog[:size], catalog[size // 2:size + size // 2]
+
+
+def peak_rss_bytes() -> int:
+    """Pico de memoria residente del proceso; 0 donde no hay `resource` (Windows)."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KiB; macOS, bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_scenario(scenario: str, size: int, params: Dict) -> Dict:
+    """Ejecuta un escenario (en un proceso propio) y devuelve sus mediciones."""
+    catalog, spotify_tracks, youtube_tracks = playlists(size)
+    faults = {'jitter': params['jitter'], 'error_rate': params['error_rate'], 'seed': params['seed']}
+    sp = FakeSpotify(spotify_tracks, params['latency'], **faults)
+    yt = FakeYouTube(youtube_tracks, params['latency'], catalog=catalog, **faults)
+    sync = PlaylistSync(sp, yt, max_workers=params['workers'])
+
+    result: Dict = {}
+    error = None
+    start = time.perf_counter()
+    try:
+        if scenario == 'compare':
+            missing_in_spotify, missing_in_youtube = sync.compare_playlists('sp', 'yt')
+            result = {'missing_in_spotify': len(missing_in_spotify), 'missing_in_youtube': len(missing_in_youtube)}
+        elif scenario == 'spotify_to_youtube':
+            outcome = sync.sync_spotify_to_youtube('sp', 'yt', max_sync=size)
+            result = {'synced': outcome['synced'], 'skipped': outcome['skipped'],
+                      'failed': len(outcome['failed']), 'total_missing': outcome['total_missing']}
+        else:
+            outcome = sync.sync_youtube_to_spotify('sp', 'yt', max_sync=size)
+            result = {'synced': outcome['synced'], 'skipped': outcome['skipped'],
+                      'failed': len(outcome['failed']), 'total_missing': outcome['total_missing']}
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall_time = time.perf_counter() - start
+
+    youtube_calls = dict(yt.calls)
+    return {
+        'scenario': scenario,
+        'size': size,
+        'wall_time_s': round(wall_time, 4),
+        'api_calls': {
+            'spotify': dict(sp.calls),
+            'youtube': youtube_calls,
+            'total': sum(sp.calls.values()) + sum(youtube_calls.values()),
+        },
+        'injected_errors': {'spotify': dict(sp.errors), 'youtube': dict(yt.errors)},
+        'youtube_quota_units': sum(YOUTUBE_QUOTA_COSTS.get(method, 1) * calls for method, calls in youtube_calls.items()),
+        'peak_rss_bytes': peak_rss_bytes(),
+        'result': result,
+        'error': error,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def compare_with_baseline(results: List[Dict], baseline: Dict, threshold: float) -> List[str]:
+    """Escenarios que tardaron más de `threshold` veces lo que tardaban en el baseline."""
+    previous = {(item['scenario'], item['size']): item for item in baseline['results']}
+    regressions = []
+    for item in results:
+        before = previous.get((item['scenario'], item['size']))
+        if not before or not before['wall_time_s']:
+            continue
+        ratio = item['wall_time_s'] / before['wall_time_s']
+        print(f"{item['scenario']:>20} {item['size']:>6}: {before['wall_time_s']:8.3f}s -> "
+              f"{item['wall_time_s']:8.3f}s ({ratio:4.2f}x), llamadas {before['api_calls']['total']} -> "
+              f"{item['api_calls']['total']}, RSS {before['peak_rss_bytes'] / 2 ** 20:.0f} -> "
+              f"{item['peak_rss_bytes'] / 2 ** 20:.0f} MiB", file=sys.stderr)
+        if ratio > threshold:
+            regressions.append(f"{item['scenario']}/{item['size']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--latency', type=float, default=0.002, help='segundos por llamada')
+    parser.add_argument('--jitter', type=float, default=0.001, help='variación máxima de la latencia (±)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='proporción de llamadas que dan rate limit')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='archivo JSON de salida (por defecto, stdout)')
+    parser.add_argument('--baseline', help='resultado anterior contra el que comparar')
+    parser.add_argument('--threshold', type=float, default=1.2)
+    args = parser.parse_args()
+
+    params = {
+        'latency': args.latency,
+        'jitter': args.jitter,
+        'error_rate': args.error_rate,
+        'workers': args.workers,
+        'seed': args.seed,
+    }
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for size in args.sizes:
+        for scenario in args.scenarios:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                item = executor.submit(run_scenario, scenario, size, params).result()
+            results.append(item)
+            status = item['error'] or item['result']
+            print(f"{scenario:>20} {size:>6}: {item['wall_time_s']:8.3f}s, {item['api_calls']['total']:6d} llamadas, "
+                  f"{item['youtube_quota_units']:8d} unidades, RSS {item['peak_rss_bytes'] / 2 ** 20:6.1f} MiB  {status}",
+                  file=sys.stderr)
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': params,
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, json.loads(Path(args.baseline).read_text()), args.threshold)
+        if regressions:
+            print(f"regresiones (> {args.threshold}x): {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Simula el scheduler de sincronización automática con un reloj falso.
+
+Miles de playlists con el mismo intervalo y la misma última sincronización (como después
+de un reinicio, o si todas se crearon en la misma hora) se simulan durante unas horas, sin
+esperar: el reloj avanza de a `--step` segundos y cada job tarda `--job-seconds`.
+Se compara:
+  - sin escalonar: sin jitter ni ventana de recuperación, todas vencen al mismo tiempo;
+  - escalonado: la configuración por defecto del scheduler.
+
+Por cada uno se informa el pico de syncs que empiezan en un mismo minuto (lo que ven
+los proveedores), cuánto esperó cada una desde que venció hasta tener lugar y cuántas se saltearon porque
+ninguna de las dos playlists había cambiado.
+
+Uso: python benchmarks/sim_auto_sync.py [--playlists 3000] [--interval 60] [--hours 4] [--change-rate 0.3]
+"""
+import argparse
+import collections
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import fakes  # noqa: F401  (agrega el backend al sys.path)
+from models import Base, Playlist, User
+from scheduler import AutoSyncScheduler
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeSync:
+    """Lo que el scheduler usa de PlaylistSync; cada playlist cambia con probabilidad fija."""
+
+    def __init__(self, rng: random.Random, change_rate: float):
+        self.rng = rng
+        self.change_rate = change_rate
+
+    def has_changed(self, spotify_playlist_id: str, youtube_playlist_id: str) -> bool:
+        return self.rng.random() < self.change_rate
+
+    def sync_spotify_to_youtube(self, *args, **kwargs):
+        return {'synced': 1, 'failed': [], 'deferred': []}
+
+
+class FakeJobs:
+    """Cola de jobs con tiempo simulado: cada job termina `duration` segundos después."""
+
+    def __init__(self, clock: FakeClock, duration: float, workers: int):
+        self.clock = clock
+        self.duration = duration
+        self.workers = workers
+        self.waiting = collections.deque()
+        self.running = []
+        self.started = []
+
+    def pending(self) -> int:
+        return len(self.waiting)
+
+    def submit(self, user_id, sync_type, spotify_playlist_id, youtube_playlist_id, job, playlist_id=None, on_done=None):
+        self.waiting.append((playlist_id, job, on_done))
+        return len(self.started) + len(self.waiting), True
+
+    def advance(self) -> None:
+        now = self.clock()
+        for item in [item for item in self.running if item[0] <= now]:
+            self.running.remove(item)
+            _, job, on_done = item
+            result = job(None)
+            if on_done is not None:
+                on_done(result)
+        while self.waiting and len(self.running) < self.workers:
+            playlist_id, job, on_done = self.waiting.popleft()
+            self.started.append((now, playlist_id))
+            self.running.append((now + self.duration, job, on_done))
+
+
+def simulate(args, staggered: bool):
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+
+    start = datetime(2024, 3, 1, 12, 0)
+    db = session_factory()
+    user = User(email='sim@example.com', username='sim', hashed_password='x')
+    db.add(user)
+    db.flush()
+    # Todas se sincronizaron por última vez a la misma hora
+    db.add_all([Playlist(
+        name=f"p{i}", owner_id=user.id, spotify_playlist_id=f"sp{i}", youtube_playlist_id=f"yt{i}",
+        auto_sync_interval=args.interval, last_synced_at=start - timedelta(minutes=args.interval)
+    ) for i in range(args.playlists)])
+    db.commit()
+    db.close()
+
+    clock = FakeClock(start.timestamp())
+    rng = random.Random(1)
+    jobs = FakeJobs(clock, args.job_seconds, args.workers)
+    sync = FakeSync(rng, args.change_rate)
+    options = {} if staggered else {'jitter': 0.0, 'catch_up_window': 0.0}
+    scheduler = AutoSyncScheduler(
+        session_factory, jobs, lambda user_id: sync,
+        max_in_flight=args.in_flight, clock=clock, rng=rng, **options
+    )
+
+    # Cuánto esperó cada sync, desde que venció, hasta que tuvo lugar para salir
+    delays = []
+    end = clock.now + args.hours * 3600
+    while clock.now < end:
+        due = {entry.playlist_id: entry.next_due for entry in scheduler.entries.values()}
+        waiting = set(scheduler.in_flight)
+        scheduler.tick()
+        for playlist_id in scheduler.in_flight.keys() - waiting:
+            if playlist_id in due:
+                delays.append(clock.now - due[playlist_id])
+        jobs.advance()
+        clock.now += args.step
+
+    per_minute = collections.Counter(int(at // 60) for at, _ in jobs.started)
+    delays.sort()
+    p95 = delays[int(len(delays) * 0.95)] if delays else 0.0
+    return {
+        'started': len(jobs.started),
+        'peak_per_minute': max(per_minute.values()) if per_minute else 0,
+        'p95_delay': p95,
+        'skipped': scheduler.stats['skipped_unchanged'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--playlists', type=int, default=3000)
+    parser.add_argument('--interval', type=int, default=60, help='minutos')
+    parser.add_argument('--hours', type=float, default=4)
+    parser.add_argument('--change-rate', type=float, default=0.3)
+    parser.add_argument('--in-flight', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=50)
+    parser.add_argument('--job-seconds', type=float, default=20)
+    parser.add_argument('--step', type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.playlists} playlists cada {args.interval} min durante {args.hours}h, "
+          f"{args.change_rate:.0%} cambian entre vueltas")
+    for name, staggered in (('sin escalonar', False), ('escalonado', True)):
+        result = simulate(args, staggered)
+        print(f"{name:>14}: {result['started']:5d} syncs, pico {result['peak_per_minute']:4d}/min, "
+              f"espera p95 {result['p95_delay'] / 60:5.1f} min, "
+              f"{result['skipped']} salteadas sin cambios")
+
+
+if __name__ == '__main__':
+    main()
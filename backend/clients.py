@@ -0,0 +1,199 @@
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Optional, Set
+import json
+import os
+import threading
+
+import google_auth_httplib2
+import requests
+import spotipy
+import urllib3
+from dotenv import load_dotenv
+from google.oauth2.credentials import Credentials
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import Resource, build_from_document
+from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
+
+load_dotenv()
+
+# Pool de conexiones HTTP compartido por todos los clientes de Spotify del proceso
+SPOTIFY_POOL_SIZE = int(os.getenv("SPOTIFY_POOL_SIZE", "32"))
+SPOTIFY_MAX_RETRIES = int(os.getenv("SPOTIFY_MAX_RETRIES", "5"))
+SPOTIFY_MAX_RETRY_AFTER = float(os.getenv("SPOTIFY_MAX_RETRY_AFTER", "60"))  # segundos
+YOUTUBE_MAX_RETRY_AFTER = float(os.getenv("YOUTUBE_MAX_RETRY_AFTER", "60"))  # segundos
+SPOTIFY_REQUEST_TIMEOUT = float(os.getenv("SPOTIFY_REQUEST_TIMEOUT", "10"))
+
+
+class ThreadLocalHttp:
+    """Transporte httplib2 con una conexión persistente por hilo.
+
+    httplib2.Http no es thread-safe, pero sí reutiliza conexiones (keep-alive): cada hilo
+    del pool de proveedores mantiene su propio Http y lo reutiliza entre requests y usuarios.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def http(self):
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = build_http()
+            self._local.http = http
+        return http
+
+    def request(self, *args, **kwargs):
+        return self.http.request(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        # connections, timeout, redirect_codes, etc. del Http del hilo actual
+        return getattr(self.http, name)
+
+
+shared_http = ThreadLocalHttp()
+
+
+@lru_cache(maxsize=None)
+def _discovery_document(service_name: str, version: str) -> Dict:
+    """Carga una única vez el documento de discovery que viene con googleapiclient."""
+    document = discovery_cache.get_static_doc(service_name, version)
+    if document is None:
+        raise RuntimeError(f"No static discovery document for {service_name} {version}")
+    document = json.loads(document)
+
+    # build_from_document completa los parámetros de cada método la primera vez que lo crea;
+    # se hace acá, antes de compartir el documento entre hilos
+    service = build_from_document(document, http=shared_http)
+    for name in document.get('resources', {}):
+        getattr(service, name)()
+    return document
+
+
+def get_youtube_client(credentials: Credentials) -> Resource:
+    """Crea un cliente de la API de YouTube para las credenciales dadas.
+
+    A diferencia de build(), no vuelve a leer ni parsear el documento de discovery y
+    reutiliza las conexiones HTTP del hilo; sólo se crea el wrapper de credenciales.
+    """
+    http = google_auth_httplib2.AuthorizedHttp(credentials, http=shared_http)
+    return build_from_document(_discovery_document('youtube', 'v3'), http=http)
+
+
+def warm_up() -> None:
+    """Precarga los documentos de discovery (para hacerlo al iniciar la app)."""
+    _discovery_document('youtube', 'v3')
+
+
+class SpotifyRetry(urllib3.Retry):
+    """Reintenta 5xx respetando Retry-After, con un tope para no bloquear un hilo por horas.
+
+    Los 429 no se reintentan acá: llegan como SpotifyException al RateLimiter compartido,
+    que frena a todos los hilos en lugar de sólo al que recibió la respuesta.
+    """
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, SPOTIFY_MAX_RETRY_AFTER)
+
+
+class SharedSession(requests.Session):
+    """Sesión de requests de todo el proceso.
+
+    spotipy.Spotify cierra su sesión al ser recolectado (__del__); como esta sesión es
+    compartida, close() no hace nada para no descartar las conexiones keep-alive.
+    """
+
+    def close(self) -> None:
+        pass
+
+
+def _build_spotify_session() -> SharedSession:
+    session = SharedSession()
+    retry = SpotifyRetry(
+        total=SPOTIFY_MAX_RETRIES,
+        connect=None,
+        read=False,
+        # Sin POST: un 5xx después de aplicar playlist_add_items duplicaría los tracks. Los errores
+        # de conexión (el request no llegó a salir) se reintentan igual, con cualquier método
+        allowed_methods=frozenset(['GET', 'PUT', 'DELETE']),
+        status=SPOTIFY_MAX_RETRIES,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        respect_retry_after_header=True
+    )
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=SPOTIFY_POOL_SIZE,
+        max_retries=retry
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+spotify_session = _build_spotify_session()
+
+
+def get_spotify_client(auth) -> spotipy.Spotify:
+    """Crea un cliente de Spotify que usa el pool de conexiones compartido.
+
+    `auth` es un access token o un auth manager (get_access_token()), que spotipy
+    consulta en cada request; así un job largo no se queda con un token vencido.
+    """
+    if isinstance(auth, str):
+        return spotipy.Spotify(auth=auth, requests_session=spotify_session, requests_timeout=SPOTIFY_REQUEST_TIMEOUT)
+    return spotipy.Spotify(auth_manager=auth, requests_session=spotify_session, requests_timeout=SPOTIFY_REQUEST_TIMEOUT)
+
+
+# Motivos de error 403 de la YouTube Data API que indican exceso de ritmo (se reintentan)
+YOUTUBE_RATE_LIMIT_REASONS = frozenset({'rateLimitExceeded', 'userRateLimitExceeded'})
+
+
+def _retry_after_seconds(value: Optional[str], cap: float) -> float:
+    """Interpreta un header Retry-After (segundos o fecha HTTP); 0 si no viene."""
+    if not value:
+        return 0.0
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return 0.0
+    return min(max(seconds, 0.0), cap)
+
+
+def spotify_retry_after(error: Exception) -> Optional[float]:
+    """Segundos a esperar si el error es un 429 de Spotify; None si es otro error."""
+    if not isinstance(error, spotipy.SpotifyException) or error.http_status != 429:
+        return None
+    headers = error.headers or {}
+    return _retry_after_seconds(headers.get('Retry-After'), SPOTIFY_MAX_RETRY_AFTER)
+
+
+def youtube_error_reasons(error: HttpError) -> Set[str]:
+    try:
+        data = json.loads(error.content.decode('utf-8'))
+        return {item.get('reason') for item in data['error'].get('errors', [])}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return set()
+
+
+def youtube_quota_exceeded(error: Exception) -> bool:
+    """La cuota diaria del proyecto se agotó: reintentar no sirve hasta que se reinicie."""
+    return isinstance(error, HttpError) and 'quotaExceeded' in youtube_error_reasons(error)
+
+
+def youtube_retry_after(error: Exception) -> Optional[float]:
+    """Segundos a esperar si el error es un rate limit de YouTube; None si es otro error."""
+    if not isinstance(error, HttpError):
+        return None
+    status = error.resp.status
+    if status == 429 or (status == 403 and youtube_error_reasons(error) & YOUTUBE_RATE_LIMIT_REASONS):
+        return _retry_after_seconds(error.resp.get('retry-after'), YOUTUBE_MAX_RETRY_AFTER)
+    return None
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Tuple
+import threading
+
+from google.oauth2.credentials import Credentials
+from sqlalchemy.orm import Session
+
+from models import SpotifyConnection, YouTubeConnection
+from snapshots import SPOTIFY, YOUTUBE
+
+# Función de refresh de un proveedor: refresh_token -> (access_token, refresh_token, vencimiento en UTC)
+TokenRefresher = Callable[[str], Tuple[str, Optional[str], Optional[datetime]]]
+
+CONNECTION_MODELS = {SPOTIFY: SpotifyConnection, YOUTUBE: YouTubeConnection}
+
+# Mayor que los 3m45s antes del vencimiento en que google-auth ya da el token por vencido
+MIN_REFRESH_MARGIN = 240.0
+
+
+class CachedToken:
+    __slots__ = ('access_token', 'refresh_token', 'expires_at')
+
+    def __init__(self, access_token: str, refresh_token: Optional[str], expires_at: Optional[datetime]):
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at  # UTC sin zona horaria, como datetime.utcnow()
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class CredentialManager:
+    """Tokens de acceso vigentes de Spotify y YouTube de cada usuario, renovados antes de vencer."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        refreshers: Dict[str, TokenRefresher],
+        refresh_margin: float = 300.0,
+        clock: Callable[[], datetime] = datetime.utcnow
+    ):
+        self.session_factory = session_factory
+        self.refreshers = refreshers
+        self.refresh_margin = timedelta(seconds=max(refresh_margin, MIN_REFRESH_MARGIN))
+        self.clock = clock
+        self.stats = {'loads': 0, 'refreshes': 0, 'refresh_errors': 0}
+        self._tokens: Dict[Tuple[str, int], CachedToken] = {}
+        self._locks: Dict[Tuple[str, int], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, token: CachedToken) -> bool:
+        if token.expires_at is None:
+            # Sin vencimiento conocido se renueva, salvo que no haya con qué
+            return not token.refresh_token
+        return token.expires_at - self.clock() > self.refresh_margin
+
+    def _key_lock(self, key: Tuple[str, int]) -> threading.Lock:
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
+
+    def token(self, provider: str, user_id: int) -> Optional[CachedToken]:
+        """Token vigente del usuario para el proveedor; None si no conectó la cuenta."""
+        key = (provider, user_id)
+        token = self._tokens.get(key)
+        if token is not None and self._fresh(token):
+            return token
+
+        with self._key_lock(key):
+            # Otro hilo pudo haberlo cargado o renovado mientras se esperaba el lock
+            token = self._tokens.get(key)
+            if token is None:
+                token = self._load(provider, user_id)
+                if token is None:
+                    return None
+                self._tokens[key] = token
+            if not self._fresh(token):
+                token = self._refresh(provider, user_id, token)
+                self._tokens[key] = token
+            return token
+
+    def spotify_token(self, user_id: int) -> Optional[str]:
+        token = self.token(SPOTIFY, user_id)
+        return token.access_token if token else None
+
+    def spotify_auth(self, user_id: int) -> "SpotifyTokenSource":
+        """Auth manager para spotipy: cada request usa el token vigente en ese momento."""
+        return SpotifyTokenSource(self, user_id)
+
+    def youtube_credentials(self, user_id: int) -> Optional[Credentials]:
+        """Credentials de google-auth que, al vencer, piden el token nuevo a este manager."""
+        token = self.token(YOUTUBE, user_id)
+        if token is None:
+            return None
+
+        def refresh_handler(request, scopes=None):
+            current = self.token(YOUTUBE, user_id)
+            if current is None:
+                raise RuntimeError("YouTube account not connected")
+            return current.access_token, current.expires_at
+
+        return Credentials(token=token.access_token, expiry=token.expires_at, refresh_handler=refresh_handler)
+
+    def invalidate(self, user_id: int) -> None:
+        """Olvida los tokens del usuario (por ejemplo, después de volver a conectar una cuenta)."""
+        with self._lock:
+            for provider in CONNECTION_MODELS:
+                self._tokens.pop((provider, user_id), None)
+
+    def _load(self, provider: str, user_id: int) -> Optional[CachedToken]:
+        model = CONNECTION_MODELS[provider]
+        db = self.session_factory()
+        try:
+            connection = db.query(model).filter(model.user_id == user_id).first()
+        finally:
+            db.close()
+        self.stats['loads'] += 1
+        if connection is None or not connection.access_token:
+            return None
+        return CachedToken(connection.access_token, connection.refresh_token, _utc(connection.token_expires_at))
+
+    def _refresh(self, provider: str, user_id: int, token: CachedToken) -> CachedToken:
+        try:
+            access_token, refresh_token, expires_at = self.refreshers[provider](token.refresh_token)
+        except Exception as e:
+            self.stats['refresh_errors'] += 1
+            if token.expires_at is not None and token.expires_at > self.clock():
+                # Todavía no venció: se sigue usando y se reintenta en el próximo pedido
+                print(f"Error renovando el token de {provider} del usuario {user_id}:", e)
+                return token
+            raise
+        self.stats['refreshes'] += 1
+        refreshed = CachedToken(access_token, refresh_token or token.refresh_token, _utc(expires_at))
+
+        model = CONNECTION_MODELS[provider]
+        db = self.session_factory()
+        try:
+            db.query(model).filter(model.user_id == user_id).update({
+                'access_token': refreshed.access_token,
+                'refresh_token': refreshed.refresh_token,
+                'token_expires_at': refreshed.expires_at
+            })
+            db.commit()
+        finally:
+            db.close()
+        return refreshed
+
+
+class SpotifyTokenSource:
+    """Lo mínimo de un auth manager de spotipy para que pida el token a CredentialManager."""
+
+    __slots__ = ('manager', 'user_id')
+
+    def __init__(self, manager: CredentialManager, user_id: int):
+        self.manager = manager
+        self.user_id = user_id
+
+    def get_access_token(self, as_dict: bool = False) -> Optional[str]:
+        return self.manager.spotify_token(self.user_id)
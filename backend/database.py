@@ -1,6 +1,9 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, literal, text
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 import os
 from dotenv import load_dotenv
 
@@ -8,17 +11,190 @@ load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./youspoty.db")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Pool de conexiones (SQLite en archivo y bases con servidor)
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "10"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT_SECONDS", "30"))
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE_SECONDS", "1800"))  # -1 = nunca
+
+# SQLite: cuánto espera una escritura a que se libere el lock antes de fallar, y pragmas
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Driver asyncio de cada backend, para las URLs que no lo indican
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+    'mysql': 'aiomysql',
+}
+
+
+# SQLite en memoria: cada conexión abriría una base vacía distinta. Los engines sincrónico
+# y asyncio abren en cambio esta base con nombre y caché compartida, que vive mientras
+# alguna conexión siga abierta (el StaticPool del engine sincrónico la mantiene)
+SQLITE_SHARED_MEMORY_NAME = "file:youspoty-memory"
+
+
+def _is_sqlite_memory(url: URL) -> bool:
+    return url.database in (None, '', ':memory:')
+
+
+def _sqlite_shared_memory(url: URL) -> URL:
+    return url.set(
+        database=SQLITE_SHARED_MEMORY_NAME,
+        query={**url.query, 'mode': 'memory', 'cache': 'shared', 'uri': 'true'}
+    )
+
+
+def _sqlite_pragmas(journal_mode: str, synchronous: str, mmap_size: int, busy_timeout_ms: int):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA journal_mode={journal_mode}")
+            cursor.execute(f"PRAGMA synchronous={synchronous}")
+            cursor.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+            cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, **options) -> Engine:
+    """Crea el engine según el backend de `url`.
+
+    SQLite en archivo: WAL (las lecturas no bloquean a la escritura ni al revés),
+    synchronous=NORMAL (seguro con WAL, sin fsync en cada commit), mmap y busy_timeout
+    para que las escrituras concurrentes esperen el lock en lugar de fallar con
+    "database is locked"; las conexiones se reutilizan desde un pool. SQLite en memoria:
+    una sola conexión compartida, a la misma base que usa create_async_db_engine. Otras
+    bases: pool con pre-ping y reciclado, para no usar conexiones que el servidor ya cerró.
+
+    `options` pisa los valores por defecto de los pragmas (journal_mode, synchronous,
+    mmap_size, busy_timeout_ms) o del pool (pool_size, max_overflow, pool_timeout,
+    pool_recycle, pool_pre_ping).
+    """
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite':
+        return create_engine(
+            url,
+            pool_size=options.get('pool_size', DATABASE_POOL_SIZE),
+            max_overflow=options.get('max_overflow', DATABASE_MAX_OVERFLOW),
+            pool_timeout=options.get('pool_timeout', DATABASE_POOL_TIMEOUT),
+            pool_recycle=options.get('pool_recycle', DATABASE_POOL_RECYCLE),
+            pool_pre_ping=options.get('pool_pre_ping', True)
+        )
+
+    busy_timeout_ms = options.get('busy_timeout_ms', SQLITE_BUSY_TIMEOUT_MS)
+    connect_args = {"check_same_thread": False, "timeout": busy_timeout_ms / 1000}
+    if _is_sqlite_memory(url):
+        return create_engine(_sqlite_shared_memory(url), connect_args=connect_args, poolclass=StaticPool)
+
+    engine = create_engine(
+        url,
+        connect_args=connect_args,
+        poolclass=QueuePool,
+        pool_size=options.get('pool_size', DATABASE_POOL_SIZE),
+        max_overflow=options.get('max_overflow', DATABASE_MAX_OVERFLOW),
+        pool_timeout=options.get('pool_timeout', DATABASE_POOL_TIMEOUT)
+    )
+    event.listen(engine, "connect", _sqlite_pragmas(
+        options.get('journal_mode', 'WAL'),
+        options.get('synchronous', SQLITE_SYNCHRONOUS),
+        options.get('mmap_size', SQLITE_MMAP_SIZE),
+        busy_timeout_ms
+    ))
+    return engine
+
+
+def create_async_db_engine(url: str = SQLALCHEMY_DATABASE_URL, **options) -> AsyncEngine:
+    """Como create_db_engine, pero para AsyncSession (aiosqlite en SQLite).
+
+    Si la URL no indica un driver asyncio se usa el de ASYNC_DRIVERS.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if url.get_driver_name() != ASYNC_DRIVERS.get(backend) and backend in ASYNC_DRIVERS:
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    if backend != 'sqlite':
+        return create_async_engine(
+            url,
+            pool_size=options.get('pool_size', DATABASE_POOL_SIZE),
+            max_overflow=options.get('max_overflow', DATABASE_MAX_OVERFLOW),
+            pool_timeout=options.get('pool_timeout', DATABASE_POOL_TIMEOUT),
+            pool_recycle=options.get('pool_recycle', DATABASE_POOL_RECYCLE),
+            pool_pre_ping=options.get('pool_pre_ping', True)
+        )
+
+    busy_timeout_ms = options.get('busy_timeout_ms', SQLITE_BUSY_TIMEOUT_MS)
+    connect_args = {"check_same_thread": False, "timeout": busy_timeout_ms / 1000}
+    if _is_sqlite_memory(url):
+        # La misma base en memoria que el engine sincrónico, donde corrió create_all
+        return create_async_engine(_sqlite_shared_memory(url), connect_args=connect_args, poolclass=StaticPool)
+
+    engine = create_async_engine(
+        url,
+        connect_args=connect_args,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=options.get('pool_size', DATABASE_POOL_SIZE),
+        max_overflow=options.get('max_overflow', DATABASE_MAX_OVERFLOW),
+        pool_timeout=options.get('pool_timeout', DATABASE_POOL_TIMEOUT)
+    )
+    event.listen(engine.sync_engine, "connect", _sqlite_pragmas(
+        options.get('journal_mode', 'WAL'),
+        options.get('synchronous', SQLITE_SYNCHRONOUS),
+        options.get('mmap_size', SQLITE_MMAP_SIZE),
+        busy_timeout_ms
+    ))
+    return engine
+
+
+# Engine sincrónico: jobs en segundo plano, scheduler, caches y todo lo que corre en hilos
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine asyncio: las rutas de FastAPI
+async_engine = create_async_db_engine()
+AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+
+def add_missing_columns(engine: Engine, metadata) -> None:
+    """Agrega a las tablas existentes las columnas de los modelos que todavía no tienen.
+
+    create_all sólo crea las tablas que faltan: una base creada con una versión anterior
+    fallaría en la primera consulta que use una columna nueva. Es idempotente, así que se
+    puede correr en cada arranque. Las columnas se agregan aceptando NULL y, si el modelo
+    tiene un default fijo, con ese valor para las filas existentes.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            preparer = engine.dialect.identifier_preparer
+            ddl = (f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} "
+                   f"{column.type.compile(dialect=engine.dialect)}")
+            if column.default is not None and column.default.is_scalar:
+                default = literal(column.default.arg, column.type)
+                ddl += f" DEFAULT {default.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True})}"
+            with engine.begin() as connection:
+                connection.execute(text(ddl))
+            print(f"Columna agregada: {table.name}.{column.name}")
+
 # Dependency
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,229 @@
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+import json
+import os
+import queue
+import socket
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from models import Playlist, SyncHistory
+
+# Función de progreso: (procesados, total, sincronizados, fallidos)
+ProgressCallback = Callable[[int, int, int, int], None]
+# Trabajo a ejecutar: recibe el callback de progreso y devuelve el resultado de PlaylistSync
+SyncJob = Callable[[ProgressCallback], Dict]
+# Se llama siempre al terminar un job, con su resultado o None si falló o no llegó a correr
+DoneCallback = Callable[[Optional[Dict]], None]
+
+# Los jobs viven en la memoria del proceso que los encoló: cada fila lleva el proceso dueño
+WORKER_HOST = socket.gethostname()
+WORKER_ID = f"{WORKER_HOST}:{os.getpid()}"
+
+
+def _process_alive(worker_id: Optional[str]) -> bool:
+    """Si el proceso dueño de un job sigue vivo. Los de otros hosts se consideran vivos."""
+    if not worker_id:
+        # Filas anteriores a worker_id
+        return False
+    host, _, pid = worker_id.rpartition(':')
+    if host != WORKER_HOST or not pid.isdigit():
+        return True
+    if int(pid) == os.getpid():
+        return True
+    if os.name != 'posix':
+        # Sin una forma portable de preguntarlo, mejor no marcar jobs que pueden estar corriendo
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SyncJobQueue:
+    """Cola en memoria de sincronizaciones en hilos de fondo; cada job es una fila de SyncHistory."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        workers: int = 2,
+        progress_interval: float = 0.5
+    ):
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        # Intervalo mínimo entre escrituras de progreso a la base de datos (segundos)
+        self.progress_interval = progress_interval
+        self._queue: "queue.Queue[Tuple[int, Tuple, SyncJob, Optional[DoneCallback]]]" = queue.Queue()
+        self._active: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self) -> None:
+        """Marca como fallidos los jobs de procesos que ya no existen y lanza los workers."""
+        with self._lock:
+            if self._threads:
+                return
+            self._recover()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"sync-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(
+        self,
+        user_id: int,
+        sync_type: str,
+        spotify_playlist_id: Optional[str],
+        youtube_playlist_id: Optional[str],
+        job: SyncJob,
+        playlist_id: Optional[int] = None,
+        on_done: Optional[DoneCallback] = None
+    ) -> Tuple[int, bool]:
+        """Encola una sincronización o devuelve la igual ya pendiente: (id del job, si es nuevo)."""
+        self.start()
+        key = (user_id, sync_type, spotify_playlist_id, youtube_playlist_id)
+        with self._lock:
+            if key in self._active:
+                return self._active[key], False
+
+            db = self.session_factory()
+            try:
+                history = SyncHistory(
+                    playlist_id=playlist_id,
+                    user_id=user_id,
+                    spotify_playlist_id=spotify_playlist_id,
+                    youtube_playlist_id=youtube_playlist_id,
+                    sync_type=sync_type,
+                    status='queued',
+                    worker_id=WORKER_ID
+                )
+                db.add(history)
+                db.commit()
+                job_id = history.id
+            finally:
+                db.close()
+
+            self._active[key] = job_id
+        self._queue.put((job_id, key, job, on_done))
+        return job_id, True
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _worker(self) -> None:
+        while True:
+            job_id, key, job, on_done = self._queue.get()
+            result = None
+            try:
+                result = self._run(job_id, job)
+            finally:
+                with self._lock:
+                    self._active.pop(key, None)
+                if on_done is not None:
+                    try:
+                        on_done(result)
+                    except Exception as e:
+                        print(f"Error al terminar el job {job_id}:", e)
+                self._queue.task_done()
+
+    def _run(self, job_id: int, job: SyncJob) -> Optional[Dict]:
+        """Ejecuta el job y registra su estado; devuelve el resultado, o None si falló."""
+        result = None
+        try:
+            self._update(job_id, status='running', started_at=datetime.utcnow())
+            try:
+                result = job(self._progress_reporter(job_id))
+            except Exception as e:
+                self._update(
+                    job_id,
+                    status='failed',
+                    error_message=str(e),
+                    finished_at=datetime.utcnow()
+                )
+                return None
+
+            finished_at = datetime.utcnow()
+            self._update(
+                job_id,
+                status='success',
+                synced_items=result.get('synced', 0),
+                failed_items=len(result.get('failed', [])),
+                result=json.dumps(result, default=str),
+                finished_at=finished_at
+            )
+            self._mark_playlist_synced(job_id, finished_at)
+        except Exception as e:
+            print(f"Error registrando el estado del job {job_id}:", e)
+            try:
+                self._update(job_id, status='failed', error_message=str(e), finished_at=datetime.utcnow())
+            except Exception:
+                pass
+        return result
+
+    def _progress_reporter(self, job_id: int) -> ProgressCallback:
+        last_write = [0.0]
+
+        def report(processed: int, total: int, synced: int, failed: int) -> None:
+            now = time.monotonic()
+            # El último avance siempre se guarda; los intermedios, como mucho cada progress_interval
+            if processed < total and now - last_write[0] < self.progress_interval:
+                return
+            last_write[0] = now
+            try:
+                self._update(
+                    job_id,
+                    processed_items=processed,
+                    total_items=total,
+                    synced_items=synced,
+                    failed_items=failed
+                )
+            except Exception as e:
+                # El progreso es informativo: un error al guardarlo no debe cortar la sincronización
+                print(f"Error guardando el progreso del job {job_id}:", e)
+
+        return report
+
+    def _mark_playlist_synced(self, job_id: int, synced_at: datetime) -> None:
+        """Actualiza last_synced_at de la playlist vinculada al job, si tiene una."""
+        db = self.session_factory()
+        try:
+            playlist_id = db.query(SyncHistory.playlist_id).filter(SyncHistory.id == job_id).scalar()
+            if playlist_id is not None:
+                db.query(Playlist).filter(Playlist.id == playlist_id).update({'last_synced_at': synced_at})
+                db.commit()
+        finally:
+            db.close()
+
+    def _update(self, job_id: int, **values) -> None:
+        db = self.session_factory()
+        try:
+            db.query(SyncHistory).filter(SyncHistory.id == job_id).update(values)
+            db.commit()
+        finally:
+            db.close()
+
+    def _recover(self) -> None:
+        # Cada worker de uvicorn tiene su cola: sólo se marcan los jobs de procesos muertos
+        db = self.session_factory()
+        try:
+            owners = [row[0] for row in db.query(SyncHistory.worker_id).filter(
+                SyncHistory.status.in_(['queued', 'running'])
+            ).distinct()]
+            dead = [owner for owner in owners if not _process_alive(owner)]
+            if not dead:
+                return
+            orphaned = SyncHistory.worker_id.in_([owner for owner in dead if owner])
+            if None in dead:
+                orphaned = orphaned | SyncHistory.worker_id.is_(None)
+            db.query(SyncHistory).filter(SyncHistory.status.in_(['queued', 'running']), orphaned).update(
+                {'status': 'failed', 'error_message': 'Interrupted by server restart'},
+                synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
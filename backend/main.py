@@ -1,41 +1,65 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Body
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta, datetime
 import spotipy
+from spotipy.cache_handler import MemoryCacheHandler
 from spotipy.oauth2 import SpotifyOAuth
+from google.auth.transport.requests import Request as GoogleAuthRequest
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
 import os
+import tempfile
 from dotenv import load_dotenv
 from typing import List, Dict, Any
 import json
 
-from database import engine, get_db
+from database import engine, async_engine, get_async_db, SessionLocal, add_missing_columns
 from models import Base, User, SpotifyConnection, YouTubeConnection, Playlist, SyncHistory
 from schemas import (
     UserCreate, User as UserSchema,
     SpotifyConnectionCreate, SpotifyConnection as SpotifyConnectionSchema, YouTubeCallbackRequest,
     YouTubeConnectionCreate, YouTubeConnection as YouTubeConnectionSchema,
-    PlaylistCreate, Playlist as PlaylistSchema,
+    PlaylistCreate, PlaylistAutoSync, Playlist as PlaylistSchema,
     SyncHistoryCreate, SyncHistory as SyncHistorySchema,
     Token, SpotifyCallbackRequest,
     UserLogin
 )
 from auth import (
     get_current_active_user, create_access_token,
-    verify_password, get_password_hash
+    password_hasher, principal_cache
 )
+from passwords import PasswordPoolFull
 from playlist_sync import PlaylistSync
+from match_cache import MatchCache
+from snapshots import SnapshotStore, SPOTIFY, YOUTUBE
+from jobs import SyncJobQueue
+from scheduler import AutoSyncScheduler
+from quota import QuotaLedger
+from credentials import CredentialManager
+import metrics
+from providers import run_provider, run_db
+from clients import get_spotify_client, get_youtube_client, warm_up as warm_up_clients
 
-# Crear las tablas de la base de datos
+# Crear las tablas de la base de datos y agregar las columnas nuevas a las que ya existían
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine, Base.metadata)
 
 load_dotenv()
 
 app = FastAPI()
 
+@app.on_event("startup")
+def load_provider_clients():
+    # Cargar los documentos de discovery antes del primer request
+    warm_up_clients()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await async_engine.dispose()
+
 # Configuración de CORS
 app.add_middleware(
     CORSMiddleware,
@@ -62,31 +86,176 @@ YOUTUBE_SCOPES = [
     "https://www.googleapis.com/auth/youtube.force-ssl"
 ]
 
-def refresh_spotify_token(spotify_connection: SpotifyConnection):
-    # Aquí suponemos que SpotifyConnection contiene el refresh_token
+# Configuración de la sincronización (búsquedas concurrentes y presupuesto por proveedor)
+SYNC_SEARCH_WORKERS = int(os.getenv("SYNC_SEARCH_WORKERS", "8"))
+SPOTIFY_SEARCH_RATE = float(os.getenv("SPOTIFY_SEARCH_RATE", "10"))  # llamadas/seg
+YOUTUBE_SEARCH_RATE = float(os.getenv("YOUTUBE_SEARCH_RATE", "5"))  # llamadas/seg
+SYNC_MATCH_THRESHOLD = float(os.getenv("SYNC_MATCH_THRESHOLD", "0.7"))
+
+# Cache de resoluciones compartido por todos los usuarios
+match_cache = MatchCache(
+    SessionLocal,
+    max_size=int(os.getenv("MATCH_CACHE_SIZE", "10000")),
+    ttl=timedelta(hours=float(os.getenv("MATCH_CACHE_TTL_HOURS", "720"))),
+    negative_ttl=timedelta(hours=float(os.getenv("MATCH_CACHE_NEGATIVE_TTL_HOURS", "24")))
+)
+
+# Última versión leída de cada playlist (snapshot_id / ETag)
+snapshot_store = SnapshotStore(SessionLocal)
+
+# Cuota diaria de la YouTube Data API (unidades) del proyecto y, opcionalmente, por usuario
+youtube_quota = QuotaLedger(
+    SessionLocal,
+    daily_limit=int(os.getenv("YOUTUBE_DAILY_QUOTA", "10000")),
+    user_daily_limit=int(os.getenv("YOUTUBE_USER_DAILY_QUOTA", "0")),
+    project=os.getenv("YOUTUBE_QUOTA_PROJECT") or YOUTUBE_CLIENT_ID or "default"
+)
+
+# Cola de sincronizaciones en segundo plano
+sync_jobs = SyncJobQueue(SessionLocal, workers=int(os.getenv("SYNC_JOB_WORKERS", "2")))
+
+@app.on_event("startup")
+def start_sync_jobs():
+    # Marcar como fallidos los jobs que dejó a medias un proceso anterior sin esperar al primer submit
+    sync_jobs.start()
+
+# Sincronización automática de las playlists vinculadas
+AUTO_SYNC_ENABLED = os.getenv("AUTO_SYNC_ENABLED", "true").lower() not in ("0", "false", "no")
+AUTO_SYNC_DEFAULT_INTERVAL_MINUTES = float(os.getenv("AUTO_SYNC_DEFAULT_INTERVAL_MINUTES", "0"))  # 0 = sólo las que tienen intervalo propio
+# Con varios workers corre en uno solo: el que toma el lock de este archivo
+AUTO_SYNC_LOCK_FILE = os.getenv("AUTO_SYNC_LOCK_FILE", os.path.join(tempfile.gettempdir(), "youspoty-auto-sync.lock"))
+
+def refresh_spotify_token(refresh_token: str):
+    # Cache en memoria: el cache en archivo de spotipy se compartiría entre usuarios
     sp_oauth = SpotifyOAuth(
         client_id=SPOTIFY_CLIENT_ID,
         client_secret=SPOTIFY_CLIENT_SECRET,
         redirect_uri=SPOTIFY_REDIRECT_URI,
+        cache_handler=MemoryCacheHandler()
     )
-    
-    token_info = sp_oauth.refresh_access_token(spotify_connection.refresh_token)
-    
-    # Actualiza el acceso en la base de datos
-    spotify_connection.access_token = token_info['access_token']
-    spotify_connection.refresh_token = token_info['refresh_token']
-    
-    return spotify_connection
+    token_info = sp_oauth.refresh_access_token(refresh_token)
+    return token_info['access_token'], token_info.get('refresh_token'), datetime.utcfromtimestamp(token_info['expires_at'])
+
+def refresh_youtube_token(refresh_token: str):
+    credentials = Credentials(
+        token=None,
+        refresh_token=refresh_token,
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id=YOUTUBE_CLIENT_ID,
+        client_secret=YOUTUBE_CLIENT_SECRET
+    )
+    credentials.refresh(GoogleAuthRequest())
+    return credentials.token, credentials.refresh_token, credentials.expiry
+
+# Tokens de Spotify y YouTube de cada usuario, renovados antes de que venzan
+credential_manager = CredentialManager(
+    SessionLocal,
+    {SPOTIFY: refresh_spotify_token, YOUTUBE: refresh_youtube_token},
+    refresh_margin=float(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+)
+
+def get_user_spotify_client(user_id: int):
+    """Cliente de Spotify del usuario con su token vigente (None si no conectó la cuenta)."""
+    if credential_manager.spotify_token(user_id) is None:
+        return None
+    return get_spotify_client(credential_manager.spotify_auth(user_id))
+
+def get_user_youtube_client(user_id: int):
+    """Cliente de YouTube del usuario con su token vigente (None si no conectó la cuenta)."""
+    credentials = credential_manager.youtube_credentials(user_id)
+    if credentials is None:
+        return None
+    return get_youtube_client(credentials)
+
+async def find_linked_playlist_id(db: AsyncSession, user_id: int, spotify_playlist_id: str, youtube_playlist_id: str):
+    result = await db.execute(select(Playlist.id).filter(
+        Playlist.owner_id == user_id,
+        Playlist.spotify_playlist_id == spotify_playlist_id,
+        Playlist.youtube_playlist_id == youtube_playlist_id
+    ).limit(1))
+    return result.scalar()
+
+async def find_linked_playlist_pairs(db: AsyncSession, user_id: int):
+    """Pares (playlist de Spotify, playlist de YouTube) de las playlists vinculadas del usuario."""
+    result = await db.execute(select(Playlist.spotify_playlist_id, Playlist.youtube_playlist_id).filter(
+        Playlist.owner_id == user_id,
+        Playlist.spotify_playlist_id.isnot(None),
+        Playlist.youtube_playlist_id.isnot(None)
+    ).order_by(Playlist.id))
+    return list(dict.fromkeys(tuple(row) for row in result))
+
+def create_playlist_sync(sp: spotipy.Spotify, youtube, user_id: int) -> PlaylistSync:
+    return PlaylistSync(
+        sp,
+        youtube,
+        max_workers=SYNC_SEARCH_WORKERS,
+        spotify_rate=SPOTIFY_SEARCH_RATE,
+        youtube_rate=YOUTUBE_SEARCH_RATE,
+        cache=match_cache,
+        match_threshold=SYNC_MATCH_THRESHOLD,
+        snapshots=snapshot_store,
+        quota=youtube_quota,
+        user_id=user_id
+    )
+
+def create_user_playlist_sync(user_id: int):
+    """PlaylistSync de un usuario fuera de un request (None si le falta alguna conexión)."""
+    sp = get_user_spotify_client(user_id)
+    youtube = get_user_youtube_client(user_id)
+    if sp is None or youtube is None:
+        return None
+    return create_playlist_sync(sp, youtube, user_id)
+
+auto_sync = AutoSyncScheduler(
+    SessionLocal,
+    sync_jobs,
+    create_user_playlist_sync,
+    default_interval=AUTO_SYNC_DEFAULT_INTERVAL_MINUTES * 60,
+    max_sync=int(os.getenv("AUTO_SYNC_MAX_SYNC", "50")),
+    jitter=float(os.getenv("AUTO_SYNC_JITTER", "0.1")),
+    max_in_flight=int(os.getenv("AUTO_SYNC_MAX_IN_FLIGHT", "2")),
+    quota=youtube_quota,
+    quota_reserve=float(os.getenv("AUTO_SYNC_QUOTA_RESERVE", "0.2")),
+    poll_interval=float(os.getenv("AUTO_SYNC_POLL_SECONDS", "30"))
+)
+
+@app.on_event("startup")
+def start_auto_sync():
+    if AUTO_SYNC_ENABLED and not auto_sync.start(AUTO_SYNC_LOCK_FILE):
+        print("La sincronización automática ya corre en otro proceso")
 
 print("SPOTIFY_CLIENT_ID:", SPOTIFY_CLIENT_ID)
+
+def password_pool_full() -> HTTPException:
+    # Demasiados hashes de bcrypt pendientes: mejor rechazar ya que hacer esperar segundos
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many login requests, try again later",
+        headers={"Retry-After": "1"},
+    )
+
 # Rutas de autenticación
 @app.post("/token", response_model=Token)
 async def login_for_access_token(
     credentials: UserLogin = Body(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = db.query(User).filter(User.username == credentials.username).first()
-    if not user or not verify_password(credentials.password, user.hashed_password):
+    user = (await db.execute(
+        select(User.id, User.username, User.hashed_password).filter(User.username == credentials.username)
+    )).first()
+    # bcrypt tarda cientos de ms: no retener la conexión del pool mientras tanto
+    await db.rollback()
+    valid = False
+    if user:
+        try:
+            valid, new_hash = await password_hasher.verify_and_update(credentials.password, user.hashed_password)
+        except PasswordPoolFull:
+            raise password_pool_full()
+        if valid and new_hash:
+            # El hash tenía otro costo de bcrypt: se guarda con el configurado
+            await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+            await db.commit()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -99,46 +268,41 @@ async def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/me", response_model=Dict[str, Any])
-async def get_current_user_info(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    spotify_connection = db.query(SpotifyConnection).filter(
-        SpotifyConnection.user_id == current_user.id
-    ).first()
-    
-    youtube_connection = db.query(YouTubeConnection).filter(
-        YouTubeConnection.user_id == current_user.id
-    ).first()
-    
+async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
+    # Las conexiones vienen cargadas con el usuario (ver auth.PrincipalCache)
     return {
         "user": {
             "id": current_user.id,
             "email": current_user.email,
             "username": current_user.username
         },
-        "spotify_connected": spotify_connection is not None,
-        "youtube_connected": youtube_connection is not None
+        "spotify_connected": current_user.spotify_connection is not None,
+        "youtube_connected": current_user.youtube_connection is not None
     }
 
 @app.post("/users/", response_model=UserSchema)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = (await db.execute(select(User.id).filter(User.email == user.email))).first()
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = (await db.execute(select(User.id).filter(User.username == user.username))).first()
     if db_user:
         raise HTTPException(status_code=400, detail="Username already taken")
-    
-    hashed_password = get_password_hash(user.password)
+    # Devolver la conexión al pool antes de hashear
+    await db.rollback()
+
+    try:
+        hashed_password = await password_hasher.hash(user.password)
+    except PasswordPoolFull:
+        raise password_pool_full()
     db_user = User(
         email=user.email,
         username=user.username,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 # Rutas de Spotify
@@ -157,7 +321,7 @@ async def get_spotify_auth_url():
 @app.post("/auth/spotify/callback")
 async def spotify_callback(
     payload: SpotifyCallbackRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     code = payload.code
@@ -170,10 +334,12 @@ async def spotify_callback(
     )
     
     try:
-        token_info = sp_oauth.get_access_token(code)
-        new_expires_at = datetime.fromtimestamp(token_info["expires_at"])
+        token_info = await run_provider(sp_oauth.get_access_token, code)
+        new_expires_at = datetime.utcfromtimestamp(token_info["expires_at"])
         # Guardar o actualizar la conexión de Spotify
-        spotify_connection = db.query(SpotifyConnection).filter(SpotifyConnection.user_id == current_user.id).first()
+        spotify_connection = (await db.execute(
+            select(SpotifyConnection).filter(SpotifyConnection.user_id == current_user.id)
+        )).scalars().first()
         if spotify_connection:
             spotify_connection.access_token = token_info["access_token"]
             spotify_connection.refresh_token = token_info.get("refresh_token")
@@ -187,7 +353,10 @@ async def spotify_callback(
             )
             db.add(spotify_connection)
         print("Spotify connection:", spotify_connection)
-        db.commit()
+        await db.commit()
+        # Que los pedidos siguientes usen la conexión nueva
+        credential_manager.invalidate(current_user.id)
+        principal_cache.invalidate(current_user.id)
         return {"status": "success"}
     except Exception as e:
         print("Error durante la autenticación de Spotify:", str(e))
@@ -197,28 +366,13 @@ async def spotify_callback(
         )
 
 @app.get("/spotify/playlists")
-async def get_spotify_playlists(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    spotify_connection = db.query(SpotifyConnection).filter(
-        SpotifyConnection.user_id == current_user.id
-    ).first()
-
-    if not spotify_connection:
+async def get_spotify_playlists(current_user: User = Depends(get_current_active_user)):
+    sp = await run_provider(get_user_spotify_client, current_user.id)
+    if sp is None:
         raise HTTPException(status_code=400, detail="Spotify account not connected")
-    
-    # Verificar si el token ha expirado
-    if spotify_connection.access_token_expired():
-        print("Token ha expirado, actualizando...")
-        # imprimo datos de la conexión
-        print("Datos de la conexión:", spotify_connection.__dict__)
-        spotify_connection = refresh_spotify_token(spotify_connection)
-        db.commit()
 
     try:
-        sp = spotipy.Spotify(auth=spotify_connection.access_token)
-        playlists = sp.current_user_playlists()
+        playlists = await run_provider(sp.current_user_playlists)
         return playlists
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -226,19 +380,14 @@ async def get_spotify_playlists(
 @app.get("/spotify/playlist/{playlist_id}/tracks")
 async def get_spotify_playlist_tracks(
     playlist_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_active_user)
 ):
-    spotify_connection = db.query(SpotifyConnection).filter(
-        SpotifyConnection.user_id == current_user.id
-    ).first()
-    
-    if not spotify_connection:
+    sp = await run_provider(get_user_spotify_client, current_user.id)
+    if sp is None:
         raise HTTPException(status_code=400, detail="Spotify account not connected")
     
     try:
-        sp = spotipy.Spotify(auth=spotify_connection.access_token)
-        tracks = sp.playlist_tracks(playlist_id)
+        tracks = await run_provider(sp.playlist_tracks, playlist_id)
         return tracks
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -265,7 +414,7 @@ def get_youtube_auth_url(current_user: User = Depends(get_current_active_user)):
 @app.post("/auth/youtube/callback")
 async def youtube_callback(
     request: YouTubeCallbackRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     print("Callback de YouTube recibido")
@@ -287,13 +436,16 @@ async def youtube_callback(
             scopes=YOUTUBE_SCOPES,
             redirect_uri=request.redirect_uri
         )
-        flow.fetch_token(code=request.code)
+        await run_provider(flow.fetch_token, code=request.code)
         credentials = flow.credentials
-        youtube = build('youtube', 'v3', credentials=credentials)
-        channel = youtube.channels().list(part='snippet', mine=True).execute()
+        youtube = get_youtube_client(credentials)
+        channel = await run_provider(youtube.channels().list(part='snippet', mine=True).execute)
+        await run_db(youtube_quota.charge, 'channels.list', current_user.id)
         youtube_user = channel['items'][0]
 
-        youtube_connection = db.query(YouTubeConnection).filter(YouTubeConnection.user_id == current_user.id).first()
+        youtube_connection = (await db.execute(
+            select(YouTubeConnection).filter(YouTubeConnection.user_id == current_user.id)
+        )).scalars().first()
         if youtube_connection:
             youtube_connection.access_token = credentials.token
             youtube_connection.refresh_token = credentials.refresh_token
@@ -307,39 +459,27 @@ async def youtube_callback(
                 token_expires_at=credentials.expiry
             )
             db.add(youtube_connection)
-        db.commit()
+        await db.commit()
+        credential_manager.invalidate(current_user.id)
+        principal_cache.invalidate(current_user.id)
         return {"status": "success", "message": "YouTube account connected successfully"}
     except Exception as e:
         print("Error en el callback de YouTube:", e)
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/youtube/playlists")
-async def get_youtube_playlists(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    youtube_connection = db.query(YouTubeConnection).filter(
-        YouTubeConnection.user_id == current_user.id
-    ).first()
-    
-    if not youtube_connection:
+async def get_youtube_playlists(current_user: User = Depends(get_current_active_user)):
+    youtube = await run_provider(get_user_youtube_client, current_user.id)
+    if youtube is None:
         raise HTTPException(status_code=400, detail="YouTube account not connected")
     
     try:
-        credentials = Credentials(
-            token=youtube_connection.access_token,
-            refresh_token=youtube_connection.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=YOUTUBE_CLIENT_ID,
-            client_secret=YOUTUBE_CLIENT_SECRET
-        )
-        
-        youtube = build('youtube', 'v3', credentials=credentials)
-        playlists = youtube.playlists().list(
+        playlists = await run_provider(youtube.playlists().list(
             part='snippet',
             mine=True,
             maxResults=50
-        ).execute()
+        ).execute)
+        await run_db(youtube_quota.charge, 'playlists.list', current_user.id)
         
         return playlists
     except Exception as e:
@@ -348,31 +488,19 @@ async def get_youtube_playlists(
 @app.get("/youtube/playlist/{playlist_id}/items")
 async def get_youtube_playlist_items(
     playlist_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_active_user)
 ):
-    youtube_connection = db.query(YouTubeConnection).filter(
-        YouTubeConnection.user_id == current_user.id
-    ).first()
-    
-    if not youtube_connection:
+    youtube = await run_provider(get_user_youtube_client, current_user.id)
+    if youtube is None:
         raise HTTPException(status_code=400, detail="YouTube account not connected")
     
     try:
-        credentials = Credentials(
-            token=youtube_connection.access_token,
-            refresh_token=youtube_connection.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=YOUTUBE_CLIENT_ID,
-            client_secret=YOUTUBE_CLIENT_SECRET
-        )
-        
-        youtube = build('youtube', 'v3', credentials=credentials)
-        items = youtube.playlistItems().list(
+        items = await run_provider(youtube.playlistItems().list(
             part='snippet',
             playlistId=playlist_id,
             maxResults=50
-        ).execute()
+        ).execute)
+        await run_db(youtube_quota.charge, 'playlistItems.list', current_user.id)
         
         return items
     except Exception as e:
@@ -383,45 +511,35 @@ async def get_youtube_playlist_items(
 async def compare_playlists(
     spotify_playlist_id: str,
     youtube_playlist_id: str,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_active_user)
 ):
     try:
-        # Obtener conexiones
-        spotify_connection = db.query(SpotifyConnection).filter(
-            SpotifyConnection.user_id == current_user.id
-        ).first()
-        
-        youtube_connection = db.query(YouTubeConnection).filter(
-            YouTubeConnection.user_id == current_user.id
-        ).first()
+        # Clientes con los tokens vigentes del usuario
+        sp = await run_provider(get_user_spotify_client, current_user.id)
+        youtube = await run_provider(get_user_youtube_client, current_user.id)
         
-        if not spotify_connection or not youtube_connection:
+        if sp is None or youtube is None:
             raise HTTPException(status_code=400, detail="Both Spotify and YouTube accounts must be connected")
         
-        # Crear clientes
-        sp = spotipy.Spotify(auth=spotify_connection.access_token)
-        
-        credentials = Credentials(
-            token=youtube_connection.access_token,
-            refresh_token=youtube_connection.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=YOUTUBE_CLIENT_ID,
-            client_secret=YOUTUBE_CLIENT_SECRET
-        )
-        youtube = build('youtube', 'v3', credentials=credentials)
-        
         # Usar PlaylistSync para comparar
-        sync = PlaylistSync(sp, youtube)
-        missing_in_spotify, missing_in_youtube = sync.compare_playlists(
+        sync = create_playlist_sync(sp, youtube, current_user.id)
+        missing_in_spotify, missing_in_youtube, matched = await run_provider(
+            sync.match_playlists,
             spotify_playlist_id,
             youtube_playlist_id
         )
         
         return {
-            "missing_in_spotify": missing_in_spotify,
-            "missing_in_youtube": missing_in_youtube
+            "missing_in_spotify": [video.to_dict() for video in missing_in_spotify],
+            "missing_in_youtube": [track.to_dict() for track in missing_in_youtube],
+            "matched": [{
+                "spotify": pair["spotify"].to_dict(),
+                "youtube": pair["youtube"].to_dict(),
+                "score": pair["score"]
+            } for pair in matched]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -431,42 +549,37 @@ async def sync_spotify_to_youtube(
     youtube_playlist_id: str,
     max_sync: int = 50,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        # Obtener conexiones
-        spotify_connection = db.query(SpotifyConnection).filter(
-            SpotifyConnection.user_id == current_user.id
-        ).first()
+        # Clientes con los tokens vigentes del usuario
+        sp = await run_provider(get_user_spotify_client, current_user.id)
+        youtube = await run_provider(get_user_youtube_client, current_user.id)
         
-        youtube_connection = db.query(YouTubeConnection).filter(
-            YouTubeConnection.user_id == current_user.id
-        ).first()
-        
-        if not spotify_connection or not youtube_connection:
+        if sp is None or youtube is None:
             raise HTTPException(status_code=400, detail="Both Spotify and YouTube accounts must be connected")
         
-        # Crear clientes
-        sp = spotipy.Spotify(auth=spotify_connection.access_token)
-        
-        credentials = Credentials(
-            token=youtube_connection.access_token,
-            refresh_token=youtube_connection.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=YOUTUBE_CLIENT_ID,
-            client_secret=YOUTUBE_CLIENT_SECRET
-        )
-        youtube = build('youtube', 'v3', credentials=credentials)
-        
-        # Usar PlaylistSync para sincronizar
-        sync = PlaylistSync(sp, youtube)
-        result = sync.sync_spotify_to_youtube(
+        # Encolar la sincronización; el progreso se consulta en /sync/jobs/{job_id}
+        sync = create_playlist_sync(sp, youtube, current_user.id)
+        playlist_id = await find_linked_playlist_id(db, current_user.id, spotify_playlist_id, youtube_playlist_id)
+        job_id, created = await run_db(
+            sync_jobs.submit,
+            current_user.id,
+            'spotify_to_youtube',
             spotify_playlist_id,
             youtube_playlist_id,
-            max_sync
+            lambda progress: sync.sync_spotify_to_youtube(
+                spotify_playlist_id,
+                youtube_playlist_id,
+                max_sync,
+                progress=progress
+            ),
+            playlist_id=playlist_id
         )
         
-        return result
+        return {"job_id": job_id, "deduplicated": not created}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -476,45 +589,188 @@ async def sync_youtube_to_spotify(
     youtube_playlist_id: str,
     max_sync: int = 50,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        # Obtener conexiones
-        spotify_connection = db.query(SpotifyConnection).filter(
-            SpotifyConnection.user_id == current_user.id
-        ).first()
+        # Clientes con los tokens vigentes del usuario
+        sp = await run_provider(get_user_spotify_client, current_user.id)
+        youtube = await run_provider(get_user_youtube_client, current_user.id)
         
-        youtube_connection = db.query(YouTubeConnection).filter(
-            YouTubeConnection.user_id == current_user.id
-        ).first()
-        
-        if not spotify_connection or not youtube_connection:
+        if sp is None or youtube is None:
             raise HTTPException(status_code=400, detail="Both Spotify and YouTube accounts must be connected")
         
-        # Crear clientes
-        sp = spotipy.Spotify(auth=spotify_connection.access_token)
-        
-        credentials = Credentials(
-            token=youtube_connection.access_token,
-            refresh_token=youtube_connection.refresh_token,
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=YOUTUBE_CLIENT_ID,
-            client_secret=YOUTUBE_CLIENT_SECRET
-        )
-        youtube = build('youtube', 'v3', credentials=credentials)
-        
-        # Usar PlaylistSync para sincronizar
-        sync = PlaylistSync(sp, youtube)
-        result = sync.sync_youtube_to_spotify(
+        # Encolar la sincronización; el progreso se consulta en /sync/jobs/{job_id}
+        sync = create_playlist_sync(sp, youtube, current_user.id)
+        playlist_id = await find_linked_playlist_id(db, current_user.id, spotify_playlist_id, youtube_playlist_id)
+        job_id, created = await run_db(
+            sync_jobs.submit,
+            current_user.id,
+            'youtube_to_spotify',
             spotify_playlist_id,
             youtube_playlist_id,
-            max_sync
+            lambda progress: sync.sync_youtube_to_spotify(
+                spotify_playlist_id,
+                youtube_playlist_id,
+                max_sync,
+                progress=progress
+            ),
+            playlist_id=playlist_id
         )
         
-        return result
+        return {"job_id": job_id, "deduplicated": not created}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+async def submit_bulk_sync(sync_type: str, max_sync: int, current_user: User, db: AsyncSession):
+    """Encola la sincronización de todas las playlists vinculadas del usuario en un solo job."""
+    try:
+        # Clientes con los tokens vigentes del usuario
+        sp = await run_provider(get_user_spotify_client, current_user.id)
+        youtube = await run_provider(get_user_youtube_client, current_user.id)
+        
+        if sp is None or youtube is None:
+            raise HTTPException(status_code=400, detail="Both Spotify and YouTube accounts must be connected")
+        
+        pairs = await find_linked_playlist_pairs(db, current_user.id)
+        if not pairs:
+            raise HTTPException(status_code=400, detail="No linked playlists to sync")
+        
+        # Un solo job para todos los pares: las canciones repetidas se resuelven una vez
+        sync = create_playlist_sync(sp, youtube, current_user.id)
+        job_id, created = await run_db(
+            sync_jobs.submit,
+            current_user.id,
+            f"bulk_{sync_type}",
+            None,
+            None,
+            lambda progress: sync.sync_many(pairs, sync_type, max_sync, progress=progress)
+        )
+        
+        return {"job_id": job_id, "deduplicated": not created, "playlists": len(pairs)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/sync/bulk/spotify-to-youtube")
+async def bulk_sync_spotify_to_youtube(
+    max_sync: int = 50,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await submit_bulk_sync('spotify_to_youtube', max_sync, current_user, db)
+
+@app.post("/sync/bulk/youtube-to-spotify")
+async def bulk_sync_youtube_to_spotify(
+    max_sync: int = 50,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await submit_bulk_sync('youtube_to_spotify', max_sync, current_user, db)
+
+@app.get("/sync/auto")
+async def get_auto_sync_schedule(current_user: User = Depends(get_current_active_user)):
+    # Próxima sincronización automática de cada playlist del usuario
+    entries = [entry for entry in list(auto_sync.entries.values()) if entry.user_id == current_user.id]
+    return [{
+        "playlist_id": entry.playlist_id,
+        "spotify_playlist_id": entry.spotify_playlist_id,
+        "youtube_playlist_id": entry.youtube_playlist_id,
+        "direction": entry.direction,
+        "interval_minutes": entry.interval / 60,
+        "priority": entry.priority,
+        "running": entry.playlist_id in auto_sync.in_flight,
+        "next_run_at": datetime.utcfromtimestamp(entry.next_due).isoformat() + "Z"
+    } for entry in sorted(entries, key=lambda entry: entry.next_due)]
+
+def check_auto_sync(settings: PlaylistAutoSync):
+    if settings.auto_sync_interval is not None and settings.auto_sync_interval <= 0:
+        raise HTTPException(status_code=400, detail="auto_sync_interval must be a positive number of minutes")
+    if settings.auto_sync_direction not in (None, 'spotify_to_youtube', 'youtube_to_spotify'):
+        raise HTTPException(status_code=400, detail="auto_sync_direction must be spotify_to_youtube or youtube_to_spotify")
+
+# Rutas de playlists vinculadas
+@app.get("/playlists/", response_model=List[PlaylistSchema])
+async def list_playlists(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(select(Playlist).filter(Playlist.owner_id == current_user.id).order_by(Playlist.id))
+    return result.scalars().all()
+
+@app.post("/playlists/", response_model=PlaylistSchema)
+async def create_playlist(
+    playlist: PlaylistCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # Vincula una playlist de Spotify con una de YouTube; el scheduler la toma en su próxima recarga
+    check_auto_sync(playlist)
+    db_playlist = Playlist(**playlist.model_dump(), owner_id=current_user.id)
+    db.add(db_playlist)
+    await db.commit()
+    await db.refresh(db_playlist)
+    return db_playlist
+
+@app.put("/playlists/{playlist_id}/auto-sync", response_model=PlaylistSchema)
+async def update_playlist_auto_sync(
+    playlist_id: int,
+    settings: PlaylistAutoSync,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_auto_sync(settings)
+    db_playlist = (await db.execute(select(Playlist).filter(
+        Playlist.id == playlist_id,
+        Playlist.owner_id == current_user.id
+    ))).scalar()
+    if db_playlist is None:
+        raise HTTPException(status_code=404, detail="Playlist not found")
+    for name, value in settings.model_dump().items():
+        setattr(db_playlist, name, value)
+    await db.commit()
+    await db.refresh(db_playlist)
+    return db_playlist
+
+@app.get("/sync/jobs/{job_id}")
+async def get_sync_job(
+    job_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    job = (await db.execute(select(SyncHistory).filter(
+        SyncHistory.id == job_id,
+        SyncHistory.user_id == current_user.id
+    ))).scalars().first()
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+
+    return {
+        **SyncHistorySchema.model_validate(job).model_dump(),
+        "result": json.loads(job.result) if job.result else None
+    }
+
+@app.get("/sync/cache/stats")
+async def get_match_cache_stats(current_user: User = Depends(get_current_active_user)):
+    return match_cache.stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    # Formato de texto de Prometheus; sin autenticación para que lo pueda leer el scraper
+    metrics.observe_match_cache(match_cache.stats())
+    metrics.SYNC_JOBS_PENDING.set(sync_jobs.pending())
+    metrics.PASSWORD_HASHES_PENDING.set(password_hasher.pending)
+    metrics.PASSWORD_HASHES_REJECTED.set(password_hasher.stats['rejected'])
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/quota/youtube")
+async def get_youtube_quota(current_user: User = Depends(get_current_active_user)):
+    # Consumo del día y proyección de cuándo se agotaría la cuota al ritmo actual
+    return await run_db(youtube_quota.forecast, current_user.id)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Tuple
+import threading
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import MatchCacheEntry
+
+SPOTIFY_TO_YOUTUBE = 'spotify_to_youtube'
+YOUTUBE_TO_SPOTIFY = 'youtube_to_spotify'
+
+
+def _utc(value: datetime) -> datetime:
+    """UTC sin zona horaria, como datetime.utcnow() (Postgres devuelve fechas con zona)."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class MatchCache:
+    """Cache de resoluciones Spotify↔YouTube: LRU en memoria respaldado por la base de datos.
+
+    Los resultados "no encontrado" también se guardan (cache negativo), con un TTL más corto.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        max_size: int = 10000,
+        ttl: timedelta = timedelta(days=30),
+        negative_ttl: timedelta = timedelta(days=1)
+    ):
+        self.session_factory = session_factory
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Optional[str], datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db_hits = 0
+
+    def get(self, direction: str, key: str) -> Tuple[bool, Optional[str]]:
+        """Devuelve (encontrado, resultado). Un resultado None con encontrado=True es un cache negativo."""
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get((direction, key))
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end((direction, key))
+                    self.hits += 1
+                    return True, entry[0]
+                del self._entries[(direction, key)]
+
+        entry = self._load(direction, key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            self.db_hits += 1
+            self._remember(direction, key, *entry)
+        return True, entry[0]
+
+    def set(self, direction: str, key: str, result: Optional[str]) -> None:
+        """Guarda una resolución (o su ausencia) en memoria y en la base de datos."""
+        expires_at = datetime.utcnow() + (self.ttl if result is not None else self.negative_ttl)
+        with self._lock:
+            self._remember(direction, key, result, expires_at)
+        self._store(direction, key, result, expires_at)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'db_hits': self.db_hits,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries)
+            }
+
+    def _remember(self, direction: str, key: str, result: Optional[str], expires_at: datetime) -> None:
+        self._entries[(direction, key)] = (result, expires_at)
+        self._entries.move_to_end((direction, key))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _load(self, direction: str, key: str, now: datetime) -> Optional[Tuple[Optional[str], datetime]]:
+        if self.session_factory is None:
+            return None
+        db = self.session_factory()
+        try:
+            entry = db.query(MatchCacheEntry).filter(
+                MatchCacheEntry.direction == direction,
+                MatchCacheEntry.cache_key == key
+            ).first()
+            if entry is None or _utc(entry.expires_at) <= now:
+                return None
+            return entry.result, _utc(entry.expires_at)
+        finally:
+            db.close()
+
+    def _store(self, direction: str, key: str, result: Optional[str], expires_at: datetime) -> None:
+        if self.session_factory is None:
+            return
+        db = self.session_factory()
+        try:
+            entry = db.query(MatchCacheEntry).filter(
+                MatchCacheEntry.direction == direction,
+                MatchCacheEntry.cache_key == key
+            ).first()
+            if entry:
+                entry.result = result
+                entry.expires_at = expires_at
+            else:
+                db.add(MatchCacheEntry(
+                    direction=direction,
+                    cache_key=key,
+                    result=result,
+                    expires_at=expires_at
+                ))
+            db.commit()
+        except IntegrityError:
+            # Otro hilo guardó la misma clave al mismo tiempo
+            db.rollback()
+        finally:
+            db.close()
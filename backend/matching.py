@@ -0,0 +1,110 @@
+from collections import defaultdict
+from math import log
+from typing import Dict, FrozenSet, List, NamedTuple, Sequence, Set, Tuple
+
+# Palabras que aparecen en títulos de YouTube/Spotify y no identifican la canción
+NOISE_TOKENS = frozenset({
+    'official', 'video', 'audio', 'music', 'lyric', 'lyrics', 'visualizer', 'videoclip',
+    'clip', 'hd', 'hq', '4k', 'mv', 'vevo', 'ft', 'feat', 'featuring', 'prod', 'x', 'and',
+    'oficial', 'letra', 'con'
+})
+
+
+def tokenize(normalized: str) -> FrozenSet[str]:
+    """Convierte un texto ya normalizado en un conjunto de tokens significativos."""
+    tokens = normalized.split()
+    meaningful = frozenset(token for token in tokens if token not in NOISE_TOKENS)
+    return meaningful or frozenset(tokens)
+
+
+class MatchResult(NamedTuple):
+    # Pares (i, j, score) asignados uno a uno
+    pairs: List[Tuple[int, int, float]]
+    # Índices con al menos un candidato sobre el umbral (aunque sean duplicados)
+    left_matched: Set[int]
+    right_matched: Set[int]
+
+
+class TrackMatcher:
+    """Empareja dos listas de tracks por similitud de tokens usando un índice invertido.
+
+    Cada item sólo se compara contra los candidatos que comparten alguno de sus tokens
+    más raros (prefix filtering): un candidato que no comparte ninguno de esos tokens no
+    puede superar el umbral, así el costo crece con el tamaño de los bloques y no con n·m.
+    El score es un Dice ponderado por IDF, por lo que el orden de las palabras, los
+    "(Official Video)" y los "ft." no afectan el resultado.
+    """
+
+    def __init__(self, threshold: float = 0.7):
+        self.threshold = threshold
+
+    def match(self, left: Sequence[str], right: Sequence[str]) -> MatchResult:
+        """Recibe textos normalizados y empareja los items cuyo score supera el umbral."""
+        return self.match_tokens([tokenize(text) for text in left], [tokenize(text) for text in right])
+
+    def match_tokens(
+        self,
+        left_tokens: Sequence[FrozenSet[str]],
+        right_tokens: Sequence[FrozenSet[str]]
+    ) -> MatchResult:
+        """Igual que match(), con los textos ya convertidos con tokenize()."""
+        # Índice invertido sobre la lista de la derecha
+        index: Dict[str, List[int]] = defaultdict(list)
+        for j, tokens in enumerate(right_tokens):
+            for token in tokens:
+                index[token].append(j)
+
+        # Peso IDF de cada token considerando ambas listas
+        document_frequency: Dict[str, int] = defaultdict(int)
+        for tokens in left_tokens:
+            for token in tokens:
+                document_frequency[token] += 1
+        for token, postings in index.items():
+            document_frequency[token] += len(postings)
+        total = len(left_tokens) + len(right_tokens)
+        weights = {token: log(1 + total / df) for token, df in document_frequency.items()}
+
+        right_weight = [sum(weights[token] for token in tokens) for tokens in right_tokens]
+
+        candidates = []
+        for i, tokens in enumerate(left_tokens):
+            if not tokens:
+                continue
+            left_weight = sum(weights[token] for token in tokens)
+            # Con Dice >= t, el peso en común debe ser al menos t·w/(2-t): alcanza con
+            # buscar candidatos por los tokens más raros hasta cubrir el resto del peso
+            required = self.threshold * left_weight / (2 - self.threshold)
+            remaining = left_weight
+            seen = set()
+            for token in sorted(tokens, key=lambda t: -weights[t]):
+                if remaining < required:
+                    break
+                remaining -= weights[token]
+                if token not in index:
+                    continue
+                for j in index[token]:
+                    if j in seen:
+                        continue
+                    seen.add(j)
+                    common = sum(weights[t] for t in tokens & right_tokens[j])
+                    score = 2 * common / (left_weight + right_weight[j])
+                    if score >= self.threshold:
+                        candidates.append((score, i, j))
+
+        # Asignación voraz uno a uno empezando por los pares más parecidos
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[1], candidate[2]))
+        assigned_left = set()
+        assigned_right = set()
+        pairs = []
+        for score, i, j in candidates:
+            if i in assigned_left or j in assigned_right:
+                continue
+            assigned_left.add(i)
+            assigned_right.add(j)
+            pairs.append((i, j, score))
+        pairs.sort()
+        return MatchResult(
+            pairs,
+            {i for _, i, _ in candidates},
+            {j for _, _, j in candidates}
+        )
@@ -0,0 +1,253 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+import os
+import random
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Métricas del pipeline de sincronización, servidas en formato de texto de Prometheus.
+# Por cada etapa de PlaylistSync (fetch, normalize, diff, search, insert) se registra la
+# duración de cada unidad de trabajo (una página, un diff, un lote de búsquedas o de
+# inserciones) y los items procesados: items/seg = rate(items) / rate(seconds).
+# La latencia de cada llamada a un proveedor se muestrea para que medir no pese en el
+# camino caliente; el contador de llamadas no se muestrea.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() not in ("0", "false", "no")
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "0.1"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Por cada combinación de labels: conteos por bucket (no acumulados), suma y total
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = entry
+            counts[index] += 1
+            total[0] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+PROVIDER_REQUESTS = registry.register(Counter(
+    'youspoty_provider_requests_total',
+    'Llamadas a las APIs de Spotify y YouTube.',
+    ('provider', 'method', 'outcome')
+))
+PROVIDER_LATENCY = registry.register(Histogram(
+    'youspoty_provider_request_seconds',
+    'Latencia de las llamadas a proveedores (muestreada, ver METRICS_SAMPLE_RATE).',
+    ('provider', 'method')
+))
+STAGE_SECONDS = registry.register(Histogram(
+    'youspoty_sync_stage_seconds',
+    'Duración de cada unidad de trabajo de una etapa de sincronización.',
+    ('stage',),
+    buckets=STAGE_BUCKETS
+))
+STAGE_ITEMS = registry.register(Counter(
+    'youspoty_sync_stage_items_total',
+    'Items procesados por etapa de sincronización.',
+    ('stage',)
+))
+STAGE_THROUGHPUT = registry.register(Gauge(
+    'youspoty_sync_stage_items_per_second',
+    'Items por segundo de la última unidad de trabajo de cada etapa.',
+    ('stage',)
+))
+MATCH_CACHE_LOOKUPS = registry.register(Gauge(
+    'youspoty_match_cache_lookups',
+    'Consultas al cache de resoluciones desde el inicio del proceso.',
+    ('result',)
+))
+MATCH_CACHE_HIT_RATIO = registry.register(Gauge(
+    'youspoty_match_cache_hit_ratio',
+    'Proporción de consultas al cache de resoluciones que fueron hits.'
+))
+MATCH_CACHE_SIZE = registry.register(Gauge(
+    'youspoty_match_cache_entries',
+    'Entradas del cache de resoluciones en memoria.'
+))
+SYNC_JOBS_PENDING = registry.register(Gauge(
+    'youspoty_sync_jobs_pending',
+    'Sincronizaciones encoladas esperando un worker.'
+))
+PASSWORD_HASHES_PENDING = registry.register(Gauge(
+    'youspoty_password_hashes_pending',
+    'Hashes de bcrypt (login y alta de usuarios) en curso o esperando un hilo.'
+))
+PASSWORD_HASHES_REJECTED = registry.register(Gauge(
+    'youspoty_password_hashes_rejected',
+    'Pedidos rechazados con 503 por tener demasiados hashes pendientes, desde el inicio del proceso.'
+))
+
+
+@contextmanager
+def provider_call(provider: str, method: str) -> Iterator[None]:
+    """Cuenta una llamada a un proveedor y, si sale sorteada, mide su latencia."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter() if random.random() < METRICS_SAMPLE_RATE else None
+    outcome = 'ok'
+    try:
+        yield
+    except Exception as e:
+        # Un 304 de un request condicional no es un error
+        outcome = 'not_modified' if getattr(getattr(e, 'resp', None), 'status', None) == 304 else 'error'
+        raise
+    finally:
+        PROVIDER_REQUESTS.inc(provider=provider, method=method, outcome=outcome)
+        if start is not None:
+            PROVIDER_LATENCY.observe(time.perf_counter() - start, provider=provider, method=method)
+
+
+def record_stage(stage: str, seconds: float, items: int = 0) -> None:
+    if not METRICS_ENABLED:
+        return
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if items:
+        STAGE_ITEMS.inc(items, stage=stage)
+        if seconds > 0:
+            STAGE_THROUGHPUT.set(items / seconds, stage=stage)
+
+
+class StageTimer:
+    __slots__ = ('items',)
+
+    def __init__(self, items: int = 0):
+        self.items = items
+
+
+@contextmanager
+def timed_stage(stage: str, items: int = 0) -> Iterator[StageTimer]:
+    """Mide una unidad de trabajo de una etapa; la cantidad de items se puede fijar adentro."""
+    timer = StageTimer(items)
+    start = time.perf_counter()
+    try:
+        yield timer
+    finally:
+        record_stage(stage, time.perf_counter() - start, timer.items)
+
+
+def observe_match_cache(stats: Dict[str, float]) -> None:
+    MATCH_CACHE_LOOKUPS.set(stats['hits'], result='hit')
+    MATCH_CACHE_LOOKUPS.set(stats['misses'], result='miss')
+    MATCH_CACHE_LOOKUPS.set(stats['db_hits'], result='db_hit')
+    MATCH_CACHE_HIT_RATIO.set(stats['hit_rate'])
+    MATCH_CACHE_SIZE.set(stats['size'])
+
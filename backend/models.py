@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Table, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -75,6 +75,11 @@ class Playlist(Base):
     spotify_playlist_id = Column(String, nullable=True)
     youtube_playlist_id = Column(String, nullable=True)
     last_synced_at = Column(DateTime(timezone=True))
+    # Sincronización automática: cada cuántos minutos (None = intervalo por defecto del
+    # servidor), en qué dirección y con qué prioridad frente a las demás playlists
+    auto_sync_interval = Column(Integer, nullable=True)
+    auto_sync_direction = Column(String, nullable=True)  # 'spotify_to_youtube' or 'youtube_to_spotify'
+    auto_sync_priority = Column(Integer, default=0)
     is_public = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -84,15 +89,65 @@ class Playlist(Base):
     shared_with = relationship("User", secondary=playlist_sharing, back_populates="shared_playlists")
     sync_history = relationship("SyncHistory", back_populates="playlist")
 
+class PlaylistSnapshot(Base):
+    __tablename__ = "playlist_snapshots"
+    __table_args__ = (UniqueConstraint('provider', 'playlist_id'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String)  # 'spotify' or 'youtube'
+    playlist_id = Column(String, index=True)
+    version = Column(String)  # snapshot_id de Spotify, o pageToken y ETag de cada página de YouTube (JSON)
+    items = Column(Text)  # Tracks ya normalizados, serializados en JSON
+    item_count = Column(Integer, default=0)
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class SyncHistory(Base):
     __tablename__ = "sync_history"
 
     id = Column(Integer, primary_key=True, index=True)
-    playlist_id = Column(Integer, ForeignKey("playlists.id"))
+    playlist_id = Column(Integer, ForeignKey("playlists.id"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    spotify_playlist_id = Column(String, nullable=True)
+    youtube_playlist_id = Column(String, nullable=True)
     sync_type = Column(String)  # 'spotify_to_youtube' or 'youtube_to_spotify'
-    status = Column(String)  # 'success' or 'failed'
+    status = Column(String)  # 'queued', 'running', 'success' or 'failed'
+    worker_id = Column(String, nullable=True)  # Proceso que ejecuta el job (host:pid)
     error_message = Column(String, nullable=True)
+    # Progreso del job de sincronización
+    total_items = Column(Integer, default=0)
+    processed_items = Column(Integer, default=0)
+    synced_items = Column(Integer, default=0)
+    failed_items = Column(Integer, default=0)
+    result = Column(Text, nullable=True)  # Resultado final serializado en JSON
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relaciones
     playlist = relationship("Playlist", back_populates="sync_history")
+
+
+class MatchCacheEntry(Base):
+    __tablename__ = "match_cache"
+    __table_args__ = (UniqueConstraint('direction', 'cache_key'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    direction = Column(String)  # 'spotify_to_youtube' or 'youtube_to_spotify'
+    cache_key = Column(String, index=True)  # título y artista normalizados
+    result = Column(String, nullable=True)  # URI de Spotify o videoId de YouTube; None = no encontrado
+    expires_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class QuotaUsage(Base):
+    __tablename__ = "quota_usage"
+    __table_args__ = (UniqueConstraint('day', 'project', 'user_id', 'method'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(String, index=True)  # Día de cuota (YYYY-MM-DD, hora del Pacífico para YouTube)
+    project = Column(String)  # Proyecto de Google Cloud al que se carga la cuota
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    method = Column(String)  # p. ej. 'search.list' o 'playlistItems.insert'
+    calls = Column(Integer, default=0)
+    units = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
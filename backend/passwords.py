@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, Tuple, TypeVar
+import asyncio
+
+from passlib.context import CryptContext
+
+T = TypeVar("T")
+
+
+class PasswordPoolFull(Exception):
+    """Hay demasiados hashes pendientes: el pedido se rechaza en lugar de encolarse."""
+
+
+def make_password_context(rounds: int) -> CryptContext:
+    """Contexto de bcrypt con costo `rounds`.
+
+    El costo es a la vez el mínimo y el máximo aceptado, así los hashes con otro costo
+    (más viejos o de otra configuración) necesitan actualizarse y se rehashean al hacer login.
+    """
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds
+    )
+
+
+class PasswordHasher:
+    """bcrypt fuera del event loop, en un pool de hilos propio y acotado.
+
+    bcrypt libera el GIL mientras calcula, así que `workers` hilos usan hasta `workers`
+    núcleos. Cada hash tarda cientos de milisegundos de CPU: si ya hay `max_pending`
+    pendientes (en curso o esperando un hilo), el pedido falla enseguida con
+    PasswordPoolFull en lugar de esperar detrás de todos los demás.
+    """
+
+    def __init__(self, context: CryptContext, workers: int, max_pending: int):
+        self.context = context
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.stats = {'hashes': 0, 'verifies': 0, 'rehashes': 0, 'rejected': 0}
+        # Sólo se modifica desde el event loop
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        if self._pending >= self.max_pending:
+            self.stats['rejected'] += 1
+            raise PasswordPoolFull(f"{self._pending} password hashes pending")
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, partial(func, *args))
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        self.stats['hashes'] += 1
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """(es válida, hash nuevo): el hash nuevo sólo si la contraseña es válida y el
+        hash guardado no tiene el costo configurado."""
+        self.stats['verifies'] += 1
+        valid, new_hash = await self._run(self.context.verify_and_update, password, hashed_password)
+        if new_hash is not None:
+            self.stats['rehashes'] += 1
+        return valid, new_hash
@@ -1,56 +1,89 @@
-from typing import List, Dict, Tuple, Optional
-from difflib import SequenceMatcher
-import re
-from unidecode import unidecode
+from typing import List, Dict, Tuple, Optional, Callable, Iterator, Set, Union
+from collections import defaultdict
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
+import json
+import queue
+import threading
+import time
 import spotipy
+import google_auth_httplib2
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
 
+from rate_limit import RateLimiter
+from match_cache import MatchCache, SPOTIFY_TO_YOUTUBE, YOUTUBE_TO_SPOTIFY
+from matching import TrackMatcher, tokenize
+from similarity import batch_similarity
+from text_processing import normalize_text, extract_metadata
+from jobs import ProgressCallback
+import metrics
+from clients import shared_http, spotify_retry_after, youtube_retry_after, youtube_quota_exceeded
+from snapshots import SnapshotStore, SPOTIFY, YOUTUBE
+from tracks import TrackRecord
+from quota import QuotaLedger, QuotaExceeded, plan_by_cost
+
+DEFAULT_SEARCH_WORKERS = 8
+SPOTIFY_MAX_ITEMS_PER_REQUEST = 100  # Límite de URIs por llamada a playlist_add_items
+PAGE_BUFFER_SIZE = 4  # Páginas descargadas que pueden esperar a ser comparadas
+BULK_PLAYLIST_WORKERS = 4  # Playlists que se comparan (o se escriben) a la vez en una sincronización masiva
+
+_END_OF_PAGES = object()
+# Error de búsqueda de un track que quedó postergado por falta de cuota
+DEFERRED = 'Deferred: YouTube quota budget exhausted'
+
 class PlaylistSync:
-    def __init__(self, spotify_client: spotipy.Spotify, youtube_client: build):
+    def __init__(
+        self,
+        spotify_client: spotipy.Spotify,
+        youtube_client: build,
+        max_workers: int = DEFAULT_SEARCH_WORKERS,
+        spotify_rate: Optional[float] = None,
+        youtube_rate: Optional[float] = None,
+        cache: Optional[MatchCache] = None,
+        match_threshold: float = 0.7,
+        snapshots: Optional[SnapshotStore] = None,
+        quota: Optional[QuotaLedger] = None,
+        user_id: Optional[int] = None
+    ):
         self.spotify = spotify_client
         self.youtube = youtube_client
+        # Cantidad máxima de búsquedas simultáneas y presupuesto por proveedor (llamadas/seg)
+        self.max_workers = max(1, max_workers)
+        # Los limitadores son compartidos por nombre entre todas las sincronizaciones
+        self.spotify_limiter = RateLimiter(spotify_rate, name=SPOTIFY, retry_after=spotify_retry_after)
+        self.youtube_limiter = RateLimiter(youtube_rate, name=YOUTUBE, retry_after=youtube_retry_after)
+        # Cache de resoluciones compartido entre usuarios y sincronizaciones
+        self.cache = cache
+        # Umbral de similitud para considerar que dos tracks son la misma canción
+        self.matcher = TrackMatcher(threshold=match_threshold)
+        # Última versión leída de cada playlist, para no volver a descargarla si no cambió
+        self.snapshots = snapshots
+        # Registro de cuota de YouTube; las unidades se cargan al proyecto y a user_id
+        self.quota = quota
+        self.user_id = user_id
+        self._local = threading.local()
 
     @staticmethod
     def normalize_text(text: str) -> str:
         """Normaliza el texto para comparación."""
-        # Convertir a minúsculas
-        text = text.lower()
-        # Remover acentos
-        text = unidecode(text)
-        # Remover caracteres especiales y espacios extra
-        text = re.sub(r'[^\w\s]', '', text)
-        # Remover espacios extra
-        text = ' '.join(text.split())
-        return text
+        return normalize_text(text)
 
     @staticmethod
     def similarity_score(a: str, b: str) -> float:
         """Calcula un score de similitud entre dos strings."""
-        a = PlaylistSync.normalize_text(a)
-        b = PlaylistSync.normalize_text(b)
-        return SequenceMatcher(None, a, b).ratio()
+        return float(batch_similarity(a, [b])[0])
+
+    @staticmethod
+    def cache_key(title: str, artist: str = '') -> str:
+        """Clave normalizada de (título, artista) para el cache de resoluciones."""
+        return f"{normalize_text(title)}|{normalize_text(artist)}"
 
     @staticmethod
     def extract_metadata(title: str) -> Dict[str, str]:
         """Extrae metadatos de un título de canción o video."""
-        # Patrones comunes en títulos
-        patterns = [
-            r'(?P<title>.*?)\s*-\s*(?P<artist>.*?)(?:\s*\(.*\))?$',  # "Título - Artista"
-            r'(?P<artist>.*?)\s*-\s*(?P<title>.*?)(?:\s*\(.*\))?$',  # "Artista - Título"
-            r'(?P<title>.*?)\s*by\s*(?P<artist>.*?)(?:\s*\(.*\))?$',  # "Título by Artista"
-        ]
-        
-        for pattern in patterns:
-            match = re.match(pattern, title, re.IGNORECASE)
-            if match:
-                return {
-                    'title': match.group('title').strip(),
-                    'artist': match.group('artist').strip()
-                }
-        
-        # Si no coincide con ningún patrón, asumimos que todo es el título
-        return {'title': title.strip(), 'artist': ''}
+        return extract_metadata(title)
 
     def search_spotify_track(self, title: str, artist: str = '') -> Optional[str]:
         """Busca un track en Spotify usando título y artista."""
@@ -58,207 +91,885 @@ class PlaylistSync:
         if artist:
             query += f" artist:{artist}"
         
-        results = self.spotify.search(q=query, type='track', limit=5)
+        results = self._call_spotify('search', q=query, type='track', limit=5)
         if not results['tracks']['items']:
             return None
         
-        # Calcular similitud para cada resultado
-        best_match = None
-        best_score = 0.7  # Umbral mínimo de similitud
-        
-        for track in results['tracks']['items']:
-            track_title = track['name']
-            track_artist = track['artists'][0]['name']
-            
-            title_score = self.similarity_score(title, track_title)
-            artist_score = self.similarity_score(artist, track_artist) if artist else 1.0
-            
-            # Ponderar más el título que el artista
-            total_score = (title_score * 0.7) + (artist_score * 0.3)
-            
-            if total_score > best_score:
-                best_score = total_score
-                best_match = track['uri']
-        
-        return best_match
+        # Calcular similitud para todos los resultados de una vez
+        tracks = results['tracks']['items']
+        title_scores = batch_similarity(title, [track['name'] for track in tracks])
+        if artist:
+            artist_scores = batch_similarity(artist, [track['artists'][0]['name'] for track in tracks])
+        else:
+            artist_scores = 1.0
+
+        # Ponderar más el título que el artista
+        total_scores = (title_scores * 0.7) + (artist_scores * 0.3)
+
+        best = int(total_scores.argmax())
+        if total_scores[best] <= 0.7:  # Umbral mínimo de similitud
+            return None
+        return tracks[best]['uri']
 
     def search_youtube_video(self, title: str, artist: str = '') -> Optional[str]:
         """Busca un video en YouTube usando título y artista."""
         query = f"{title} {artist} official audio" if artist else f"{title} official audio"
         
-        results = self.youtube.search().list(
+        results = self._execute_youtube(self.youtube.search().list(
             q=query,
             part='snippet',
             type='video',
             videoCategoryId='10',  # Música
             maxResults=5
-        ).execute()
+        ), 'search.list', deferrable=True)
         
         if not results['items']:
             return None
         
-        # Calcular similitud para cada resultado
-        best_match = None
-        best_score = 0.7  # Umbral mínimo de similitud
-        
-        for item in results['items']:
-            video_title = item['snippet']['title']
-            title_score = self.similarity_score(title, video_title)
-            
-            if title_score > best_score:
-                best_score = title_score
-                best_match = item['id']['videoId']
-        
-        return best_match
+        # Calcular similitud para todos los resultados de una vez
+        title_scores = batch_similarity(title, [item['snippet']['title'] for item in results['items']])
 
-    def compare_playlists(
+        best = int(title_scores.argmax())
+        if title_scores[best] <= 0.7:  # Umbral mínimo de similitud
+            return None
+        return results['items'][best]['id']['videoId']
+
+    def _youtube_http(self):
+        """Devuelve un transporte HTTP propio del hilo actual (httplib2 no es thread-safe)."""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            credentials = getattr(getattr(self.youtube, '_http', None), 'credentials', None)
+            if credentials is None:
+                return None
+            http = google_auth_httplib2.AuthorizedHttp(credentials, http=shared_http)
+            self._local.http = http
+        return http
+
+    def _execute_youtube(self, request, method: str, deferrable: bool = False):
+        """Ejecuta un request de la API de YouTube con el transporte del hilo actual.
+
+        Con un registro de cuota, las llamadas postergables reservan su costo antes de
+        ejecutarse (QuotaExceeded si no alcanza); el resto sólo se registra. Si el request
+        falla sin una respuesta de YouTube (red, credenciales), se devuelve lo cargado:
+        YouTube cobra cualquier request que recibe, aunque responda con error.
+        """
+        if self.quota is not None:
+            if not deferrable:
+                self.quota.charge(method, self.user_id)
+            elif not self.quota.reserve(method, self.user_id):
+                raise QuotaExceeded(f"YouTube quota budget exhausted for {method}")
+        http = self._youtube_http()
+        try:
+            with metrics.provider_call(YOUTUBE, method):
+                if http is None:
+                    return request.execute()
+                return request.execute(http=http)
+        except HttpError as e:
+            if youtube_quota_exceeded(e):
+                raise QuotaExceeded(f"YouTube quota exceeded for {method}") from e
+            raise
+        except Exception:
+            if self.quota is not None:
+                self.quota.refund(method, self.user_id)
+            raise
+
+    def _call_spotify(self, method: str, *args, **kwargs):
+        """Llama a un método del cliente de Spotify registrando la llamada en las métricas."""
+        with metrics.provider_call(SPOTIFY, method):
+            return getattr(self.spotify, method)(*args, **kwargs)
+
+    def _search_many(
+        self,
+        search: Callable[[str, str], Optional[str]],
+        items: List[TrackRecord],
+        limiter: RateLimiter,
+        direction: str,
+        cached: Optional[List[Tuple[bool, Optional[str]]]] = None
+    ) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Ejecuta búsquedas en paralelo y devuelve (resultado, error) en el orden de entrada.
+
+        Antes de llamar al proveedor se consulta el cache de resoluciones, salvo que ya se
+        pasen las consultas hechas en `cached`. Si no queda cuota, el error es DEFERRED.
+        """
+        def run(item: TrackRecord, lookup: Optional[Tuple[bool, Optional[str]]]) -> Tuple[Optional[str], Optional[str]]:
+            key = self.cache_key(item.title, item.artist)
+            if lookup is None and self.cache is not None:
+                lookup = self.cache.get(direction, key)
+            if lookup is not None and lookup[0]:
+                return lookup[1], None
+            try:
+                result = limiter.call(search, item.title, item.artist)
+            except QuotaExceeded:
+                return None, DEFERRED
+            except Exception as e:
+                # Los errores no se cachean: pueden ser transitorios
+                return None, str(e)
+            if self.cache is not None:
+                self.cache.set(direction, key, result)
+            return result, None
+
+        lookups = cached if cached is not None else [None] * len(items)
+        with metrics.timed_stage('search', items=len(items)):
+            if self.max_workers == 1 or len(items) <= 1:
+                return [run(item, lookup) for item, lookup in zip(items, lookups)]
+
+            # map conserva el orden, así el reporte de fallidos es determinístico
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+                return list(pool.map(run, items, lookups))
+
+    def _cached_results(self, items: List[TrackRecord], direction: str) -> List[Tuple[bool, Optional[str]]]:
+        """Consulta el cache de resoluciones para cada item: (encontrado, resultado)."""
+        if self.cache is None:
+            return [(False, None)] * len(items)
+        return [self.cache.get(direction, self.cache_key(item.title, item.artist)) for item in items]
+
+    def _youtube_sync_cost(self, found: bool, video_id: Optional[str], targets: List[Set[str]]) -> int:
+        """Cuota estimada para agregar un track a las playlists de YouTube `targets` (los
+        videoIds de cada una) según lo que ya sabe el cache.
+        """
+        insert = self.quota.cost('playlistItems.insert')
+        if found:
+            # Resuelto: sólo las inserciones en las playlists que no tienen el video.
+            # "No encontrado": no se llama a la API
+            return insert * sum(1 for existing in targets if video_id not in existing) if video_id else 0
+        return self.quota.cost('search.list') + insert * len(targets)
+
+    def _add_spotify_items(
         self,
         spotify_playlist_id: str,
-        youtube_playlist_id: str
-    ) -> Tuple[List[Dict], List[Dict]]:
-        """Compara dos playlists y encuentra las diferencias con metadatos."""
-        # Obtener tracks de Spotify
-        spotify_tracks = []
-        results = self.spotify.playlist_tracks(spotify_playlist_id)
+        pending: List[Tuple[int, TrackRecord, str]],
+        chunk_size: int = SPOTIFY_MAX_ITEMS_PER_REQUEST
+    ) -> List[Tuple[int, TrackRecord, Optional[str]]]:
+        """Agrega tracks a Spotify en lotes y devuelve (índice, video, error) por cada uno.
+
+        Si un lote falla con 400 (algún item inválido) se reintenta dividiéndolo a la mitad,
+        hasta aislar el track que falla. Cualquier otro error es del lote entero: se marcan
+        todos sus tracks como fallidos y, si la playlist no se puede escribir (401, 403,
+        404), también los de los lotes que quedaban, sin llamar a la API.
+        """
+        results = []
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        while chunks:
+            chunk = chunks.pop(0)
+            try:
+                with metrics.timed_stage('insert', items=len(chunk)):
+                    self.spotify_limiter.call(
+                        self._call_spotify, 'playlist_add_items', spotify_playlist_id, [uri for _, _, uri in chunk]
+                    )
+                results.extend((index, video, None) for index, video, _ in chunk)
+            except Exception as e:
+                status = e.http_status if isinstance(e, spotipy.SpotifyException) else None
+                if status == 400 and len(chunk) > 1:
+                    middle = len(chunk) // 2
+                    chunks[:0] = [chunk[:middle], chunk[middle:]]
+                    continue
+                failed = [chunk]
+                if status in (401, 403, 404):
+                    failed += chunks
+                    chunks = []
+                results.extend((index, video, str(e)) for group in failed for index, video, _ in group)
+        return results
+
+    @staticmethod
+    def _spotify_record(track: Dict) -> TrackRecord:
+        return TrackRecord(track['id'], track['name'], track['artists'][0]['name'], uri=track.get('uri'))
+
+    @staticmethod
+    def _youtube_record(item: Dict) -> TrackRecord:
+        metadata = extract_metadata(item['snippet']['title'])
+        video_id = item['snippet'].get('resourceId', {}).get('videoId')
+        return TrackRecord(item['id'], metadata['title'], metadata['artist'], uri=video_id)
+
+    def _youtube_items_request(self, youtube_playlist_id: str, page_token: Optional[str] = None):
+        params = {'playlistId': youtube_playlist_id, 'part': 'snippet', 'maxResults': 50}
+        if page_token:
+            params['pageToken'] = page_token
+        return self.youtube.playlistItems().list(**params)
+
+    def iter_spotify_pages(self, spotify_playlist_id: str) -> Iterator[List[TrackRecord]]:
+        """Genera los tracks de una playlist de Spotify página por página, a medida que llegan."""
+        with metrics.timed_stage('fetch') as stage:
+            results = self.spotify_limiter.call(self._call_spotify, 'playlist_tracks', spotify_playlist_id)
+            stage.items = len(results['items'])
         while results:
-            for item in results['items']:
-                track = item['track']
-                if track:  # Ignorar tracks nulos
-                    spotify_tracks.append({
-                        'id': track['id'],
-                        'title': track['name'],
-                        'artist': track['artists'][0]['name'],
-                        'normalized': self.normalize_text(f"{track['name']} {track['artists'][0]['name']}")
-                    })
-            if results['next']:
-                results = self.spotify.next(results)
-            else:
+            with metrics.timed_stage('normalize') as stage:
+                # Ignorar tracks nulos
+                page = [self._spotify_record(item['track']) for item in results['items'] if item['track']]
+                stage.items = len(page)
+            yield page
+            if not results['next']:
                 break
+            with metrics.timed_stage('fetch') as stage:
+                results = self.spotify_limiter.call(self._call_spotify, 'next', results)
+                stage.items = len(results['items']) if results else 0
 
-        # Obtener videos de YouTube
-        youtube_videos = []
-        results = self.youtube.playlistItems().list(
-            playlistId=youtube_playlist_id,
-            part='snippet',
-            maxResults=50
-        ).execute()
-        
+    def iter_youtube_pages(
+        self,
+        youtube_playlist_id: str,
+        first_page: Optional[Dict] = None,
+        page_etags: Optional[List[Tuple[Optional[str], Optional[str]]]] = None
+    ) -> Iterator[List[TrackRecord]]:
+        """Genera los videos de una playlist de YouTube página por página, a medida que llegan.
+
+        Si se pasa `page_etags`, se le agrega (pageToken, ETag) de cada página leída.
+        """
+        results = first_page
+        page_token = None
+        if results is None:
+            with metrics.timed_stage('fetch') as stage:
+                results = self.youtube_limiter.call(
+                    self._execute_youtube, self._youtube_items_request(youtube_playlist_id), 'playlistItems.list'
+                )
+                stage.items = len(results['items'])
         while results:
-            for item in results['items']:
-                video = item['snippet']
-                metadata = self.extract_metadata(video['title'])
-                youtube_videos.append({
-                    'id': item['id'],
-                    'title': metadata['title'],
-                    'artist': metadata['artist'],
-                    'normalized': self.normalize_text(f"{metadata['title']} {metadata['artist']}")
-                })
-            
-            if 'nextPageToken' in results:
-                results = self.youtube.playlistItems().list(
-                    playlistId=youtube_playlist_id,
-                    part='snippet',
-                    maxResults=50,
-                    pageToken=results['nextPageToken']
-                ).execute()
-            else:
+            if page_etags is not None:
+                page_etags.append((page_token, results.get('etag')))
+            with metrics.timed_stage('normalize', items=len(results['items'])):
+                page = [self._youtube_record(item) for item in results['items']]
+            yield page
+            if 'nextPageToken' not in results:
                 break
+            page_token = results['nextPageToken']
+            with metrics.timed_stage('fetch') as stage:
+                results = self.youtube_limiter.call(
+                    self._execute_youtube,
+                    self._youtube_items_request(youtube_playlist_id, page_token),
+                    'playlistItems.list'
+                )
+                stage.items = len(results['items'])
+
+    def _open_spotify(self, spotify_playlist_id: str) -> Tuple[Optional[str], bool, Iterator[List[TrackRecord]]]:
+        """Devuelve (snapshot_id, si no cambió, páginas); si no cambió se usa la copia guardada."""
+        if self.snapshots is None:
+            return None, False, self.iter_spotify_pages(spotify_playlist_id)
+
+        snapshot_id = self.spotify_limiter.call(
+            self._call_spotify, 'playlist', spotify_playlist_id, fields='snapshot_id'
+        )['snapshot_id']
+        stored = self.snapshots.get(SPOTIFY, spotify_playlist_id)
+        if stored and stored[0] == snapshot_id:
+            return snapshot_id, True, iter([[TrackRecord.from_dict(item) for item in stored[1]]])
+        pages = self._store_pages(
+            SPOTIFY, spotify_playlist_id, lambda: snapshot_id, self.iter_spotify_pages(spotify_playlist_id)
+        )
+        return snapshot_id, False, pages
+
+    def _open_youtube(self, youtube_playlist_id: str) -> Tuple[Optional[str], bool, Iterator[List[TrackRecord]]]:
+        """Devuelve (ETag de la primera página, si no cambió, páginas); si no cambió se usa
+        la copia guardada.
+
+        La versión guardada tiene el pageToken y el ETag de cada página. La primera se pide
+        con If-None-Match: si cambió (altas, bajas o cambios en ella, que también cambian el
+        total de items) ya sirve como primera página. Si devolvió 304, se revalidan las demás
+        páginas, porque un cambio de orden o un reemplazo más adelante no toca la primera.
+        """
+        stored = stored_pages = None
+        request = self._youtube_items_request(youtube_playlist_id)
+        if self.snapshots is not None:
+            stored = self.snapshots.get(YOUTUBE, youtube_playlist_id)
+            stored_pages = _youtube_page_etags(stored[0]) if stored else None
+            if stored_pages:
+                request.headers['If-None-Match'] = stored_pages[0][1]
+        first_page = None
+        try:
+            with metrics.timed_stage('fetch') as stage:
+                first_page = self.youtube_limiter.call(self._execute_youtube, request, 'playlistItems.list')
+                stage.items = len(first_page['items'])
+        except HttpError as e:
+            if not (stored_pages and e.resp.status == 304):
+                raise
+            if self._youtube_pages_unchanged(youtube_playlist_id, stored_pages[1:]):
+                return stored_pages[0][1], True, iter([[TrackRecord.from_dict(item) for item in stored[1]]])
+            # Cambió una página posterior: se lee todo de nuevo desde la primera
+            with metrics.timed_stage('fetch') as stage:
+                first_page = self.youtube_limiter.call(
+                    self._execute_youtube, self._youtube_items_request(youtube_playlist_id), 'playlistItems.list'
+                )
+                stage.items = len(first_page['items'])
+
+        page_etags = []
+        pages = self.iter_youtube_pages(youtube_playlist_id, first_page, page_etags)
+        if self.snapshots is not None:
+            pages = self._store_pages(YOUTUBE, youtube_playlist_id, lambda: _youtube_version(page_etags), pages)
+        return first_page.get('etag'), False, pages
+
+    def _youtube_pages_unchanged(self, youtube_playlist_id: str, pages: List[Tuple[Optional[str], str]]) -> bool:
+        """Pide cada página con If-None-Match: True si todas devuelven 304."""
+        for page_token, etag in pages:
+            request = self._youtube_items_request(youtube_playlist_id, page_token)
+            request.headers['If-None-Match'] = etag
+            try:
+                self.youtube_limiter.call(self._execute_youtube, request, 'playlistItems.list')
+            except HttpError as e:
+                if e.resp.status == 304:
+                    continue
+                raise
+            return False
+        return True
+
+    def has_changed(self, spotify_playlist_id: str, youtube_playlist_id: str) -> bool:
+        """Si alguna de las dos playlists cambió desde su último snapshot guardado.
+
+        Cuesta una llamada a Spotify (snapshot_id) y un request condicional por página de
+        YouTube, que corta en la primera que cambió; sin snapshots guardados se considera
+        que cambió.
+        """
+        if self.snapshots is None:
+            return True
+        snapshot_id = self.snapshots.version(SPOTIFY, spotify_playlist_id)
+        youtube_pages = _youtube_page_etags(self.snapshots.version(YOUTUBE, youtube_playlist_id))
+        if not snapshot_id or not youtube_pages:
+            return True
+        current = self.spotify_limiter.call(
+            self._call_spotify, 'playlist', spotify_playlist_id, fields='snapshot_id'
+        )['snapshot_id']
+        if current != snapshot_id:
+            return True
+        return not self._youtube_pages_unchanged(youtube_playlist_id, youtube_pages)
+
+    def _store_pages(
+        self,
+        provider: str,
+        playlist_id: str,
+        version: Callable[[], Optional[str]],
+        pages: Iterator[List[TrackRecord]]
+    ) -> Iterator[List[TrackRecord]]:
+        """Deja pasar las páginas y, al terminar, guarda la playlist completa como snapshot.
+
+        `version` se llama al final: la de YouTube depende de todas las páginas leídas.
+        """
+        items = []
+        for page in pages:
+            items.extend(page)
+            yield page
+        self.snapshots.put(provider, playlist_id, version(), [item.to_dict() for item in items])
+
+    @staticmethod
+    def _index_pages(pages: Iterator[List[TrackRecord]], refs: Set[str]) -> Iterator[List[TrackRecord]]:
+        """Deja pasar las páginas anotando en `refs` la URI o el videoId de cada item."""
+        for page in pages:
+            refs.update(record.uri for record in page if record.uri)
+            yield page
+
+    def _open_both(self, spotify_playlist_id: str, youtube_playlist_id: str) -> Tuple[Tuple, Tuple]:
+        """Abre las dos playlists en paralelo (la primera página de cada una)."""
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            youtube = pool.submit(self._open_youtube, youtube_playlist_id)
+            spotify = self._open_spotify(spotify_playlist_id)
+            return spotify, youtube.result()
+
+    @staticmethod
+    def _interleave_pages(
+        sources: Dict[str, Iterator[List[TrackRecord]]],
+        buffer_pages: int = PAGE_BUFFER_SIZE
+    ) -> Iterator[Tuple[str, List[TrackRecord]]]:
+        """Descarga varias fuentes de páginas en paralelo y las entrega a medida que llegan.
+
+        Cada fuente corre en su propio hilo; la cola acotada frena a los productores si el
+        consumidor va más lento, así no se acumulan páginas sin procesar.
+        """
+        pages: "queue.Queue[Tuple[str, object]]" = queue.Queue(maxsize=buffer_pages)
+        stop = threading.Event()
+
+        def put(item: Tuple[str, object]) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce(name: str, source: Iterator[List[TrackRecord]]) -> None:
+            try:
+                for page in source:
+                    if not put((name, page)):
+                        return  # El consumidor dejó de leer
+            except Exception as e:
+                put((name, e))
+                return
+            put((name, _END_OF_PAGES))
+
+        for name, source in sources.items():
+            threading.Thread(target=produce, args=(name, source), name=f"pages-{name}", daemon=True).start()
+
+        remaining = len(sources)
+        try:
+            while remaining:
+                name, page = pages.get()
+                if page is _END_OF_PAGES:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield name, page
+        finally:
+            stop.set()
+
+    def _diff_pages(
+        self,
+        spotify_pages: Iterator[List[TrackRecord]],
+        youtube_pages: Iterator[List[TrackRecord]]
+    ) -> Iterator[Tuple[str, Union[TrackRecord, Dict]]]:
+        """Compara las páginas a medida que llegan; genera ('matched', par),
+        ('missing_in_youtube', track) y ('missing_in_spotify', video)."""
+        # Se guardan todos los registros: los faltantes recién se conocen al terminar la descarga
+        records = {SPOTIFY: [], YOUTUBE: []}
+        keys = {SPOTIFY: [], YOUTUBE: []}
+        # Índices todavía sin pareja, por conjunto de tokens
+        unpaired = {SPOTIFY: defaultdict(list), YOUTUBE: defaultdict(list)}
+        paired = {SPOTIFY: set(), YOUTUBE: set()}
+
+        # Tiempo de cómputo del diff, sin contar la espera de las páginas
+        busy = 0.0
+
+        # Primera pasada, incremental: mismos tokens de ambos lados es un match seguro
+        sources = {SPOTIFY: spotify_pages, YOUTUBE: youtube_pages}
+        for side, page in self._interleave_pages(sources):
+            started = time.perf_counter()
+            other = YOUTUBE if side == SPOTIFY else SPOTIFY
+            for record in page:
+                index = len(records[side])
+                key = tokenize(record.normalized)
+                records[side].append(record)
+                keys[side].append(key)
+                candidates = unpaired[other].get(key)
+                if not candidates:
+                    unpaired[side][key].append(index)
+                    continue
+                match = candidates.pop(0)
+                paired[side].add(index)
+                paired[other].add(match)
+                pair = {side: record, other: records[other][match]}
+                yield 'matched', {'spotify': pair[SPOTIFY], 'youtube': pair[YOUTUBE], 'score': 1.0}
+            busy += time.perf_counter() - started
+
+        started = time.perf_counter()
+        spotify_tracks, youtube_videos = records[SPOTIFY], records[YOUTUBE]
+        spotify_keys, youtube_keys = keys[SPOTIFY], keys[YOUTUBE]
+        del unpaired  # Ya no hace falta durante la segunda pasada
 
-        # Encontrar diferencias
-        missing_in_spotify = []
-        missing_in_youtube = []
+        # Segunda pasada: el resto se compara por similitud. Un track falta del otro lado
+        # sólo si no tiene ningún candidato sobre el umbral (aunque ya esté emparejado)
+        youtube_key_set, spotify_key_set = set(youtube_keys), set(spotify_keys)
+        rest_spotify = [i for i, key in enumerate(spotify_keys) if key not in youtube_key_set]
+        rest_youtube = [j for j, key in enumerate(youtube_keys) if key not in spotify_key_set]
 
-        # Crear conjuntos de tracks normalizados para comparación rápida
-        spotify_set = {track['normalized'] for track in spotify_tracks}
-        youtube_set = {video['normalized'] for video in youtube_videos}
+        spotify_found = set()
+        if rest_spotify:
+            result = self.matcher.match_tokens([spotify_keys[i] for i in rest_spotify], youtube_keys)
+            spotify_found = {rest_spotify[i] for i in result.left_matched}
+            for i, j, score in result.pairs:
+                i = rest_spotify[i]
+                if j not in paired[YOUTUBE]:
+                    paired[YOUTUBE].add(j)
+                    yield 'matched', {
+                        'spotify': spotify_tracks[i],
+                        'youtube': youtube_videos[j],
+                        'score': round(score, 3)
+                    }
 
-        # Encontrar tracks que faltan en YouTube
-        for track in spotify_tracks:
-            if track['normalized'] not in youtube_set:
-                missing_in_youtube.append(track)
+        youtube_found = set()
+        if rest_youtube:
+            result = self.matcher.match_tokens(spotify_keys, [youtube_keys[j] for j in rest_youtube])
+            youtube_found = {rest_youtube[j] for j in result.right_matched}
 
-        # Encontrar videos que faltan en Spotify
-        for video in youtube_videos:
-            if video['normalized'] not in spotify_set:
-                missing_in_spotify.append(video)
+        metrics.record_stage('diff', busy + time.perf_counter() - started, len(spotify_tracks) + len(youtube_videos))
+        for i in rest_spotify:
+            if i not in spotify_found:
+                yield 'missing_in_youtube', spotify_tracks[i]
+        for j in rest_youtube:
+            if j not in youtube_found:
+                yield 'missing_in_spotify', youtube_videos[j]
 
+    def match_playlists(
+        self,
+        spotify_playlist_id: str,
+        youtube_playlist_id: str,
+        index: Optional[Dict[str, Set[str]]] = None
+    ) -> Tuple[List[TrackRecord], List[TrackRecord], List[Dict]]:
+        """Compara dos playlists y devuelve los faltantes de cada lado y los pares encontrados.
+
+        Si se pasa `index`, se completa durante la descarga con las URIs de Spotify y los
+        videoIds de YouTube que ya están en cada playlist (claves SPOTIFY y YOUTUBE).
+        """
+        spotify, youtube = self._open_both(spotify_playlist_id, youtube_playlist_id)
+        snapshot_id, spotify_unchanged, spotify_pages = spotify
+        etag, youtube_unchanged, youtube_pages = youtube
+        if index is not None:
+            spotify_pages = self._index_pages(spotify_pages, index.setdefault(SPOTIFY, set()))
+            youtube_pages = self._index_pages(youtube_pages, index.setdefault(YOUTUBE, set()))
+
+        # Si ninguna de las dos playlists cambió, el diff anterior sigue valiendo
+        diff_key = None
+        if self.snapshots is not None and snapshot_id and etag:
+            diff_key = (spotify_playlist_id, snapshot_id, youtube_playlist_id, etag, self.matcher.threshold)
+            diff = self.snapshots.get_diff(diff_key) if spotify_unchanged and youtube_unchanged else None
+            if diff is not None:
+                if index is not None:
+                    # Las páginas son la copia guardada: recorrerlas no llama a las APIs
+                    for _ in chain(spotify_pages, youtube_pages):
+                        pass
+                return diff
+
+        events = {'missing_in_spotify': [], 'missing_in_youtube': [], 'matched': []}
+        for kind, item in self._diff_pages(spotify_pages, youtube_pages):
+            events[kind].append(item)
+        diff = (events['missing_in_spotify'], events['missing_in_youtube'], events['matched'])
+
+        if diff_key is not None:
+            self.snapshots.put_diff(diff_key, diff)
+        return diff
+
+    def compare_playlists(
+        self,
+        spotify_playlist_id: str,
+        youtube_playlist_id: str
+    ) -> Tuple[List[TrackRecord], List[TrackRecord]]:
+        """Compara dos playlists y encuentra las diferencias con metadatos."""
+        missing_in_spotify, missing_in_youtube, _ = self.match_playlists(
+            spotify_playlist_id,
+            youtube_playlist_id
+        )
         return missing_in_spotify, missing_in_youtube
 
     def sync_spotify_to_youtube(
         self,
         spotify_playlist_id: str,
         youtube_playlist_id: str,
-        max_sync: int = 50
+        max_sync: int = 50,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict:
+        """Sincroniza tracks de Spotify a YouTube.
+
+        Si se pasa `progress`, se llama con (procesados, total, sincronizados, fallidos)
+        cada vez que un track queda resuelto. Con un registro de cuota, las búsquedas se
+        planifican empezando por los tracks ya resueltos en el cache; los que no entran en
+        el presupuesto del día se devuelven en `deferred`. Los videos que ya están en la
+        playlist de YouTube no se vuelven a insertar y se cuentan en `skipped`.
+        """
+        results, _ = self._sync_pairs(SPOTIFY_TO_YOUTUBE, [(spotify_playlist_id, youtube_playlist_id)], max_sync, progress)
+        if isinstance(results[0], Exception):
+            raise results[0]
+        return results[0]
+
+    def sync_youtube_to_spotify(
+        self,
+        spotify_playlist_id: str,
+        youtube_playlist_id: str,
+        max_sync: int = 50,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict:
+        """Sincroniza videos de YouTube a Spotify.
+
+        Si se pasa `progress`, se llama con (procesados, total, sincronizados, fallidos)
+        después de las búsquedas y al terminar las escrituras. Los tracks que ya están en
+        la playlist de Spotify no se vuelven a agregar y se cuentan en `skipped`.
+        """
+        results, _ = self._sync_pairs(YOUTUBE_TO_SPOTIFY, [(spotify_playlist_id, youtube_playlist_id)], max_sync, progress)
+        if isinstance(results[0], Exception):
+            raise results[0]
+        return results[0]
+
+    def sync_many(
+        self,
+        pairs: List[Tuple[str, str]],
+        direction: str,
+        max_sync: int = 50,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict:
+        """Sincroniza varios pares (playlist de Spotify, playlist de YouTube) en un solo trabajo.
+
+        Los pares se comparan en paralelo y cada canción que falta se busca una sola vez,
+        aunque falte en varias playlists de destino; después se escribe en cada destino.
+        `max_sync` es por par y `progress` informa el avance combinado. Un par que no se
+        pudo comparar no frena al resto: queda con su `error` en `playlists`.
+        """
+        results, resolved = self._sync_pairs(direction, pairs, max_sync, progress)
+        playlists, failed, deferred = [], [], []
+        for (spotify_playlist_id, youtube_playlist_id), result in zip(pairs, results):
+            ids = {'spotify_playlist_id': spotify_playlist_id, 'youtube_playlist_id': youtube_playlist_id}
+            if isinstance(result, Exception):
+                playlists.append({**ids, 'error': str(result)})
+                continue
+            failed.extend({**ids, **entry} for entry in result['failed'])
+            deferred.extend({**ids, 'track': track} for track in result.get('deferred', []))
+            playlists.append({
+                **ids,
+                'synced': result['synced'],
+                'skipped': result['skipped'],
+                'failed': len(result['failed']),
+                'deferred': len(result.get('deferred', [])),
+                'total_missing': result['total_missing']
+            })
+
+        return {
+            'synced': sum(item.get('synced', 0) for item in playlists),
+            'skipped': sum(item.get('skipped', 0) for item in playlists),
+            'failed': failed,
+            'deferred': deferred,
+            'resolved': resolved,
+            'playlists': playlists
+        }
+
+    def _compare_pairs(
+        self,
+        pairs: List[Tuple[str, str]],
+        target: str
+    ) -> List[Union[Tuple[List[TrackRecord], Set[str]], Exception]]:
+        """Compara los pares en paralelo.
+
+        Por cada par devuelve (faltantes en el destino, URIs o videoIds que ya hay en el
+        destino), o la excepción si no se pudo comparar.
+        """
+        def compare(pair: Tuple[str, str]) -> Union[Tuple[List[TrackRecord], Set[str]], Exception]:
+            present = {}
+            try:
+                missing_in_spotify, missing_in_youtube, _ = self.match_playlists(*pair, index=present)
+            except Exception as e:
+                return e
+            return (missing_in_youtube if target == YOUTUBE else missing_in_spotify), present[target]
+
+        if len(pairs) <= 1:
+            return [compare(pair) for pair in pairs]
+        with ThreadPoolExecutor(max_workers=min(BULK_PLAYLIST_WORKERS, len(pairs))) as pool:
+            return list(pool.map(compare, pairs))
+
+    def _sync_pairs(
+        self,
+        direction: str,
+        pairs: List[Tuple[str, str]],
+        max_sync: int,
+        progress: Optional[ProgressCallback]
+    ) -> Tuple[List[Union[Dict, Exception]], int]:
+        """Sincroniza uno o más pares en la misma dirección.
+
+        Devuelve el resultado (o la excepción) de cada par y cuántas canciones distintas
+        hubo que resolver.
+        """
+        to_youtube = direction == SPOTIFY_TO_YOUTUBE
+        compared = self._compare_pairs(pairs, YOUTUBE if to_youtube else SPOTIFY)
+
+        # Unión de los faltantes: por cada par, el índice de cada track en `unique`
+        keys: Dict[str, int] = {}
+        unique: List[TrackRecord] = []
+        needed_by: List[List[int]] = []
+        slots: Dict[int, List[int]] = {}
+        for pair, outcome in enumerate(compared):
+            if isinstance(outcome, Exception):
+                continue
+            slots[pair] = []
+            for track in outcome[0][:max_sync]:
+                key = self.cache_key(track.title, track.artist)
+                if key not in keys:
+                    keys[key] = len(unique)
+                    unique.append(track)
+                    needed_by.append([])
+                needed_by[keys[key]].append(pair)
+                slots[pair].append(keys[key])
+
+        tracker = _SyncProgress(progress, sum(len(items) for items in slots.values()))
+        tracker.advance()
+
+        cached = self._cached_results(unique, direction)
+        order = list(range(len(unique)))
+        if to_youtube and self.quota is not None:
+            costs = [
+                self._youtube_sync_cost(found, video_id, [compared[pair][1] for pair in needed_by[u]])
+                for u, (found, video_id) in enumerate(cached)
+            ]
+            order, _ = plan_by_cost(costs, self.quota.remaining(self.user_id))
+        matches = self._search_many(
+            self.search_youtube_video if to_youtube else self.search_spotify_track,
+            [unique[u] for u in order],
+            self.youtube_limiter if to_youtube else self.spotify_limiter,
+            direction,
+            cached=[cached[u] for u in order]
+        )
+        # Lo que no entró en el presupuesto queda postergado, igual que si la búsqueda se quedó sin cuota
+        resolved = {u: (None, DEFERRED) for u in range(len(unique))}
+        resolved.update(zip(order, matches))
+
+        # Las escrituras van por playlist de destino: distintos destinos en paralelo y, si
+        # varios pares comparten destino, uno después del otro y con lo que ya hay en común
+        results: List[Union[Dict, Exception]] = list(compared)
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for pair in slots:
+            groups[pairs[pair][1] if to_youtube else pairs[pair][0]].append(pair)
+
+        def write(group: List[int]) -> None:
+            existing = set().union(*(compared[pair][1] for pair in group))
+            for pair in group:
+                spotify_playlist_id, youtube_playlist_id = pairs[pair]
+                missing = compared[pair][0]
+                lookups = [resolved[u] for u in slots[pair]]
+                if to_youtube:
+                    result = self._write_youtube(youtube_playlist_id, missing[:max_sync], lookups, existing, tracker)
+                else:
+                    result = self._write_spotify(spotify_playlist_id, missing[:max_sync], lookups, existing, tracker)
+                result['total_missing'] = len(missing)
+                results[pair] = result
+
+        if len(groups) <= 1:
+            for group in groups.values():
+                write(group)
+        else:
+            with ThreadPoolExecutor(max_workers=min(BULK_PLAYLIST_WORKERS, len(groups))) as pool:
+                list(pool.map(write, groups.values()))
+        return results, len(unique)
+
+    def _insert_youtube_item(self, youtube_playlist_id: str, video_id: str) -> None:
+        with metrics.timed_stage('insert', items=1):
+            self.youtube_limiter.call(self._execute_youtube, self.youtube.playlistItems().insert(
+                part='snippet',
+                body={
+                    'snippet': {
+                        'playlistId': youtube_playlist_id,
+                        'resourceId': {
+                            'kind': 'youtube#video',
+                            'videoId': video_id
+                        }
+                    }
+                }
+            ), 'playlistItems.insert', deferrable=True)
+
+    def _write_youtube(
+        self,
+        youtube_playlist_id: str,
+        to_sync: List[TrackRecord],
+        lookups: List[Tuple[Optional[str], Optional[str]]],
+        existing: Set[str],
+        tracker: '_SyncProgress'
     ) -> Dict:
-        """Sincroniza tracks de Spotify a YouTube."""
-        missing_in_youtube = self.compare_playlists(spotify_playlist_id, youtube_playlist_id)[1]
+        """Inserta en YouTube los videos ya resueltos de una playlist, en el orden original."""
         synced = 0
+        skipped = 0
         failed = []
-
-        for track in missing_in_youtube[:max_sync]:
-            video_id = self.search_youtube_video(track['title'], track['artist'])
-            if video_id:
+        deferred = []
+        for track, (video_id, error) in zip(to_sync, lookups):
+            before = (synced, len(failed))
+            if error is DEFERRED:
+                deferred.append(track.to_dict())
+            elif error:
+                failed.append({
+                    'track': track.to_dict(),
+                    'error': error
+                })
+            elif video_id in existing:
+                # El match aproximado no lo encontró, pero el video ya está en la playlist
+                skipped += 1
+            elif video_id:
                 try:
-                    self.youtube.playlistItems().insert(
-                        part='snippet',
-                        body={
-                            'snippet': {
-                                'playlistId': youtube_playlist_id,
-                                'resourceId': {
-                                    'kind': 'youtube#video',
-                                    'videoId': video_id
-                                }
-                            }
-                        }
-                    ).execute()
+                    self._insert_youtube_item(youtube_playlist_id, video_id)
+                    existing.add(video_id)
                     synced += 1
+                except QuotaExceeded:
+                    deferred.append(track.to_dict())
                 except Exception as e:
                     failed.append({
-                        'track': track,
+                        'track': track.to_dict(),
                         'error': str(e)
                     })
             else:
                 failed.append({
-                    'track': track,
+                    'track': track.to_dict(),
                     'error': 'Video not found'
                 })
+            tracker.advance(1, synced - before[0], len(failed) - before[1])
 
         return {
             'synced': synced,
+            'skipped': skipped,
             'failed': failed,
-            'total_missing': len(missing_in_youtube)
+            'deferred': deferred
         }
 
-    def sync_youtube_to_spotify(
+    def _write_spotify(
         self,
         spotify_playlist_id: str,
-        youtube_playlist_id: str,
-        max_sync: int = 50
+        to_sync: List[TrackRecord],
+        lookups: List[Tuple[Optional[str], Optional[str]]],
+        existing: Set[str],
+        tracker: '_SyncProgress'
     ) -> Dict:
-        """Sincroniza videos de YouTube a Spotify."""
-        missing_in_spotify = self.compare_playlists(spotify_playlist_id, youtube_playlist_id)[0]
+        """Agrega a Spotify, en lotes, los tracks ya resueltos de una playlist."""
         synced = 0
+        skipped = 0
         failed = []
 
-        for video in missing_in_spotify[:max_sync]:
-            track_uri = self.search_spotify_track(video['title'], video['artist'])
-            if track_uri:
-                try:
-                    self.spotify.playlist_add_items(spotify_playlist_id, [track_uri])
-                    synced += 1
-                except Exception as e:
-                    failed.append({
-                        'video': video,
-                        'error': str(e)
-                    })
+        # Las escrituras se acumulan y se envían en lotes al final
+        pending = []
+        for index, (video, (track_uri, error)) in enumerate(zip(to_sync, lookups)):
+            if error:
+                failed.append((index, {
+                    'video': video.to_dict(),
+                    'error': error
+                }))
+            elif track_uri in existing:
+                skipped += 1
+            elif track_uri:
+                # También evita agregar dos veces un track que resolvieron dos videos
+                existing.add(track_uri)
+                pending.append((index, video, track_uri))
             else:
-                failed.append({
-                    'video': video,
+                failed.append((index, {
+                    'video': video.to_dict(),
                     'error': 'Track not found'
-                })
+                }))
+        tracker.advance(len(to_sync) - len(pending), 0, len(failed))
+
+        resolved_failures = len(failed)
+        for index, video, error in self._add_spotify_items(spotify_playlist_id, pending):
+            if error:
+                failed.append((index, {
+                    'video': video.to_dict(),
+                    'error': error
+                }))
+            else:
+                synced += 1
+        tracker.advance(len(pending), synced, len(failed) - resolved_failures)
+
+        # Mantener el orden de la playlist original en el reporte de fallidos
+        failed = [entry for _, entry in sorted(failed, key=lambda item: item[0])]
 
         return {
             'synced': synced,
-            'failed': failed,
-            'total_missing': len(missing_in_spotify)
-        } 
\ No newline at end of file
+            'skipped': skipped,
+            'failed': failed
+        }
+
+
+def _youtube_version(page_etags: List[Tuple[Optional[str], Optional[str]]]) -> Optional[str]:
+    """Versión de una playlist de YouTube: el pageToken y el ETag de cada página."""
+    if not page_etags or not all(etag for _, etag in page_etags):
+        return None
+    return json.dumps([[page_token or '', etag] for page_token, etag in page_etags])
+
+
+def _youtube_page_etags(version: Optional[str]) -> Optional[List[Tuple[Optional[str], str]]]:
+    """[(pageToken, ETag)] de una versión guardada; None si no hay o es del formato
+    anterior (sólo el ETag de la primera página), que no alcanza para revalidarla."""
+    if not version or not version.startswith('['):
+        return None
+    return [(page_token or None, etag) for page_token, etag in json.loads(version)]
+
+
+class _SyncProgress:
+    """Avance combinado de una sincronización de uno o varios pares de playlists."""
+
+    def __init__(self, callback: Optional[ProgressCallback], total: int):
+        self.callback = callback
+        self.total = total
+        self.processed = 0
+        self.synced = 0
+        self.failed = 0
+        # Varias playlists de destino pueden avanzar a la vez
+        self._lock = threading.Lock()
+
+    def advance(self, processed: int = 0, synced: int = 0, failed: int = 0) -> None:
+        with self._lock:
+            self.processed += processed
+            self.synced += synced
+            self.failed += failed
+            if self.callback:
+                self.callback(self.processed, self.total, self.synced, self.failed)
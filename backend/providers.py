@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# Los clientes de Spotify/YouTube y SQLAlchemy son sincrónicos: se ejecutan en pools de
+# hilos propios para no bloquear el event loop mientras esperan la red o la base de datos
+PROVIDER_POOL_SIZE = int(os.getenv("PROVIDER_POOL_SIZE", "32"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+
+provider_executor = ThreadPoolExecutor(max_workers=PROVIDER_POOL_SIZE, thread_name_prefix="provider")
+db_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="db")
+
+
+async def run_provider(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Ejecuta una llamada bloqueante a Spotify/YouTube en el pool de proveedores."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(provider_executor, partial(func, *args, **kwargs))
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Ejecuta una operación bloqueante de la base de datos en el pool de base de datos."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, partial(func, *args, **kwargs))
@@ -0,0 +1,229 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+import threading
+import zlib
+
+from sqlalchemy import func, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import QuotaUsage
+
+# Unidades de cuota de la YouTube Data API v3 por llamada
+YOUTUBE_QUOTA_COSTS = {
+    'search.list': 100,
+    'playlistItems.insert': 50,
+    'playlistItems.delete': 50,
+    'playlists.insert': 50,
+    'playlistItems.list': 1,
+    'playlists.list': 1,
+    'channels.list': 1,
+    'videos.list': 1,
+}
+
+# La cuota diaria de YouTube se reinicia a la medianoche del Pacífico
+YOUTUBE_QUOTA_TIMEZONE = 'America/Los_Angeles'
+
+# Intentos de registrar un consumo cuando otro proceso crea la misma fila a la vez
+WRITE_ATTEMPTS = 3
+
+
+class QuotaExceeded(Exception):
+    """No queda presupuesto de cuota para la llamada pedida."""
+
+
+class QuotaLedger:
+    """Registro persistente del consumo de cuota por día, proyecto, usuario y método."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        daily_limit: int = 10000,
+        user_daily_limit: int = 0,
+        project: str = 'default',
+        costs: Optional[Dict[str, int]] = None,
+        timezone: str = YOUTUBE_QUOTA_TIMEZONE
+    ):
+        self.session_factory = session_factory
+        self.daily_limit = daily_limit
+        # Límite por usuario dentro del proyecto; 0 = sin límite propio
+        self.user_daily_limit = user_daily_limit
+        self.project = project
+        self.costs = costs or YOUTUBE_QUOTA_COSTS
+        self.timezone = ZoneInfo(timezone)
+        self._lock = threading.Lock()
+
+    def cost(self, method: str, calls: int = 1) -> int:
+        return self.costs.get(method, 1) * calls
+
+    def day(self, now: Optional[datetime] = None) -> str:
+        return (now or datetime.now(self.timezone)).astimezone(self.timezone).strftime('%Y-%m-%d')
+
+    def used(self, user_id: Optional[int] = None) -> int:
+        """Unidades usadas hoy por el proyecto, o por un usuario si se indica."""
+        db = self.session_factory()
+        try:
+            return self._used(db, self.day(), user_id)
+        finally:
+            db.close()
+
+    def remaining(self, user_id: Optional[int] = None) -> int:
+        """Unidades disponibles hoy, respetando el límite del proyecto y el del usuario."""
+        db = self.session_factory()
+        try:
+            return self._remaining(db, self.day(), user_id)
+        finally:
+            db.close()
+
+    def charge(self, method: str, user_id: Optional[int] = None, calls: int = 1) -> None:
+        """Registra llamadas ya hechas (o inevitables), sin chequear el presupuesto."""
+        self._write(method, user_id, lambda db, day: calls)
+
+    def reserve(self, method: str, user_id: Optional[int] = None, calls: int = 1) -> int:
+        """Descuenta del presupuesto hasta `calls` llamadas a `method`; devuelve cuántas entraron."""
+        unit_cost = self.cost(method)
+
+        def granted(db: Session, day: str) -> int:
+            self._lock_day(db, day)
+            return max(min(calls, self._remaining(db, day, user_id) // unit_cost) if unit_cost else calls, 0)
+
+        return self._write(method, user_id, granted)
+
+    def refund(self, method: str, user_id: Optional[int] = None, calls: int = 1) -> None:
+        """Devuelve lo cargado por charge() o reserve() para llamadas que no llegaron a YouTube."""
+        self._write(method, user_id, lambda db, day: -calls)
+
+    def forecast(self, user_id: Optional[int] = None, now: Optional[datetime] = None) -> Dict:
+        """Consumo del día y proyección del presupuesto restante al ritmo actual."""
+        now = (now or datetime.now(self.timezone)).astimezone(self.timezone)
+        day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        resets_at = day_start + timedelta(days=1)
+
+        db = self.session_factory()
+        try:
+            rows = db.query(QuotaUsage).filter(
+                QuotaUsage.day == self.day(now),
+                QuotaUsage.project == self.project
+            ).all()
+            by_method = defaultdict(lambda: {'calls': 0, 'units': 0})
+            used = user_used = 0
+            for row in rows:
+                used += row.units
+                by_method[row.method]['calls'] += row.calls
+                by_method[row.method]['units'] += row.units
+                if user_id is not None and row.user_id == user_id:
+                    user_used += row.units
+        finally:
+            db.close()
+
+        remaining = max(self.daily_limit - used, 0)
+        if user_id is not None and self.user_daily_limit:
+            remaining = min(remaining, max(self.user_daily_limit - user_used, 0))
+
+        # Ritmo promedio desde el inicio del día de cuota
+        elapsed_hours = max((now - day_start).total_seconds() / 3600, 1 / 60)
+        units_per_hour = used / elapsed_hours
+        hours_left = (resets_at - now).total_seconds() / 3600
+        exhausted_at = None
+        if units_per_hour and remaining / units_per_hour < hours_left:
+            exhausted_at = now + timedelta(hours=remaining / units_per_hour)
+
+        return {
+            'project': self.project,
+            'day': self.day(now),
+            'limit': self.daily_limit,
+            'used': used,
+            'user_used': user_used,
+            'user_limit': self.user_daily_limit or None,
+            'remaining': remaining,
+            'units_per_hour': round(units_per_hour, 1),
+            'projected_usage': min(round(used + units_per_hour * hours_left), self.daily_limit),
+            'exhausted_at': exhausted_at.isoformat() if exhausted_at else None,
+            'resets_at': resets_at.isoformat(),
+            'searches_left': remaining // self.cost('search.list'),
+            'inserts_left': remaining // self.cost('playlistItems.insert'),
+            'by_method': dict(by_method)
+        }
+
+    def _used(self, db: Session, day: str, user_id: Optional[int] = None) -> int:
+        query = db.query(func.coalesce(func.sum(QuotaUsage.units), 0)).filter(
+            QuotaUsage.day == day,
+            QuotaUsage.project == self.project
+        )
+        if user_id is not None:
+            query = query.filter(QuotaUsage.user_id == user_id)
+        return int(query.scalar())
+
+    def _remaining(self, db: Session, day: str, user_id: Optional[int]) -> int:
+        remaining = self.daily_limit - self._used(db, day)
+        if user_id is not None and self.user_daily_limit:
+            remaining = min(remaining, self.user_daily_limit - self._used(db, day, user_id))
+        return max(remaining, 0)
+
+    def _write(self, method: str, user_id: Optional[int], count: Callable[[Session, str], int]) -> int:
+        """Suma las llamadas que devuelve `count(db, día)` en la misma transacción que las calcula."""
+        with self._lock:
+            for _ in range(WRITE_ATTEMPTS):
+                db = self.session_factory()
+                try:
+                    day = self.day()
+                    calls = count(db, day)
+                    if calls:
+                        self._add(db, day, method, user_id, calls)
+                    db.commit()
+                    return calls
+                except IntegrityError:
+                    # Otro proceso creó la misma fila
+                    db.rollback()
+                finally:
+                    db.close()
+        print(f"No se pudo registrar la cuota de {method} (usuario {user_id}) tras {WRITE_ATTEMPTS} intentos")
+        return 0
+
+    def _lock_day(self, db: Session, day: str) -> None:
+        """Bloquea las reservas del día de otros procesos hasta el fin de la transacción."""
+        dialect = db.get_bind().dialect.name
+        if dialect == 'sqlite':
+            db.execute(text("BEGIN IMMEDIATE"))
+        elif dialect == 'postgresql':
+            # FOR UPDATE no bloquea las filas que todavía no existen
+            key = zlib.crc32(f"quota:{self.project}:{day}".encode())
+            db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': key})
+        else:
+            db.query(QuotaUsage.id).filter(
+                QuotaUsage.day == day,
+                QuotaUsage.project == self.project
+            ).with_for_update().all()
+
+    def _add(self, db: Session, day: str, method: str, user_id: Optional[int], calls: int) -> None:
+        row_id = db.query(QuotaUsage.id).filter(
+            QuotaUsage.day == day,
+            QuotaUsage.project == self.project,
+            QuotaUsage.user_id.is_(None) if user_id is None else QuotaUsage.user_id == user_id,
+            QuotaUsage.method == method
+        ).order_by(QuotaUsage.id).limit(1).scalar()
+        units = self.cost(method, calls)
+        if row_id is None:
+            db.add(QuotaUsage(day=day, project=self.project, user_id=user_id, method=method, calls=calls, units=units))
+            db.flush()
+            return
+        # UPDATE atómico: no se pierden las llamadas que otro proceso sume al mismo tiempo
+        db.query(QuotaUsage).filter(QuotaUsage.id == row_id).update({
+            QuotaUsage.calls: QuotaUsage.calls + calls,
+            QuotaUsage.units: QuotaUsage.units + units
+        }, synchronize_session=False)
+
+
+def plan_by_cost(costs: Sequence[int], budget: int) -> Tuple[List[int], List[int]]:
+    """(índices a ejecutar, índices postergados), empezando por los más baratos y en orden."""
+    scheduled, deferred = [], []
+    spent = 0
+    for index in sorted(range(len(costs)), key=lambda i: costs[i]):
+        if spent + costs[index] <= budget:
+            scheduled.append(index)
+            spent += costs[index]
+        else:
+            deferred.append(index)
+    return scheduled, sorted(deferred)
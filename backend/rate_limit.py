@@ -0,0 +1,199 @@
+from typing import Any, Callable, Dict, Optional, TypeVar
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# Archivo SQLite donde se comparte el estado de los limitadores entre procesos (varios
+# workers de uvicorn); sin configurar, el estado se comparte sólo entre hilos del proceso
+RATE_LIMIT_DB = os.getenv("RATE_LIMIT_DB")
+
+# Ajuste adaptativo (AIMD): cada llamada exitosa sube el ritmo un poco, cada 429 lo baja
+RATE_INCREASE = 0.02  # fracción del ritmo máximo que se suma por llamada exitosa
+RATE_DECREASE = 0.75  # factor que se aplica al ritmo ante un 429
+MIN_RATE_FRACTION = 0.05
+
+# Reintentos con backoff exponencial y jitter ("full jitter")
+DEFAULT_MAX_RETRIES = 4
+BACKOFF_BASE = 0.5  # segundos
+BACKOFF_MAX = 30.0
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class LocalBucketStore:
+    """Estado de los limitadores en memoria, compartido por todos los hilos del proceso."""
+
+    def __init__(self):
+        self._states: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, name: str, change: Callable[[Dict[str, float]], T]) -> T:
+        """Aplica `change` al estado del limitador `name` de forma atómica."""
+        with self._lock:
+            state = self._states.setdefault(name, {})
+            return change(state)
+
+
+class SQLiteBucketStore:
+    """Estado de los limitadores en un archivo SQLite, compartido entre procesos.
+
+    Cada actualización es una transacción BEGIN IMMEDIATE: SQLite serializa las escrituras,
+    así dos procesos no pueden tomar el mismo token.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS rate_limits (name TEXT PRIMARY KEY, state TEXT NOT NULL)")
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def update(self, name: str, change: Callable[[Dict[str, float]], T]) -> T:
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT state FROM rate_limits WHERE name = ?", (name,)).fetchone()
+            state = json.loads(row[0]) if row else {}
+            result = change(state)
+            db.execute("INSERT OR REPLACE INTO rate_limits (name, state) VALUES (?, ?)", (name, json.dumps(state)))
+            db.execute("COMMIT")
+            return result
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+
+_local_store = LocalBucketStore()
+_sqlite_stores: Dict[str, SQLiteBucketStore] = {}
+_stores_lock = threading.Lock()
+
+
+def default_store():
+    """Store compartido del proceso: el archivo de RATE_LIMIT_DB o la memoria."""
+    if not RATE_LIMIT_DB:
+        return _local_store
+    with _stores_lock:
+        if RATE_LIMIT_DB not in _sqlite_stores:
+            _sqlite_stores[RATE_LIMIT_DB] = SQLiteBucketStore(RATE_LIMIT_DB)
+        return _sqlite_stores[RATE_LIMIT_DB]
+
+
+class RateLimiter:
+    """Token bucket adaptativo por proveedor, compartido entre hilos (y procesos).
+
+    Todos los limitadores con el mismo nombre y store comparten el mismo bucket, aunque
+    pertenezcan a distintas sincronizaciones. El ritmo arranca en `rate` y se adapta:
+    baja ante cada respuesta de rate limit (y se pausa lo que pida Retry-After) y vuelve
+    a subir de a poco con las llamadas exitosas, así queda justo por debajo del límite
+    real del proveedor en lugar de alternar ráfagas y errores.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        name: Optional[str] = None,
+        burst: Optional[float] = None,
+        retry_after: Optional[Callable[[Exception], Optional[float]]] = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        store=None
+    ):
+        # Sin rate (None o 0) el limitador no restringe nada, pero igual reintenta
+        self.max_rate = rate or 0.0
+        self.min_rate = self.max_rate * MIN_RATE_FRACTION
+        self.burst = burst or max(1.0, self.max_rate)
+        # Sin nombre, el bucket es propio de esta instancia
+        self.name = name or f"limiter-{id(self)}"
+        # Devuelve los segundos a esperar si la excepción es un rate limit, o None
+        self.retry_after = retry_after
+        self.max_retries = max_retries
+        self.store = store or default_store()
+
+    def _state(self, state: Dict[str, float], now: float) -> Dict[str, float]:
+        if 'rate' not in state:
+            state.update(rate=self.max_rate, tokens=self.burst, updated=now, blocked_until=0.0)
+        return state
+
+    def _take(self, state: Dict[str, float]) -> float:
+        """Toma un token si hay; si no, devuelve cuántos segundos esperar."""
+        now = time.time()
+        self._state(state, now)
+        if now < state['blocked_until']:
+            return state['blocked_until'] - now
+        if not state['rate']:
+            return 0.0
+        state['tokens'] = min(self.burst, state['tokens'] + (now - state['updated']) * state['rate'])
+        state['updated'] = now
+        if state['tokens'] >= 1:
+            state['tokens'] -= 1
+            return 0.0
+        return (1 - state['tokens']) / state['rate']
+
+    def acquire(self) -> None:
+        """Bloquea hasta que haya presupuesto para una llamada más."""
+        while True:
+            wait = self.store.update(self.name, self._take)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def record_success(self) -> None:
+        if not self.max_rate:
+            return
+
+        def increase(state: Dict[str, float]) -> None:
+            self._state(state, time.time())
+            state['rate'] = min(self.max_rate, state['rate'] + self.max_rate * RATE_INCREASE)
+
+        self.store.update(self.name, increase)
+
+    def record_rate_limited(self, delay: float) -> None:
+        """Baja el ritmo y pausa a todos los que comparten el bucket durante `delay` segundos."""
+        def decrease(state: Dict[str, float]) -> None:
+            now = time.time()
+            self._state(state, now)
+            if state['rate']:
+                state['rate'] = max(self.min_rate, state['rate'] * RATE_DECREASE)
+            state['tokens'] = 0.0
+            state['updated'] = now
+            state['blocked_until'] = max(state['blocked_until'], now + delay)
+
+        self.store.update(self.name, decrease)
+
+    def current_rate(self) -> float:
+        return self.store.update(self.name, lambda state: self._state(state, time.time())['rate'])
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Ejecuta `func` respetando el limitador y reintenta los rate limits con backoff.
+
+        Se espera lo que indique Retry-After o, si no viene, un backoff exponencial con jitter.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                retry_after = self.retry_after(e) if self.retry_after else None
+                if retry_after is None or attempt == self.max_retries:
+                    raise
+                self.record_rate_limited(max(retry_after, backoff_delay(attempt)))
+                continue
+            self.record_success()
+            return result
@@ -0,0 +1,295 @@
+from datetime import datetime, timezone
+from typing import IO, Callable, Dict, List, Optional
+import random
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from sqlalchemy.orm import Session
+
+from jobs import SyncJobQueue
+from match_cache import SPOTIFY_TO_YOUTUBE, YOUTUBE_TO_SPOTIFY
+from models import Playlist
+from playlist_sync import PlaylistSync
+from quota import QuotaLedger
+
+# Tipo de sincronización de los jobs automáticos (el de los manuales es sólo la dirección)
+AUTO_SYNC_TYPES = {
+    SPOTIFY_TO_YOUTUBE: 'auto_spotify_to_youtube',
+    YOUTUBE_TO_SPOTIFY: 'auto_youtube_to_spotify',
+}
+
+
+def acquire_process_lock(path: str) -> Optional[IO]:
+    """Lock exclusivo sobre `path` mientras el archivo devuelto siga abierto; None si está tomado."""
+    handle = open(path, 'a+')
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+class AutoSyncEntry:
+    """Una playlist vinculada con sincronización automática y cuándo le toca."""
+
+    __slots__ = (
+        'playlist_id', 'user_id', 'spotify_playlist_id', 'youtube_playlist_id',
+        'interval', 'direction', 'priority', 'next_due', 'pending_work'
+    )
+
+    def __init__(
+        self,
+        playlist_id: int,
+        user_id: int,
+        spotify_playlist_id: str,
+        youtube_playlist_id: str,
+        interval: float,
+        direction: str = SPOTIFY_TO_YOUTUBE,
+        priority: int = 0
+    ):
+        self.playlist_id = playlist_id
+        self.user_id = user_id
+        self.spotify_playlist_id = spotify_playlist_id
+        self.youtube_playlist_id = youtube_playlist_id
+        self.interval = interval  # segundos
+        self.direction = direction
+        self.priority = priority
+        self.next_due = 0.0
+        # La última vuelta dejó tracks postergados o fallidos: no se saltea aunque nada cambie
+        self.pending_work = False
+
+
+class AutoSyncScheduler:
+    """Sincroniza periódicamente las playlists vinculadas que tienen un intervalo configurado."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        jobs: SyncJobQueue,
+        create_sync: Callable[[int], Optional[PlaylistSync]],
+        default_interval: float = 0.0,
+        max_sync: int = 50,
+        jitter: float = 0.1,
+        catch_up_window: float = 900.0,
+        max_in_flight: int = 2,
+        queue_limit: int = 0,
+        quota: Optional[QuotaLedger] = None,
+        quota_reserve: float = 0.2,
+        reload_interval: float = 300.0,
+        poll_interval: float = 30.0,
+        clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None
+    ):
+        self.session_factory = session_factory
+        self.jobs = jobs
+        # Crea el PlaylistSync de un usuario (None si le falta alguna conexión)
+        self.create_sync = create_sync
+        # Intervalo de las playlists sin intervalo propio (segundos); 0 = sólo las que lo tienen
+        self.default_interval = default_interval
+        self.max_sync = max_sync
+        # Fracción del intervalo que se suma o resta al azar a cada próxima vuelta
+        self.jitter = jitter
+        # Ventana en la que se reparten las playlists atrasadas (segundos)
+        self.catch_up_window = catch_up_window
+        self.max_in_flight = max(1, max_in_flight)
+        # Jobs manuales pendientes a partir de los cuales no se encola nada automático
+        self.queue_limit = queue_limit
+        self.quota = quota
+        # Fracción de la cuota diaria de YouTube que se reserva para las sincronizaciones manuales
+        self.quota_reserve = quota_reserve
+        self.reload_interval = reload_interval
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.rng = rng or random.Random()
+
+        self.entries: Dict[int, AutoSyncEntry] = {}
+        self.in_flight: Dict[int, int] = {}  # playlist_id -> job_id
+        self.stats = {'dispatched': 0, 'skipped_unchanged': 0, 'deferred_quota': 0, 'yielded': 0, 'errors': 0}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process_lock: Optional[IO] = None
+
+    def start(self, lock_path: Optional[str] = None) -> bool:
+        """Lanza el hilo del scheduler si este proceso consigue `lock_path`; devuelve si quedó corriendo."""
+        with self._lock:
+            if self._thread is not None:
+                return True
+            if lock_path is not None:
+                self._process_lock = acquire_process_lock(lock_path)
+                if self._process_lock is None:
+                    return False
+            self._thread = threading.Thread(target=self._loop, name="auto-sync", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print("Error en el scheduler de sincronización automática:", e)
+            self._stop.wait(self.poll_interval)
+
+    def _phase(self, entry: AutoSyncEntry) -> float:
+        """Fase fija de una playlist dentro de su intervalo (la misma en cada reinicio)."""
+        return zlib.crc32(str(entry.playlist_id).encode()) / 2 ** 32 * entry.interval
+
+    def _next_due(self, entry: AutoSyncEntry, after: float) -> float:
+        spread = entry.interval * self.jitter
+        return after + entry.interval + self.rng.uniform(-spread, spread)
+
+    def _first_due(self, entry: AutoSyncEntry, last_synced_at: Optional[datetime], now: float) -> float:
+        if last_synced_at is None:
+            return now + self._phase(entry)
+        if last_synced_at.tzinfo is None:
+            last_synced_at = last_synced_at.replace(tzinfo=timezone.utc)
+        due = self._next_due(entry, last_synced_at.timestamp())
+        if due < now:
+            # Atrasada: se reparte en la ventana en lugar de salir con todas las demás
+            due = now + self.rng.uniform(0, min(entry.interval, self.catch_up_window))
+        return due
+
+    def reload(self) -> None:
+        """Lee de la base las playlists con sincronización automática."""
+        now = self.clock()
+        db = self.session_factory()
+        try:
+            rows = db.query(Playlist).filter(
+                Playlist.spotify_playlist_id.isnot(None),
+                Playlist.youtube_playlist_id.isnot(None)
+            ).all()
+            entries = {}
+            for row in rows:
+                interval = row.auto_sync_interval * 60 if row.auto_sync_interval else self.default_interval
+                if interval <= 0:
+                    continue
+                entry = AutoSyncEntry(
+                    row.id,
+                    row.owner_id,
+                    row.spotify_playlist_id,
+                    row.youtube_playlist_id,
+                    interval,
+                    row.auto_sync_direction or SPOTIFY_TO_YOUTUBE,
+                    row.auto_sync_priority or 0
+                )
+                previous = self.entries.get(row.id)
+                if previous is not None and previous.interval == interval:
+                    # Se conserva la misma entrada: puede tener un job en curso que la actualice
+                    for name in ('spotify_playlist_id', 'youtube_playlist_id', 'direction', 'priority'):
+                        setattr(previous, name, getattr(entry, name))
+                    entry = previous
+                else:
+                    entry.next_due = self._first_due(entry, row.last_synced_at, now)
+                entries[row.id] = entry
+        finally:
+            db.close()
+        with self._lock:
+            self.entries = entries
+            self._loaded_at = now
+
+    def due(self, now: float) -> List[AutoSyncEntry]:
+        """Playlists vencidas, de la más urgente a la menos urgente."""
+        with self._lock:
+            due = [e for e in self.entries.values() if e.next_due <= now and e.playlist_id not in self.in_flight]
+        return sorted(due, key=lambda e: (-e.priority, -(now - e.next_due) / e.interval, e.next_due))
+
+    def tick(self) -> None:
+        """Una vuelta del scheduler: encola las playlists vencidas que entran en el presupuesto."""
+        now = self.clock()
+        if self._loaded_at is None or now - self._loaded_at >= self.reload_interval:
+            self.reload()
+
+        if self.jobs.pending() > self.queue_limit:
+            # Primero las sincronizaciones que pidió un usuario
+            self.stats['yielded'] += 1
+            return
+
+        for entry in self.due(now):
+            if len(self.in_flight) >= self.max_in_flight:
+                break
+            if entry.direction == SPOTIFY_TO_YOUTUBE and self._quota_low(entry.user_id):
+                self.stats['deferred_quota'] += 1
+                entry.next_due = self._next_due(entry, now)
+                continue
+            try:
+                self._dispatch(entry, now)
+            except Exception as e:
+                print(f"Error en la sincronización automática de la playlist {entry.playlist_id}:", e)
+                self.stats['errors'] += 1
+                entry.next_due = self._next_due(entry, now)
+
+    def _quota_low(self, user_id: int) -> bool:
+        if self.quota is None:
+            return False
+        return self.quota.remaining(user_id) < self.quota.daily_limit * self.quota_reserve
+
+    def _dispatch(self, entry: AutoSyncEntry, now: float) -> None:
+        sync = self.create_sync(entry.user_id)
+        if sync is None:
+            entry.next_due = self._next_due(entry, now)
+            return
+        if not entry.pending_work and not sync.has_changed(entry.spotify_playlist_id, entry.youtube_playlist_id):
+            self.stats['skipped_unchanged'] += 1
+            entry.next_due = self._next_due(entry, now)
+            return
+
+        def job(progress):
+            if entry.direction == SPOTIFY_TO_YOUTUBE:
+                return sync.sync_spotify_to_youtube(
+                    entry.spotify_playlist_id, entry.youtube_playlist_id, self.max_sync, progress=progress
+                )
+            return sync.sync_youtube_to_spotify(
+                entry.spotify_playlist_id, entry.youtube_playlist_id, self.max_sync, progress=progress
+            )
+
+        with self._lock:
+            self.in_flight[entry.playlist_id] = 0
+        try:
+            # La cola llama a _finished siempre, aunque el job falle antes de empezar
+            job_id, created = self.jobs.submit(
+                entry.user_id,
+                AUTO_SYNC_TYPES[entry.direction],
+                entry.spotify_playlist_id,
+                entry.youtube_playlist_id,
+                job,
+                playlist_id=entry.playlist_id,
+                on_done=lambda result: self._finished(entry, result)
+            )
+        except Exception:
+            with self._lock:
+                self.in_flight.pop(entry.playlist_id, None)
+            raise
+        if not created:
+            # Ya hay una sincronización automática igual en la cola
+            with self._lock:
+                self.in_flight.pop(entry.playlist_id, None)
+            entry.next_due = self._next_due(entry, now)
+            return
+        with self._lock:
+            if entry.playlist_id in self.in_flight:
+                self.in_flight[entry.playlist_id] = job_id
+        self.stats['dispatched'] += 1
+
+    def _finished(self, entry: AutoSyncEntry, result: Optional[Dict]) -> None:
+        now = self.clock()
+        with self._lock:
+            self.in_flight.pop(entry.playlist_id, None)
+            # Si falló, se vuelve a intentar en la próxima vuelta aunque nada haya cambiado
+            entry.pending_work = result is None or bool(result.get('failed') or result.get('deferred'))
+            entry.next_due = self._next_due(entry, now)
@@ -63,7 +63,13 @@ class PlaylistBase(BaseModel):
     description: Optional[str] = None
     is_public: bool = False
 
-class PlaylistCreate(PlaylistBase):
+# Sincronización automática: intervalo en minutos (None = el del servidor) y dirección
+class PlaylistAutoSync(BaseModel):
+    auto_sync_interval: Optional[int] = None
+    auto_sync_direction: Optional[str] = None
+    auto_sync_priority: int = 0
+
+class PlaylistCreate(PlaylistBase, PlaylistAutoSync):
     spotify_playlist_id: Optional[str] = None
     youtube_playlist_id: Optional[str] = None
 
@@ -73,6 +79,9 @@ class Playlist(PlaylistBase):
     spotify_playlist_id: Optional[str]
     youtube_playlist_id: Optional[str]
     last_synced_at: Optional[datetime]
+    auto_sync_interval: Optional[int] = None
+    auto_sync_direction: Optional[str] = None
+    auto_sync_priority: int = 0
     created_at: datetime
     updated_at: Optional[datetime]
 
@@ -90,8 +99,17 @@ class SyncHistoryCreate(SyncHistoryBase):
 
 class SyncHistory(SyncHistoryBase):
     id: int
-    playlist_id: int
+    playlist_id: Optional[int]
+    spotify_playlist_id: Optional[str] = None
+    youtube_playlist_id: Optional[str] = None
+    total_items: int = 0
+    processed_items: int = 0
+    synced_items: int = 0
+    failed_items: int = 0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,46 @@
+from typing import Dict, List, Sequence
+import math
+
+import numpy as np
+
+from text_processing import normalize_text
+
+NGRAM_SIZE = 3
+
+
+def _ngrams(text: str) -> List[str]:
+    padded = f" {text} "
+    return [padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)]
+
+
+def _ngram_counts(text: str) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for ngram in _ngrams(text):
+        counts[ngram] = counts.get(ngram, 0) + 1
+    return counts
+
+
+def _norm(counts: Dict[str, int]) -> float:
+    return math.sqrt(sum(count * count for count in counts.values()))
+
+
+def batch_similarity(query: str, candidates: Sequence[str], normalized: bool = False) -> np.ndarray:
+    """Similitud coseno de n-gramas de caracteres de un texto contra N candidatos.
+
+    Devuelve un vector de N scores entre 0 y 1. Con normalized=True los textos se usan
+    tal cual, sin volver a normalizarlos.
+    """
+    if not normalized:
+        query = normalize_text(query)
+    query_counts = _ngram_counts(query)
+    query_norm = _norm(query_counts)
+    scores = np.zeros(len(candidates), dtype=np.float32)
+    for i, candidate in enumerate(candidates):
+        counts = _ngram_counts(candidate if normalized else normalize_text(candidate))
+        if not query_counts or not counts:
+            # Dos textos vacíos son idénticos (igual que SequenceMatcher)
+            scores[i] = 1.0 if not query_counts and not counts else 0.0
+            continue
+        dot = sum(count * query_counts.get(ngram, 0) for ngram, count in counts.items())
+        scores[i] = min(dot / (query_norm * _norm(counts)), 1.0)
+    return scores
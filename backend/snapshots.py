@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+import json
+import threading
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import PlaylistSnapshot
+
+SPOTIFY = 'spotify'
+YOUTUBE = 'youtube'
+
+
+class SnapshotStore:
+    """Guarda el último contenido leído de cada playlist junto con su versión.
+
+    La versión es el snapshot_id de Spotify o los ETags de las páginas de YouTube: si no cambió, la
+    playlist no se vuelve a descargar. Además se recuerda en memoria el último diff
+    calculado para cada par de versiones, así una comparación sin cambios no repite
+    el matching.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], max_diffs: int = 256):
+        self.session_factory = session_factory
+        self.max_diffs = max_diffs
+        self._diffs: "OrderedDict[Hashable, Tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, playlist_id: str) -> Optional[Tuple[str, List[Dict]]]:
+        """Devuelve (versión, items) de la última lectura guardada, o None."""
+        db = self.session_factory()
+        try:
+            snapshot = db.query(PlaylistSnapshot).filter(
+                PlaylistSnapshot.provider == provider,
+                PlaylistSnapshot.playlist_id == playlist_id
+            ).first()
+            if snapshot is None or not snapshot.version:
+                return None
+            return snapshot.version, json.loads(snapshot.items)
+        finally:
+            db.close()
+
+    def version(self, provider: str, playlist_id: str) -> Optional[str]:
+        """Versión de la última lectura guardada, sin cargar los items."""
+        db = self.session_factory()
+        try:
+            row = db.query(PlaylistSnapshot.version).filter(
+                PlaylistSnapshot.provider == provider,
+                PlaylistSnapshot.playlist_id == playlist_id
+            ).first()
+            return row[0] if row else None
+        finally:
+            db.close()
+
+    def put(self, provider: str, playlist_id: str, version: Optional[str], items: List[Dict]) -> None:
+        if not version:
+            return
+        db = self.session_factory()
+        try:
+            snapshot = db.query(PlaylistSnapshot).filter(
+                PlaylistSnapshot.provider == provider,
+                PlaylistSnapshot.playlist_id == playlist_id
+            ).first()
+            if snapshot is None:
+                snapshot = PlaylistSnapshot(provider=provider, playlist_id=playlist_id)
+                db.add(snapshot)
+            snapshot.version = version
+            snapshot.items = json.dumps(items)
+            snapshot.item_count = len(items)
+            db.commit()
+        except IntegrityError:
+            # Otro hilo guardó la misma playlist al mismo tiempo
+            db.rollback()
+        finally:
+            db.close()
+
+    def get_diff(self, key: Hashable) -> Optional[Tuple]:
+        with self._lock:
+            diff = self._diffs.get(key)
+            if diff is not None:
+                self._diffs.move_to_end(key)
+            return diff
+
+    def put_diff(self, key: Hashable, diff: Tuple) -> None:
+        with self._lock:
+            self._diffs[key] = diff
+            self._diffs.move_to_end(key)
+            while len(self._diffs) > self.max_diffs:
+                self._diffs.popitem(last=False)
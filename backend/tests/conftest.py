@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Los módulos del backend se importan sin paquete, como en main.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Base  # noqa: E402
+
+
+@pytest.fixture
+def session_factory():
+    """Sesiones sobre una base SQLite en memoria propia de cada test, con las tablas creadas."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+class FakeClock:
+    """Reloj que sólo avanza con sleep() o advance(); se usa como time.time o como el módulo time."""
+
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        # Como un sleep real, siempre pasa algo de tiempo (si no, un redondeo podría no avanzar nunca)
+        self.now += max(seconds, 1e-6)
+
+    advance = sleep
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,116 @@
+import os
+import threading
+
+import jobs
+from jobs import SyncJobQueue
+from models import SyncHistory
+
+
+def dead_pid():
+    pid = 99999
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return pid
+        except PermissionError:
+            pass
+        pid += 1
+
+
+def status(session_factory, job_id):
+    db = session_factory()
+    try:
+        return db.get(SyncHistory, job_id).status
+    finally:
+        db.close()
+
+
+def test_same_pair_is_deduplicated_while_queued_or_running(session_factory):
+    queue = SyncJobQueue(session_factory, workers=1)
+    release = threading.Event()
+    done = []
+
+    def job(progress):
+        release.wait(5)
+        return {'synced': 1}
+
+    job_id, created = queue.submit(1, 'spotify_to_youtube', 'sp', 'yt', job, on_done=done.append)
+    assert created
+    assert queue.submit(1, 'spotify_to_youtube', 'sp', 'yt', job) == (job_id, False)
+    # Otra dirección u otro usuario es otro job
+    assert queue.submit(1, 'youtube_to_spotify', 'sp', 'yt', lambda progress: {})[1]
+    assert queue.submit(2, 'spotify_to_youtube', 'sp', 'yt', lambda progress: {})[1]
+
+    release.set()
+    queue._queue.join()
+    assert status(session_factory, job_id) == 'success'
+    assert done == [{'synced': 1}]
+    # Terminado el job, el mismo par vuelve a encolarse
+    new_id, created = queue.submit(1, 'spotify_to_youtube', 'sp', 'yt', lambda progress: {})
+    assert created and new_id != job_id
+    queue._queue.join()
+
+
+def test_failed_job_reports_error_and_calls_on_done(session_factory):
+    queue = SyncJobQueue(session_factory, workers=1)
+    done = []
+
+    def job(progress):
+        raise RuntimeError("boom")
+
+    job_id, _ = queue.submit(1, 'spotify_to_youtube', 'sp', 'yt', job, on_done=done.append)
+    queue._queue.join()
+    db = session_factory()
+    history = db.get(SyncHistory, job_id)
+    assert (history.status, history.error_message) == ('failed', 'boom')
+    db.close()
+    assert done == [None]
+
+
+def test_progress_write_errors_do_not_fail_the_job(session_factory, monkeypatch):
+    queue = SyncJobQueue(session_factory, workers=1, progress_interval=0)
+    update = queue._update
+
+    def flaky_update(job_id, **values):
+        if 'processed_items' in values:
+            raise RuntimeError("database is locked")
+        update(job_id, **values)
+
+    monkeypatch.setattr(queue, '_update', flaky_update)
+
+    def job(progress):
+        progress(1, 2, 1, 0)
+        progress(2, 2, 2, 0)
+        return {'synced': 2}
+
+    job_id, _ = queue.submit(1, 'spotify_to_youtube', 'sp', 'yt', job)
+    queue._queue.join()
+    assert status(session_factory, job_id) == 'success'
+
+
+def test_start_recovers_only_jobs_of_dead_processes(session_factory):
+    owners = {
+        'dead': f"{jobs.WORKER_HOST}:{dead_pid()}",
+        'unknown': None,
+        'alive': jobs.WORKER_ID,
+        'remote': "other-host:1",
+    }
+    db = session_factory()
+    rows = {name: SyncHistory(sync_type='spotify_to_youtube', status='running', worker_id=owner)
+            for name, owner in owners.items()}
+    rows['finished'] = SyncHistory(sync_type='spotify_to_youtube', status='success', worker_id=owners['dead'])
+    db.add_all(rows.values())
+    db.commit()
+    ids = {name: row.id for name, row in rows.items()}
+    db.close()
+
+    SyncJobQueue(session_factory).start()
+
+    assert {name: status(session_factory, job_id) for name, job_id in ids.items()} == {
+        'dead': 'failed',
+        'unknown': 'failed',
+        'alive': 'running',
+        'remote': 'running',
+        'finished': 'success',
+    }
@@ -0,0 +1,60 @@
+import pytest
+
+from matching import TrackMatcher
+from text_processing import extract_metadata, strip_featuring
+from tracks import TrackRecord
+
+
+def spotify(title, artist):
+    return TrackRecord("sp", title, artist)
+
+
+def youtube(video_title):
+    metadata = extract_metadata(video_title)
+    return TrackRecord("yt", metadata["title"], metadata["artist"])
+
+
+def score(left, right, threshold=0.7):
+    pairs = TrackMatcher(threshold).match([left.normalized], [right.normalized]).pairs
+    return pairs[0][2] if pairs else None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Despacito (feat. Daddy Yankee)", "Despacito"),
+    ("Despacito ft. Daddy Yankee", "Despacito"),
+    ("Despacito [Ft Daddy Yankee] - Remix", "Despacito - Remix"),
+    ("Despacito featuring Daddy Yankee - Remix", "Despacito - Remix"),
+    ("Soft Cell", "Soft Cell"),
+    ("Left Outside Alone", "Left Outside Alone"),
+])
+def test_strip_featuring(text, expected):
+    assert strip_featuring(text) == expected
+
+
+@pytest.mark.parametrize("left, right", [
+    (spotify("Despacito", "Luis Fonsi"), youtube("Luis Fonsi - Despacito ft. Daddy Yankee (Official Video)")),
+    (spotify("Despacito ft Daddy Yankee", "Luis Fonsi"), youtube("Luis Fonsi - Despacito")),
+    (spotify("Despacito (feat. Daddy Yankee)", "Luis Fonsi"), youtube("Luis Fonsi - Despacito (Official Video)")),
+    (spotify("Despacito", "Luis Fonsi"), youtube("Despacito - Luis Fonsi")),
+])
+def test_featured_artists_and_noise_do_not_block_a_match(left, right):
+    assert score(left, right) == 1.0
+
+
+def test_other_song_by_the_same_artist_is_not_a_match():
+    assert score(spotify("Despacito", "Luis Fonsi"), youtube("Luis Fonsi - Échame La Culpa")) is None
+
+
+def test_threshold_decides_partial_matches():
+    left, right = spotify("Despacito - Remix", "Luis Fonsi"), youtube("Luis Fonsi - Despacito")
+    assert 0.7 <= score(left, right) < 1.0
+    assert score(left, right, threshold=0.9) is None
+
+
+def test_pairs_are_assigned_one_to_one():
+    left = [spotify("Despacito", "Luis Fonsi").normalized] * 2
+    right = [youtube("Luis Fonsi - Despacito").normalized]
+    result = TrackMatcher(0.7).match(left, right)
+    assert [(i, j) for i, j, _ in result.pairs] == [(0, 0)]
+    # El duplicado no tiene pareja propia, pero tampoco falta del otro lado
+    assert result.left_matched == {0, 1}
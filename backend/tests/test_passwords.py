@@ -0,0 +1,28 @@
+import asyncio
+
+from passwords import PasswordHasher, make_password_context
+
+
+def verify_and_update(context, password, hashed_password):
+    hasher = PasswordHasher(context, workers=1, max_pending=1)
+    try:
+        return asyncio.run(hasher.verify_and_update(password, hashed_password))
+    finally:
+        hasher.executor.shutdown()
+
+
+def test_hash_at_configured_cost_is_not_rehashed():
+    context = make_password_context(4)
+    assert verify_and_update(context, "secret", context.hash("secret")) == (True, None)
+
+
+def test_hash_at_other_cost_is_rehashed_on_login():
+    old = make_password_context(5).hash("secret")
+    valid, new_hash = verify_and_update(make_password_context(4), "secret", old)
+    assert valid
+    assert new_hash.startswith("$2b$04$")
+
+
+def test_wrong_password_is_not_rehashed():
+    old = make_password_context(5).hash("secret")
+    assert verify_and_update(make_password_context(4), "wrong", old) == (False, None)
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import sessionmaker
+
+from database import create_db_engine
+from models import Base
+from quota import QuotaLedger, plan_by_cost
+
+
+def test_reserve_grants_only_what_fits_in_the_budget(session_factory):
+    ledger = QuotaLedger(session_factory, daily_limit=250)
+    assert ledger.reserve('search.list', calls=5) == 2
+    assert ledger.reserve('search.list') == 0
+    assert ledger.reserve('playlistItems.insert') == 1
+    assert ledger.used() == 250
+    assert ledger.remaining() == 0
+
+
+def test_charge_is_recorded_even_over_budget(session_factory):
+    ledger = QuotaLedger(session_factory, daily_limit=100)
+    ledger.reserve('search.list')
+    ledger.charge('playlistItems.list', calls=3)
+    assert ledger.used() == 103
+    assert ledger.remaining() == 0
+
+
+def test_refund_returns_reserved_units(session_factory):
+    ledger = QuotaLedger(session_factory, daily_limit=1000)
+    assert ledger.reserve('search.list', user_id=1, calls=3) == 3
+    ledger.refund('search.list', user_id=1)
+    assert ledger.used(user_id=1) == 200
+    forecast = ledger.forecast(user_id=1)
+    assert forecast['by_method']['search.list'] == {'calls': 2, 'units': 200}
+
+
+def test_user_limit_applies_within_the_project_limit(session_factory):
+    ledger = QuotaLedger(session_factory, daily_limit=1000, user_daily_limit=200)
+    assert ledger.reserve('search.list', user_id=1, calls=5) == 2
+    assert ledger.reserve('search.list', user_id=2, calls=5) == 2
+    assert ledger.remaining(user_id=1) == 0
+    assert ledger.remaining() == 600
+
+
+def test_ledgers_sharing_a_database_never_overspend(tmp_path):
+    # Dos ledgers con engines propios, como dos procesos: sólo los coordina la base
+    url = f"sqlite:///{tmp_path / 'quota.db'}"
+    engines = [create_db_engine(url) for _ in range(2)]
+    Base.metadata.create_all(engines[0])
+    ledgers = [QuotaLedger(sessionmaker(bind=engine), daily_limit=1000) for engine in engines]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        granted = sum(pool.map(lambda i: ledgers[i % 2].reserve('search.list'), range(40)))
+        list(pool.map(lambda i: ledgers[i % 2].charge('playlistItems.list'), range(40)))
+    assert granted == 10
+    assert ledgers[0].used() == 1040
+    for engine in engines:
+        engine.dispose()
+
+
+def test_quota_day_follows_pacific_midnight(session_factory):
+    ledger = QuotaLedger(session_factory)
+    # 07:59 UTC es todavía el día anterior en Los Ángeles (UTC-8 en invierno)
+    assert ledger.day(datetime(2024, 1, 2, 7, 59, tzinfo=ZoneInfo('UTC'))) == '2024-01-01'
+    assert ledger.day(datetime(2024, 1, 2, 8, 0, tzinfo=ZoneInfo('UTC'))) == '2024-01-02'
+
+
+def test_plan_by_cost_schedules_cheapest_first_and_keeps_order():
+    scheduled, deferred = plan_by_cost([150, 50, 0, 150, 50], budget=250)
+    assert scheduled == [2, 1, 4, 0]
+    assert deferred == [3]
+
+
+def test_plan_by_cost_with_no_budget_only_runs_free_jobs():
+    assert plan_by_cost([100, 0, 50], budget=0) == ([1], [0, 2])
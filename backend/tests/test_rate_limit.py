@@ -0,0 +1,86 @@
+import pytest
+
+import rate_limit
+from rate_limit import LocalBucketStore, RateLimiter
+
+
+class RateLimited(Exception):
+    pass
+
+
+@pytest.fixture
+def limiter(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, 'time', clock)
+    return RateLimiter(10, retry_after=lambda e: 1.0 if isinstance(e, RateLimited) else None, store=LocalBucketStore())
+
+
+def test_bucket_allows_a_burst_then_paces_calls(limiter, clock):
+    start = clock()
+    for _ in range(20):
+        limiter.acquire()
+    # 10 de ráfaga y 10 más a 10 por segundo
+    assert clock() - start == pytest.approx(1.0)
+
+
+def test_rate_limit_decreases_rate_multiplicatively_and_pauses_everyone(limiter, clock):
+    start = clock()
+    limiter.record_rate_limited(2.0)
+    assert limiter.current_rate() == pytest.approx(10 * rate_limit.RATE_DECREASE)
+    # Otro limitador con el mismo nombre y store comparte la pausa
+    RateLimiter(10, name=limiter.name, store=limiter.store).acquire()
+    assert clock() - start >= 2.0
+
+
+def test_rate_never_drops_below_the_minimum(limiter):
+    for _ in range(50):
+        limiter.record_rate_limited(0.0)
+    assert limiter.current_rate() == pytest.approx(10 * rate_limit.MIN_RATE_FRACTION)
+
+
+def test_successes_recover_the_rate_additively_up_to_the_maximum(limiter):
+    limiter.record_rate_limited(0.0)
+    limiter.record_success()
+    assert limiter.current_rate() == pytest.approx(7.5 + 10 * rate_limit.RATE_INCREASE)
+    for _ in range(100):
+        limiter.record_success()
+    assert limiter.current_rate() == pytest.approx(10)
+
+
+def test_call_retries_rate_limits_with_backoff(limiter, clock):
+    attempts = []
+
+    def flaky():
+        attempts.append(clock())
+        if len(attempts) < 3:
+            raise RateLimited()
+        return "ok"
+
+    assert limiter.call(flaky) == "ok"
+    assert len(attempts) == 3
+    # Cada reintento espera al menos lo que pide Retry-After
+    assert attempts[1] - attempts[0] >= 1.0 and attempts[2] - attempts[1] >= 1.0
+    assert limiter.current_rate() == pytest.approx(10 * 0.75 ** 2 + 10 * rate_limit.RATE_INCREASE)
+
+
+def test_call_gives_up_after_max_retries(limiter):
+    calls = []
+
+    def always_limited():
+        calls.append(1)
+        raise RateLimited()
+
+    with pytest.raises(RateLimited):
+        limiter.call(always_limited)
+    assert len(calls) == limiter.max_retries + 1
+
+
+def test_other_errors_are_not_retried(limiter):
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        limiter.call(broken)
+    assert len(calls) == 1
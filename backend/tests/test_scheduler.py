@@ -0,0 +1,145 @@
+import random
+from datetime import datetime, timedelta
+
+from models import Playlist
+from scheduler import AutoSyncScheduler
+
+HOUR = 3600.0
+
+
+class Jobs:
+    """Cola que guarda los jobs en lugar de ejecutarlos; finish() los da por terminados."""
+
+    def __init__(self, pending=0):
+        self.waiting = pending
+        self.submitted = []
+
+    def pending(self):
+        return self.waiting
+
+    def submit(self, user_id, sync_type, spotify_playlist_id, youtube_playlist_id, job, playlist_id=None,
+               on_done=None):
+        self.submitted.append((playlist_id, on_done))
+        return len(self.submitted), True
+
+    def finish(self, result):
+        for _, on_done in self.submitted:
+            on_done(result)
+        self.submitted = []
+
+
+class Sync:
+    def __init__(self, changed=True):
+        self.changed = changed
+
+    def has_changed(self, spotify_playlist_id, youtube_playlist_id):
+        return self.changed
+
+
+def add_playlists(session_factory, count, last_synced_at=None, interval_minutes=60, priority=0):
+    db = session_factory()
+    db.add_all(Playlist(
+        name=f"p{i}",
+        owner_id=1,
+        spotify_playlist_id=f"sp{i}",
+        youtube_playlist_id=f"yt{i}",
+        auto_sync_interval=interval_minutes,
+        auto_sync_priority=priority,
+        last_synced_at=last_synced_at
+    ) for i in range(count))
+    db.commit()
+    ids = [row.id for row in db.query(Playlist.id).order_by(Playlist.id)]
+    db.close()
+    return ids
+
+
+def scheduler(session_factory, clock, jobs=None, sync=None, **options):
+    return AutoSyncScheduler(
+        session_factory,
+        jobs or Jobs(),
+        lambda user_id: sync or Sync(),
+        clock=clock,
+        rng=random.Random(1),
+        **options
+    )
+
+
+def test_new_playlists_start_at_a_stable_phase_within_their_interval(session_factory, clock):
+    add_playlists(session_factory, 50)
+    first = scheduler(session_factory, clock)
+    first.reload()
+    offsets = [entry.next_due - clock() for entry in first.entries.values()]
+    assert all(0 <= offset < HOUR for offset in offsets)
+    # Repartidas en el intervalo, no todas juntas
+    assert max(offsets) - min(offsets) > HOUR / 2
+
+    # Después de un reinicio cada playlist conserva su fase
+    again = scheduler(session_factory, clock)
+    again.reload()
+    assert {i: e.next_due for i, e in again.entries.items()} == {i: e.next_due for i, e in first.entries.items()}
+
+
+def test_next_run_is_one_interval_later_with_jitter(session_factory, clock):
+    add_playlists(session_factory, 1, last_synced_at=datetime.utcfromtimestamp(clock()))
+    auto_sync = scheduler(session_factory, clock, jitter=0.1)
+    auto_sync.reload()
+    offset = next(iter(auto_sync.entries.values())).next_due - clock()
+    assert 0.9 * HOUR <= offset <= 1.1 * HOUR
+
+
+def test_overdue_playlists_catch_up_spread_over_the_window(session_factory, clock):
+    add_playlists(session_factory, 100, last_synced_at=datetime.utcfromtimestamp(clock()) - timedelta(days=2))
+    auto_sync = scheduler(session_factory, clock, catch_up_window=900)
+    auto_sync.reload()
+    offsets = sorted(entry.next_due - clock() for entry in auto_sync.entries.values())
+    assert all(0 <= offset <= 900 for offset in offsets)
+    assert offsets[-1] - offsets[0] > 600
+    # En cada vuelta sólo sale una parte
+    assert len(auto_sync.due(clock() + 60)) < 20
+
+
+def test_tick_dispatches_by_priority_up_to_max_in_flight(session_factory, clock):
+    low = add_playlists(session_factory, 3, last_synced_at=datetime.utcfromtimestamp(clock()) - timedelta(days=1))
+    high = add_playlists(session_factory, 1, last_synced_at=datetime.utcfromtimestamp(clock()) - timedelta(days=1),
+                         priority=5)[-1:]
+    jobs = Jobs()
+    auto_sync = scheduler(session_factory, clock, jobs=jobs, max_in_flight=2, catch_up_window=1)
+    auto_sync.reload()
+    clock.advance(10)
+    auto_sync.tick()
+    assert [playlist_id for playlist_id, _ in jobs.submitted][0] == high[0]
+    assert len(jobs.submitted) == 2 and set(auto_sync.in_flight) <= set(low + high)
+
+    # Hasta que terminan, no sale nada más
+    auto_sync.tick()
+    assert len(jobs.submitted) == 2
+    jobs.finish({'synced': 1})
+    assert auto_sync.in_flight == {}
+
+
+def test_failed_run_is_retried_even_if_nothing_changed(session_factory, clock):
+    add_playlists(session_factory, 1, last_synced_at=datetime.utcfromtimestamp(clock()) - timedelta(days=1))
+    jobs, sync = Jobs(), Sync(changed=False)
+    auto_sync = scheduler(session_factory, clock, jobs=jobs, sync=sync, catch_up_window=1)
+    auto_sync.reload()
+    clock.advance(10)
+    auto_sync.tick()
+    # Nada cambió desde el último snapshot: se saltea
+    assert auto_sync.stats['skipped_unchanged'] == 1 and not jobs.submitted
+
+    entry = next(iter(auto_sync.entries.values()))
+    entry.pending_work = True
+    clock.advance(2 * HOUR)
+    auto_sync.tick()
+    assert len(jobs.submitted) == 1
+    jobs.finish(None)
+    assert entry.pending_work
+
+
+def test_yields_to_pending_manual_syncs(session_factory, clock):
+    add_playlists(session_factory, 2, last_synced_at=datetime.utcfromtimestamp(clock()) - timedelta(days=1))
+    jobs = Jobs(pending=3)
+    auto_sync = scheduler(session_factory, clock, jobs=jobs, catch_up_window=1, queue_limit=2)
+    clock.advance(10)
+    auto_sync.tick()
+    assert not jobs.submitted and auto_sync.stats['yielded'] == 1
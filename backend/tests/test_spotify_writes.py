@@ -0,0 +1,55 @@
+import spotipy
+
+from playlist_sync import PlaylistSync
+from tracks import TrackRecord
+
+
+class SpotifyWrites:
+    """playlist_add_items que falla con `status` si el lote tiene alguna URI de `bad`."""
+
+    def __init__(self, bad=(), status=400):
+        self.bad = set(bad)
+        self.status = status
+        self.calls = []
+
+    def playlist_add_items(self, playlist_id, uris):
+        self.calls.append(list(uris))
+        if self.bad.intersection(uris):
+            raise spotipy.SpotifyException(self.status, -1, "rejected")
+
+
+def add_items(spotify, count, chunk_size=100):
+    pending = [(i, TrackRecord(f"v{i}", f"Song {i}", "Artist"), f"spotify:track:{i}") for i in range(count)]
+    results = PlaylistSync(spotify, None)._add_spotify_items("playlist", pending, chunk_size)
+    return {index: error for index, _, error in results}
+
+
+def test_chunks_of_at_most_chunk_size():
+    spotify = SpotifyWrites()
+    errors = add_items(spotify, 250)
+    assert [len(call) for call in spotify.calls] == [100, 100, 50]
+    assert errors == {i: None for i in range(250)}
+
+
+def test_400_bisects_until_the_bad_item_is_isolated():
+    spotify = SpotifyWrites(bad={"spotify:track:37"})
+    errors = add_items(spotify, 100)
+    assert [i for i, error in errors.items() if error] == [37]
+    assert len(errors) == 100
+    # El lote entero y 2 llamadas por nivel de la bisección (log2(100) < 7), no una por track
+    assert len(spotify.calls) <= 1 + 2 * 7
+    assert ["spotify:track:37"] in spotify.calls
+
+
+def test_other_errors_fail_the_chunk_without_bisecting():
+    spotify = SpotifyWrites(bad={"spotify:track:5"}, status=500)
+    errors = add_items(spotify, 150)
+    assert len(spotify.calls) == 2
+    assert [i for i, error in errors.items() if error] == list(range(100))
+
+
+def test_unwritable_playlist_fails_the_remaining_chunks_without_calling():
+    spotify = SpotifyWrites(bad={"spotify:track:0"}, status=404)
+    errors = add_items(spotify, 250)
+    assert len(spotify.calls) == 1
+    assert all(errors[i] for i in range(250))
@@ -0,0 +1,55 @@
+from functools import lru_cache
+from typing import Dict
+import re
+
+from unidecode import unidecode
+
+NORMALIZE_CACHE_SIZE = 65536
+
+_NON_WORD = re.compile(r'[^\w\s]')
+
+# Artistas invitados: "(feat. X)", "[ft. X]" o "ft. X" hasta el final o hasta un " - "
+_FEATURING = re.compile(
+    r'\s*[(\[]\s*(?:feat|ft|featuring)\b\.?[^)\]]*[)\]]'
+    r'|\s+(?:feat|ft|featuring)\b\.?\s(?:(?!\s-\s).)*',
+    re.IGNORECASE
+)
+
+# Patrones comunes en títulos, compilados una sola vez
+_METADATA_PATTERNS = [
+    re.compile(r'(?P<title>.*?)\s*-\s*(?P<artist>.*?)(?:\s*\(.*\))?$', re.IGNORECASE),  # "Título - Artista"
+    re.compile(r'(?P<artist>.*?)\s*-\s*(?P<title>.*?)(?:\s*\(.*\))?$', re.IGNORECASE),  # "Artista - Título"
+    re.compile(r'(?P<title>.*?)\s*by\s*(?P<artist>.*?)(?:\s*\(.*\))?$', re.IGNORECASE),  # "Título by Artista"
+]
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_text(text: str) -> str:
+    """Normaliza el texto para comparación."""
+    # Convertir a minúsculas
+    text = text.lower()
+    # Remover acentos (un texto ASCII no tiene nada que transliterar)
+    if not text.isascii():
+        text = unidecode(text)
+    # Remover caracteres especiales y espacios extra
+    text = _NON_WORD.sub('', text)
+    return ' '.join(text.split())
+
+
+def strip_featuring(text: str) -> str:
+    """Quita los artistas invitados de un título o artista ("Despacito (feat. Daddy Yankee)")."""
+    return _FEATURING.sub('', text).strip()
+
+
+def extract_metadata(title: str) -> Dict[str, str]:
+    """Extrae metadatos de un título de canción o video."""
+    for pattern in _METADATA_PATTERNS:
+        match = pattern.match(title)
+        if match:
+            return {
+                'title': match.group('title').strip(),
+                'artist': match.group('artist').strip()
+            }
+
+    # Si no coincide con ningún patrón, asumimos que todo es el título
+    return {'title': title.strip(), 'artist': ''}
@@ -0,0 +1,56 @@
+from typing import Dict, Optional
+import sys
+
+from text_processing import normalize_text, strip_featuring
+
+
+class TrackRecord:
+    """Track o video de una playlist, con __slots__ para ocupar menos que un dict."""
+
+    # uri es lo que se escribe en la playlist: la URI del track en Spotify o el videoId en
+    # YouTube (el id de un item de YouTube es el del item, no el del video)
+    __slots__ = ('id', 'title', 'artist', 'normalized', 'uri', '_hash')
+
+    def __init__(
+        self,
+        id: str,
+        title: str,
+        artist: str,
+        normalized: Optional[str] = None,
+        uri: Optional[str] = None
+    ):
+        self.id = id
+        self.title = title
+        # El artista suele repetirse muchas veces en la misma playlist
+        self.artist = sys.intern(artist)
+        self.uri = uri
+        if normalized is None:
+            # Sin los invitados: suelen estar de un solo lado ("Despacito" contra "Despacito ft. Daddy Yankee")
+            normalized = normalize_text(f"{strip_featuring(title)} {strip_featuring(artist)}")
+        self.normalized = normalized
+        self._hash = hash((id, normalized))
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TrackRecord):
+            return NotImplemented
+        return self._hash == other._hash and self.id == other.id and self.normalized == other.normalized
+
+    def __repr__(self) -> str:
+        return f"TrackRecord(id={self.id!r}, title={self.title!r}, artist={self.artist!r})"
+
+    def to_dict(self) -> Dict[str, str]:
+        """Forma usada en las respuestas de la API y en los snapshots guardados."""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'artist': self.artist,
+            'normalized': self.normalized,
+            'uri': self.uri
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str]) -> 'TrackRecord':
+        return cls(data['id'], data['title'], data['artist'], data.get('normalized'), data.get('uri'))
@@ -78,8 +78,9 @@ export const PlaylistSync: React.FC = () => {
 
     setLoading(true);
     try {
-      const data = await syncService.syncSpotifyToYoutube(selectedSpotify, selectedYoutube);
-      setResult(data);
+      const { job_id } = await syncService.syncSpotifyToYoutube(selectedSpotify, selectedYoutube);
+      const job = await syncService.waitForSyncJob(job_id, setResult);
+      setResult(job.result ?? job);
     } catch (error) {
       console.error('Error syncing to YouTube:', error);
     } finally {
@@ -92,8 +93,9 @@ export const PlaylistSync: React.FC = () => {
 
     setLoading(true);
     try {
-      const data = await syncService.syncYoutubeToSpotify(selectedSpotify, selectedYoutube);
-      setResult(data);
+      const { job_id } = await syncService.syncYoutubeToSpotify(selectedSpotify, selectedYoutube);
+      const job = await syncService.waitForSyncJob(job_id, setResult);
+      setResult(job.result ?? job);
     } catch (error) {
       console.error('Error syncing to Spotify:', error);
     } finally {
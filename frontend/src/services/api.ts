@@ -124,4 +124,28 @@ export const syncService = {
     });
     return response.data;
   },
+  getSyncJob: async (jobId: number) => {
+    const response = await api.get(`/sync/jobs/${jobId}`);
+    return response.data;
+  },
+  // Consulta el job hasta que termina, informando el progreso en cada vuelta; pasado timeoutMs deja de esperar
+  waitForSyncJob: async (
+    jobId: number,
+    onProgress?: (job: any) => void,
+    intervalMs: number = 1000,
+    timeoutMs: number = 30 * 60 * 1000
+  ) => {
+    const deadline = Date.now() + timeoutMs;
+    while (true) {
+      const job = await syncService.getSyncJob(jobId);
+      if (onProgress) onProgress(job);
+      if (job.status === 'success' || job.status === 'failed') {
+        return job;
+      }
+      if (Date.now() >= deadline) {
+        throw new Error(`Sync job ${jobId} did not finish in ${Math.round(timeoutMs / 1000)}s`);
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
 }; 
\ No newline at end of file